@@ -10,5 +10,6 @@ class AccountsConfig(AppConfig):
     verbose_name = 'User Accounts'
 
     def ready(self):
-        """Import signals when app is ready."""
+        """Import signals and system checks when app is ready."""
+        import apps.accounts.checks  # noqa: F401
         import apps.accounts.signals  # noqa: F401
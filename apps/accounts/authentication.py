@@ -1,24 +1,96 @@
 """
 Custom JWT authentication that works with or without 'Bearer' prefix.
 """
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .revocation import revocation_store
+from .tokens import EMAIL_CLAIM, ROLES_CLAIM, is_denied
 
 
 class FlexibleJWTAuthentication(JWTAuthentication):
     """
     JWT authentication that accepts tokens with or without 'Bearer' prefix.
-    
+
     Accepts:
     - Authorization: Bearer <token>
     - Authorization: <token>
     """
-    
+
     def get_header(self, request):
         """Get the Authorization header and auto-add 'Bearer ' if missing."""
         header = super().get_header(request)
-        
+
         if header and not header.startswith(b'Bearer '):
             # Token provided without 'Bearer' prefix - add it
             header = b'Bearer ' + header
-        
+
         return header
+
+
+def _load_user(user_id):
+    try:
+        return get_user_model().objects.get(**{api_settings.USER_ID_FIELD: user_id})
+    except get_user_model().DoesNotExist:
+        raise AuthenticationFailed('User not found.', code='user_not_found')
+
+
+class TokenUser(SimpleLazyObject):
+    """
+    Request user backed by access token claims.
+
+    ``id``/``pk``, ``email`` and the roles used by ``apps.accounts.roles``
+    come straight from the token. Anything else, including ``isinstance``
+    checks and passing the user to the ORM as a model instance, loads the
+    ``User`` row on first use.
+    """
+
+    def __init__(self, token):
+        # simplejwt stores the id as a string; compare equal to ``user_id``
+        # columns by converting it back to the primary key's type.
+        user_id = get_user_model()._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+        super().__init__(lambda: _load_user(user_id))
+        self.__dict__.update(
+            id=user_id,
+            pk=user_id,
+            email=token.get(EMAIL_CLAIM, ''),
+            is_active=True,
+            is_authenticated=True,
+            is_anonymous=False,
+        )
+        if ROLES_CLAIM in token:
+            self.__dict__['_roles'] = frozenset(token[ROLES_CLAIM])
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        return f'<TokenUser: {self.pk}>'
+
+
+class StatelessJWTAuthentication(FlexibleJWTAuthentication):
+    """
+    JWT authentication that does not read the user from the database.
+
+    The request user is a ``TokenUser`` built from the token's claims.
+    Tokens issued before a deny-list cutoff (see ``apps.accounts.tokens``)
+    and tokens revoked by ``jti`` (see ``apps.accounts.revocation``) are
+    rejected.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        if is_denied(user_id, validated_token.get('iat')) or revocation_store.is_revoked(
+            validated_token.get(api_settings.JTI_CLAIM)
+        ):
+            raise AuthenticationFailed('Token has been revoked.', code='token_revoked')
+
+        return TokenUser(validated_token)
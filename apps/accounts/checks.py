@@ -0,0 +1,26 @@
+"""
+System checks for the accounts app.
+"""
+from django.conf import settings
+from django.core.checks import Error, register
+
+from .roles import uses_per_process_cache
+
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    """
+    The token deny-list and role invalidations are cache writes; with a
+    per-process cache they only reach the worker that made them, so a
+    deployment (DEBUG off) must use a shared cache.
+    """
+    if settings.DEBUG or not uses_per_process_cache():
+        return []
+    return [
+        Error(
+            'The default cache is per-process, so revoked tokens and role '
+            'changes would only take effect on one worker.',
+            hint='Set REDIS_URL to use the shared Redis cache.',
+            id='accounts.E001',
+        )
+    ]
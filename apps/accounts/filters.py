@@ -0,0 +1,37 @@
+"""
+Accounts app filters.
+
+Search matches a prefix of the lower-cased email or username, which the
+``users_email_prefix_idx`` and ``users_username_prefix_idx`` pattern
+indexes serve on PostgreSQL (a substring match could not use an index).
+"""
+import django_filters
+from django.db.models import Q
+from django.db.models.functions import Lower
+from .models import User
+
+
+class UserFilter(django_filters.FilterSet):
+    """Filter for the admin user directory."""
+
+    search = django_filters.CharFilter(
+        method='filter_search',
+        help_text='Prefix of the email or username (case-insensitive)'
+    )
+    role = django_filters.CharFilter(
+        field_name='groups__name',
+        help_text='Group name, e.g. Administrators or Members'
+    )
+    is_active = django_filters.BooleanFilter()
+
+    class Meta:
+        model = User
+        fields = ['search', 'role', 'is_active']
+
+    def filter_search(self, queryset, name, value):
+        prefix = value.strip().lower()
+        if not prefix:
+            return queryset
+        return queryset.alias(
+            email_lower=Lower('email'), username_lower=Lower('username'),
+        ).filter(Q(email_lower__startswith=prefix) | Q(username_lower__startswith=prefix))
@@ -0,0 +1,19 @@
+"""
+Management command to delete revocation records of expired tokens.
+"""
+from django.core.management.base import BaseCommand
+from apps.accounts.revocation import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete revoked-token records past their expiry (run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows deleted per batch'
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {deleted} expired revoked tokens.'))
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.17 on 2026-10-19 08:25
+
+from django.db import migrations, models
+
+# Prefix search (LIKE 'abc%') on lower(email)/lower(username) can only use a
+# btree index built with pattern operators under a non-C collation. These
+# are PostgreSQL-specific, so they are created outside the model state.
+PREFIX_INDEXES = {
+    'users_email_prefix_idx': 'lower(email) text_pattern_ops',
+    'users_username_prefix_idx': 'lower(username) text_pattern_ops',
+}
+
+
+def create_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, expression in PREFIX_INDEXES.items():
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON users ({expression})')
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in PREFIX_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_token_revocation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_at', 'id'], name='users_created_id_idx'),
+        ),
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -5,6 +5,7 @@ Extended User model with Django Groups integration for role-based access.
 """
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from . import roles
 
 
 class User(AbstractUser):
@@ -16,6 +17,11 @@ class User(AbstractUser):
     - Members: Browse books, checkout/return books, manage own profile
     """
     email = models.EmailField(unique=True)
+    tokens_revoked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='Refresh tokens issued before this time are rejected (log out everywhere)'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -25,16 +31,50 @@ class User(AbstractUser):
     class Meta:
         db_table = 'users'
         ordering = ['-created_at']
+        indexes = [
+            # Admin user directory (cursor pagination); prefix search indexes
+            # are PostgreSQL-only, see migration 0003_user_directory_indexes
+            models.Index(fields=['created_at', 'id'], name='users_created_id_idx'),
+        ]
 
     @property
     def is_administrator(self) -> bool:
         """Check if user belongs to Administrators group."""
-        return self.groups.filter(name='Administrators').exists()
+        return roles.is_administrator(self)
 
     @property
     def is_member(self) -> bool:
         """Check if user belongs to Members group."""
-        return self.groups.filter(name='Members').exists()
+        return roles.is_member(self)
 
     def __str__(self) -> str:
         return self.email
+
+
+class RevokedToken(models.Model):
+    """
+    Revoked JWT, by ``jti``.
+
+    Authoritative record behind the per-worker Bloom filter in
+    ``apps.accounts.revocation``. Rows are only needed until the token
+    would have expired; ``purge_revoked_tokens`` deletes them after that.
+    """
+    TYPE_ACCESS = 'access'
+    TYPE_REFRESH = 'refresh'
+
+    jti = models.CharField(max_length=255, unique=True)
+    token_type = models.CharField(max_length=16)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='revoked_tokens'
+    )
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'revoked_tokens'
+
+    def __str__(self) -> str:
+        return f"{self.token_type} {self.jti}"
@@ -0,0 +1,20 @@
+"""
+Accounts app pagination classes.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """
+    Cursor pagination for the user directory, newest accounts first.
+
+    Query parameters:
+    - cursor: Opaque cursor taken from the 'next'/'previous' links
+    - page_size: Items per page (default: 50, max: 200)
+
+    The ``(created_at, id)`` ordering is backed by ``users_created_id_idx``.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-created_at', '-id')
@@ -1,7 +1,11 @@
 """
 DRF permissions integrated with Django Groups.
+
+Group membership is resolved through ``apps.accounts.roles``, so repeated
+checks within a request cost nothing after the first.
 """
 from rest_framework.permissions import BasePermission, SAFE_METHODS
+from .roles import is_administrator
 
 
 class IsAdministrator(BasePermission):
@@ -11,10 +15,7 @@ class IsAdministrator(BasePermission):
     message = 'Only administrators can perform this action.'
 
     def has_permission(self, request, view):
-        return (
-            request.user.is_authenticated and
-            request.user.groups.filter(name='Administrators').exists()
-        )
+        return is_administrator(request.user)
 
 
 class IsMember(BasePermission):
@@ -34,10 +35,7 @@ class IsAdministratorOrReadOnly(BasePermission):
     def has_permission(self, request, view):
         if request.method in SAFE_METHODS:
             return True
-        return (
-            request.user.is_authenticated and
-            request.user.groups.filter(name='Administrators').exists()
-        )
+        return is_administrator(request.user)
 
 
 class IsOwnerOrAdministrator(BasePermission):
@@ -46,7 +44,8 @@ class IsOwnerOrAdministrator(BasePermission):
     """
     def has_object_permission(self, request, view, obj):
         # Administrators have full access
-        if request.user.groups.filter(name='Administrators').exists():
+        if is_administrator(request.user):
             return True
-        # Check if the object belongs to the user
-        return hasattr(obj, 'user') and obj.user == request.user
+        # Check if the object belongs to the user (by id, so a token-backed
+        # request user is not loaded from the database)
+        return getattr(obj, 'user_id', None) == request.user.pk
@@ -0,0 +1,245 @@
+"""
+Bulk provisioning of member accounts.
+
+Registering users one at a time costs a password hash, an email uniqueness
+query, an INSERT and the ``assign_default_group`` signal's group lookup and
+m2m insert per user. For onboarding thousands of members at once this
+module instead:
+
+- validates every row up front and checks email and username uniqueness
+  with one set query each (per thousand rows);
+- hashes passwords in a process pool (``PROVISIONING_HASH_WORKERS``) when
+  run from the ``provision_members`` command; the admin endpoint takes at
+  most ``PROVISIONING_MAX_ROWS`` rows and hashes them in-process;
+- inserts users and their Members group rows with ``bulk_create``, which
+  sends no per-row signals. New users have no cached roles or tokens, so
+  the role and token signals have nothing to do for them.
+
+Rows that fail are reported by line number and skipped; the rest are
+created. Rows without a password get an unusable one (set it later via a
+password reset).
+"""
+import csv
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from .models import User
+from .roles import MEMBERS
+
+DEFAULT_BATCH_SIZE = 1000
+
+FIELDS = ['email', 'username', 'first_name', 'last_name', 'password']
+
+
+def read_rows(stream: io.TextIOBase, fmt: str) -> Iterator[Tuple[int, Dict]]:
+    """
+    Yield ``(line number, row)`` from a CSV (with a header row) or JSON Lines
+    stream. A JSONL line that does not parse is yielded with a ``None`` row.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+
+
+def guess_format(filename: str) -> str:
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def _setup_worker() -> None:
+    # A no-op under fork; spawned workers need the app registry for hashers.
+    django.setup()
+
+
+def hash_passwords(passwords: List[str], workers: Optional[int] = None) -> List[str]:
+    """Hash ``passwords`` with the default hasher, in parallel when worthwhile."""
+    if workers is None:
+        workers = getattr(settings, 'PROVISIONING_HASH_WORKERS', None) or os.cpu_count() or 1
+    workers = min(workers, len(passwords))
+    if workers <= 1:
+        return [make_password(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker) as pool:
+        return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def _clean(row: Optional[Dict]) -> Tuple[Optional[Dict], Optional[str]]:
+    """Return the cleaned row, or an error message."""
+    if row is None:
+        return None, 'Not a JSON object.'
+    cleaned = {field: str(row.get(field) or '').strip() for field in FIELDS}
+    if not cleaned['email']:
+        return None, 'email is required.'
+    if not cleaned['username']:
+        return None, 'username is required.'
+    cleaned['email'] = User.objects.normalize_email(cleaned['email'])
+    try:
+        validate_email(cleaned['email'])
+    except ValidationError:
+        return None, 'Enter a valid email address.'
+    if cleaned['password']:
+        candidate = User(**{key: value for key, value in cleaned.items() if key != 'password'})
+        try:
+            validate_password(cleaned['password'], user=candidate)
+        except ValidationError as exc:
+            return None, ' '.join(exc.messages)
+    return cleaned, None
+
+
+def _existing(rows: List[Dict]) -> Tuple[set, set]:
+    """Emails and usernames among ``rows`` that are already taken."""
+    emails, usernames = set(), set()
+    for start in range(0, len(rows), DEFAULT_BATCH_SIZE):
+        chunk = rows[start:start + DEFAULT_BATCH_SIZE]
+        emails.update(User.objects.filter(
+            email__in=[row['email'] for row in chunk]
+        ).values_list('email', flat=True))
+        usernames.update(User.objects.filter(
+            username__in=[row['username'] for row in chunk]
+        ).values_list('username', flat=True))
+    return emails, usernames
+
+
+def _conflict(row: Dict, emails: set, usernames: set) -> Optional[str]:
+    if row['email'] in emails:
+        return 'A user with this email already exists.'
+    if row['username'] in usernames:
+        return 'A user with this username already exists.'
+    return None
+
+
+def _insert(rows: List[Tuple[int, Dict]], members: Group) -> int:
+    """Create one batch of users and their Members rows in one transaction."""
+    users = [
+        User(
+            email=row['email'], username=row['username'],
+            first_name=row['first_name'], last_name=row['last_name'],
+            password=row['password'],
+        )
+        for _, row in rows
+    ]
+    Membership = User.groups.through
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        if any(user.pk is None for user in users):
+            ids = dict(User.objects.filter(
+                email__in=[user.email for user in users]
+            ).values_list('email', 'id'))
+            for user in users:
+                user.pk = ids[user.email]
+        Membership.objects.bulk_create([
+            Membership(user_id=user.pk, group_id=members.pk) for user in users
+        ])
+    return len(users)
+
+
+def _insert_singly(rows: List[Tuple[int, Dict]], members: Group, errors: List[Dict]) -> int:
+    """Insert ``rows`` one per transaction, reporting the ones that clash."""
+    created = 0
+    for line, row in rows:
+        try:
+            created += _insert([(line, row)], members)
+        except IntegrityError:
+            error = _conflict(row, *_existing([row])) or 'A user with this email or username already exists.'
+            errors.append({'line': line, 'email': row['email'], 'error': error})
+    return created
+
+
+def provision_members(
+    rows: Iterable[Tuple[int, Optional[Dict]]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: Optional[int] = None,
+) -> Dict:
+    """
+    Create Members from ``(line number, row)`` pairs (see ``read_rows``).
+
+    Returns ``{'created', 'failed', 'errors', 'seconds', 'rows_per_second'}``
+    where ``errors`` lists ``{'line', 'email', 'error'}`` for skipped rows.
+    """
+    started = time.perf_counter()
+    errors = []
+    valid: List[Tuple[int, Dict]] = []
+    seen_emails, seen_usernames = set(), set()
+
+    for line, row in rows:
+        cleaned, error = _clean(row)
+        if cleaned is not None and _conflict(cleaned, seen_emails, seen_usernames):
+            error = 'Duplicate of an earlier row.'
+        if error:
+            errors.append({'line': line, 'email': (row or {}).get('email', ''), 'error': error})
+            continue
+        seen_emails.add(cleaned['email'])
+        seen_usernames.add(cleaned['username'])
+        valid.append((line, cleaned))
+
+    if valid:
+        taken_emails, taken_usernames = _existing([row for _, row in valid])
+        fresh = []
+        for line, row in valid:
+            error = _conflict(row, taken_emails, taken_usernames)
+            if error:
+                errors.append({'line': line, 'email': row['email'], 'error': error})
+            else:
+                fresh.append((line, row))
+        valid = fresh
+
+    to_hash = [row['password'] for _, row in valid if row['password']]
+    hashed = iter(hash_passwords(to_hash, workers) if to_hash else [])
+    for _, row in valid:
+        row['password'] = next(hashed) if row['password'] else make_password(None)
+
+    created = 0
+    members, _ = Group.objects.get_or_create(name=MEMBERS)
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
+        try:
+            created += _insert(batch, members)
+        except IntegrityError:
+            # Someone registered one of these addresses since the check above
+            taken_emails, taken_usernames = _existing([row for _, row in batch])
+            remaining = []
+            for line, row in batch:
+                error = _conflict(row, taken_emails, taken_usernames)
+                if error:
+                    errors.append({'line': line, 'email': row['email'], 'error': error})
+                else:
+                    remaining.append((line, row))
+            if remaining:
+                try:
+                    created += _insert(remaining, members)
+                except IntegrityError:
+                    # ...and again since the re-check: go one row at a time
+                    created += _insert_singly(remaining, members, errors)
+
+    seconds = time.perf_counter() - started
+    errors.sort(key=lambda error: error['line'])
+    return {
+        'created': created,
+        'failed': len(errors),
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(created / seconds, 1) if seconds else None,
+    }
@@ -0,0 +1,216 @@
+"""
+JWT revocation by ``jti``.
+
+Revoked tokens are recorded in ``RevokedToken``, the authoritative store.
+Every authenticated request has to ask "is this token revoked?" and the
+answer is almost always no, so each worker keeps a Bloom filter of the
+revoked ``jti`` values that have not yet expired:
+
+- not in the filter: not revoked, answered in memory with no I/O;
+- in the filter: possibly revoked (false positives are rare, see
+  ``REVOCATION_BLOOM_ERROR_RATE``), confirmed against the table.
+
+Each worker adds newly revoked tokens to its filter at once and picks up
+revocations made by other workers within ``REVOCATION_SYNC_SECONDS``. Each
+sync re-reads rows from ``SYNC_OVERLAP`` before the previous one, so rows
+committed late by a slow transaction are not missed. The
+filter is rebuilt from unexpired rows every ``REVOCATION_REBUILD_SECONDS``,
+which drops expired entries (a Bloom filter cannot delete); the rows
+themselves are removed by ``manage.py purge_revoked_tokens``.
+"""
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import RevokedToken, User
+from .tokens import deny_issued_tokens
+
+DEFAULT_CAPACITY = 100_000
+DEFAULT_ERROR_RATE = 0.001
+DEFAULT_SYNC_SECONDS = 10
+DEFAULT_REBUILD_SECONDS = 3600
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, using double hashing."""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class RevocationStore:
+    """Per-worker Bloom filter in front of the ``RevokedToken`` table."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything; the next check rebuilds from the table."""
+        self._bloom: Optional[BloomFilter] = None
+        self._since: Optional[datetime] = None
+        self._synced_at = 0.0
+        self._built_at = 0.0
+
+    def _setting(self, name: str, default):
+        return getattr(settings, name, default)
+
+    def _rebuild(self) -> None:
+        started = timezone.now()
+        jtis = list(
+            RevokedToken.objects.filter(expires_at__gt=started).values_list('jti', flat=True)
+        )
+        bloom = BloomFilter(
+            max(self._setting('REVOCATION_BLOOM_CAPACITY', DEFAULT_CAPACITY), 2 * len(jtis)),
+            self._setting('REVOCATION_BLOOM_ERROR_RATE', DEFAULT_ERROR_RATE),
+        )
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom = bloom
+        self._since = started
+        self._built_at = self._synced_at = time.monotonic()
+
+    def _sync(self) -> None:
+        now = time.monotonic()
+        if (
+            self._bloom is None
+            or now - self._built_at >= self._setting('REVOCATION_REBUILD_SECONDS', DEFAULT_REBUILD_SECONDS)
+            or self._bloom.count > self._bloom.capacity
+        ):
+            self._rebuild()
+            return
+        if now - self._synced_at < self._setting('REVOCATION_SYNC_SECONDS', DEFAULT_SYNC_SECONDS):
+            return
+        started = timezone.now()
+        recent = RevokedToken.objects.filter(revoked_at__gte=self._since - SYNC_OVERLAP)
+        for jti in recent.values_list('jti', flat=True):
+            self._bloom.add(jti)
+        self._since = started
+        self._synced_at = now
+
+    def add(self, jti: str) -> None:
+        """Record a revocation made by this worker."""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def might_be_revoked(self, jti: str) -> bool:
+        with self._lock:
+            self._sync()
+            return jti in self._bloom
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """Whether ``jti`` has been revoked; usually answered without I/O."""
+        if not jti or not self.might_be_revoked(jti):
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+
+revocation_store = RevocationStore()
+
+
+def _expiry(token) -> datetime:
+    return datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+
+
+def revoke_token(token, user_id: Optional[int] = None) -> None:
+    """Revoke a validated simplejwt token (access or refresh)."""
+    jti = token.get(api_settings.JTI_CLAIM)
+    if not jti:
+        return
+    RevokedToken.objects.bulk_create(
+        [RevokedToken(
+            jti=jti,
+            token_type=token.get(api_settings.TOKEN_TYPE_CLAIM, ''),
+            user_id=user_id,
+            expires_at=_expiry(token),
+        )],
+        ignore_conflicts=True,
+    )
+    # Safe to add before commit: a rolled-back revocation only costs a
+    # confirming query when the token is next checked.
+    revocation_store.add(jti)
+
+
+def claim_token(token, user_id: Optional[int] = None) -> bool:
+    """
+    Revoke ``token`` as a single-use claim: ``False`` if it was already
+    revoked, by this or any other worker, including a concurrent request
+    racing on the same token.
+    """
+    jti = token.get(api_settings.JTI_CLAIM)
+    if not jti:
+        return False
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(
+                jti=jti,
+                token_type=token.get(api_settings.TOKEN_TYPE_CLAIM, ''),
+                user_id=user_id,
+                expires_at=_expiry(token),
+            )
+    except IntegrityError:
+        return False
+    revocation_store.add(jti)
+    return True
+
+
+def revoke_user_tokens(user_ids: Iterable[int]) -> None:
+    """
+    Log users out everywhere: refresh tokens issued before now stop working
+    at their next refresh, and access tokens issued before now are denied.
+    """
+    user_ids = list(user_ids)
+    User.objects.filter(pk__in=user_ids).update(tokens_revoked_at=timezone.now())
+    transaction.on_commit(lambda: deny_issued_tokens(user_ids))
+
+
+def issued_before_logout(token, user) -> bool:
+    """Whether ``token`` predates ``user``'s last log-out-everywhere."""
+    if user.tokens_revoked_at is None:
+        return False
+    issued_at = token.get('iat')
+    return issued_at is None or issued_at < int(user.tokens_revoked_at.timestamp())
+
+
+def purge_expired(batch_size: int = 5000) -> int:
+    """Delete revocation rows for tokens that have expired. Returns rows deleted."""
+    deleted = 0
+    now = timezone.now()
+    while True:
+        ids = list(
+            RevokedToken.objects.filter(expires_at__lte=now)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += RevokedToken.objects.filter(id__in=ids).delete()[0]
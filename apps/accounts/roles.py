@@ -0,0 +1,94 @@
+"""
+Role resolution for users.
+
+A user's roles are the names of their groups. They are resolved at most
+once per request (memoized on the user object, which lives for the request)
+and cached across requests under ``roles:<user id>`` for
+``ROLE_CACHE_TIMEOUT`` seconds. Signals drop the cached entry whenever a
+user's groups change (see ``apps.accounts.signals``), so permission checks,
+querysets and serializers can ask as often as they like.
+
+That invalidation only reaches other workers through a shared cache. With a
+per-process cache (development, tests) entries live for at most
+``LOCAL_CACHE_TIMEOUT`` seconds, so a demoted administrator loses their
+rights everywhere within that time.
+"""
+from typing import FrozenSet, Iterable
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+ADMINISTRATORS = 'Administrators'
+MEMBERS = 'Members'
+
+DEFAULT_CACHE_TIMEOUT = 3600
+LOCAL_CACHE_TIMEOUT = 5
+
+_MEMO_ATTR = '_roles'
+
+
+def _cache_key(user_id: int) -> str:
+    return f'roles:{user_id}'
+
+
+def uses_per_process_cache() -> bool:
+    """Whether the default cache is private to each worker process."""
+    return isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def _timeout() -> int:
+    timeout = getattr(settings, 'ROLE_CACHE_TIMEOUT', DEFAULT_CACHE_TIMEOUT)
+    if uses_per_process_cache():
+        return min(timeout, LOCAL_CACHE_TIMEOUT)
+    return timeout
+
+
+def get_roles(user) -> FrozenSet[str]:
+    """Return the names of ``user``'s groups; anonymous users have none."""
+    if user is None or not user.is_authenticated:
+        return frozenset()
+    roles = getattr(user, _MEMO_ATTR, None)
+    if roles is not None:
+        return roles
+
+    if 'groups' in getattr(user, '_prefetched_objects_cache', {}):
+        roles = frozenset(group.name for group in user.groups.all())
+    else:
+        key = _cache_key(user.pk)
+        cached = cache.get(key)
+        if cached is None:
+            roles = frozenset(user.groups.values_list('name', flat=True))
+            cache.set(key, sorted(roles), _timeout())
+        else:
+            roles = frozenset(cached)
+    setattr(user, _MEMO_ATTR, roles)
+    return roles
+
+
+def has_role(user, role: str) -> bool:
+    return role in get_roles(user)
+
+
+def is_administrator(user) -> bool:
+    """Whether ``user`` is in the Administrators group."""
+    return has_role(user, ADMINISTRATORS)
+
+
+def is_member(user) -> bool:
+    """Whether ``user`` is in the Members group."""
+    return has_role(user, MEMBERS)
+
+
+def invalidate_roles(user_ids: Iterable[int]) -> None:
+    """Drop cached roles for ``user_ids``."""
+    keys = [_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+
+
+def forget_roles(user) -> None:
+    """Drop the per-request memo on ``user`` as well as its cached roles."""
+    user.__dict__.pop(_MEMO_ATTR, None)
+    invalidate_roles([user.pk])
@@ -1,10 +1,22 @@
 """
 Accounts app serializers.
 """
+import csv
+import io
+
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth.models import Group
+from .provisioning import guess_format, read_rows
+from .models import RevokedToken
+from .revocation import claim_token, issued_before_logout
+from .tokens import RoleRefreshToken, set_user_claims
 
 User = get_user_model()
 
@@ -89,3 +101,100 @@ class UserAdminSerializer(serializers.ModelSerializer):
             'groups', 'is_administrator', 'is_active', 'is_staff', 'created_at'
         ]
         read_only_fields = ['id', 'created_at', 'is_administrator']
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Login: issue tokens carrying the user's email and roles."""
+    token_class = RoleRefreshToken
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh: re-read email and roles so group changes reach the new access
+    token, and refuse inactive or deleted accounts, revoked refresh tokens
+    and refresh tokens issued before the user last logged out everywhere.
+
+    Revocation is checked against the table rather than the per-worker Bloom
+    filter, so a token revoked on another worker is refused at once. With
+    ``BLACKLIST_AFTER_ROTATION`` rotating claims the old refresh token
+    (``claim_token``), so of two concurrent refreshes with it only one wins.
+    """
+    token_class = RoleRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        single_use = api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION
+        # A single-use token is checked by claiming it below
+        if not single_use and RevokedToken.objects.filter(
+            jti=refresh.payload.get(api_settings.JTI_CLAIM)
+        ).exists():
+            raise InvalidToken('Token has been revoked.')
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'], 'no_active_account'
+            )
+        if issued_before_logout(refresh, user):
+            raise InvalidToken('Token has been revoked.')
+        set_user_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if single_use and not claim_token(refresh, user.pk):
+                raise InvalidToken('Token has been revoked.')
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+
+class LogoutSerializer(serializers.Serializer):
+    """Refresh token to revoke on logout; it must belong to the caller."""
+    refresh = serializers.CharField(help_text="The refresh token returned at login")
+
+    def validate_refresh(self, value):
+        try:
+            token = RoleRefreshToken(value)
+        except TokenError as exc:
+            raise serializers.ValidationError(str(exc))
+        if token.payload.get(api_settings.USER_ID_CLAIM) != str(self.context['request'].user.pk):
+            raise serializers.ValidationError("Token does not belong to the current user.")
+        return token
+
+
+class BulkProvisionSerializer(serializers.Serializer):
+    """
+    Members to create in bulk: a ``users`` list, or a CSV/JSONL ``file``
+    upload, of at most ``PROVISIONING_MAX_ROWS`` rows.
+    """
+    users = serializers.ListField(
+        child=serializers.DictField(), required=False,
+        help_text="Objects with email, username, first_name, last_name and optional password"
+    )
+    file = serializers.FileField(
+        required=False,
+        help_text="CSV (with header row) or .jsonl file with the same columns"
+    )
+
+    def validate(self, attrs):
+        if 'file' in attrs:
+            upload = attrs['file']
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+            try:
+                rows = list(read_rows(stream, guess_format(upload.name)))
+            except (UnicodeDecodeError, csv.Error) as exc:
+                raise serializers.ValidationError({'file': f'Could not read file: {exc}'})
+        elif 'users' in attrs:
+            rows = list(enumerate(attrs['users'], start=1))
+        else:
+            raise serializers.ValidationError('Provide either users or file.')
+
+        limit = settings.PROVISIONING_MAX_ROWS
+        if len(rows) > limit:
+            raise serializers.ValidationError(
+                f'At most {limit} rows per request; use the provision_members command for more.'
+            )
+        return {'rows': rows}
@@ -1,11 +1,24 @@
 """
 Accounts app signals.
-Auto-assign users to Members group on registration.
+Auto-assign users to Members group on registration. Whenever group
+membership changes, drop cached roles (see ``apps.accounts.roles``) and
+deny access tokens carrying the old roles (see ``apps.accounts.tokens``).
 """
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import Group
 from .models import User
+from .roles import forget_roles, invalidate_roles
+from .tokens import deny_issued_tokens
+
+
+@receiver(post_save, sender=User)
+def deny_tokens_of_inactive_user(sender, instance, created, **kwargs):
+    """Disabling an account revokes its outstanding access tokens."""
+    if not created and not instance.is_active:
+        user_id = instance.pk
+        transaction.on_commit(lambda: deny_issued_tokens([user_id]))
 
 
 @receiver(post_save, sender=User)
@@ -17,3 +30,49 @@ def assign_default_group(sender, instance, created, **kwargs):
     if created and not instance.is_superuser:
         members_group, _ = Group.objects.get_or_create(name='Members')
         instance.groups.add(members_group)
+
+
+def _invalidate_after_commit(user_ids) -> None:
+    """
+    Drop cached roles now and again once the transaction commits, then deny
+    access tokens issued before the commit (their role claims are stale).
+    """
+    user_ids = list(user_ids)
+    invalidate_roles(user_ids)
+
+    def on_commit():
+        invalidate_roles(user_ids)
+        deny_issued_tokens(user_ids)
+
+    transaction.on_commit(on_commit)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_roles_on_group_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalidate roles when ``user.groups`` or ``group.user_set`` changes.
+
+    For ``group.user_set.clear()`` the affected users are only known before
+    the clear, so they are collected on ``pre_clear``.
+    """
+    if action == 'pre_clear' and reverse:
+        instance._role_clear_user_ids = list(instance.user_set.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        forget_roles(instance)
+        _invalidate_after_commit([instance.pk])
+    elif action == 'post_clear':
+        _invalidate_after_commit(instance.__dict__.pop('_role_clear_user_ids', []))
+    else:
+        _invalidate_after_commit(pk_set or [])
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_roles_on_group_edit(sender, instance, **kwargs):
+    """A renamed or deleted group changes the roles of all its members."""
+    if kwargs.get('created') or instance.pk is None:
+        return
+    _invalidate_after_commit(instance.user_set.values_list('pk', flat=True))
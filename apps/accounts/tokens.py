@@ -0,0 +1,63 @@
+"""
+JWT tokens carrying the user's email and roles.
+
+Access tokens are self-contained: ``StatelessJWTAuthentication`` builds the
+request user from these claims without reading ``users`` or the group
+tables. Claims are set at login and re-read at every refresh, so a change
+to a user's groups reaches their tokens within one access token lifetime.
+
+A change that must take effect sooner (groups changed, account disabled)
+records a per-user cutoff in the cache, the deny-list. Access tokens issued
+before the cutoff are rejected and the client has to refresh. Cutoffs
+expire with the access token lifetime, after which every token issued
+before them has expired anyway. Every worker must read the same cutoffs, so
+deployments need the shared cache (system check ``accounts.E001``).
+"""
+import time
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .roles import get_roles
+
+EMAIL_CLAIM = 'email'
+ROLES_CLAIM = 'roles'
+
+
+def set_user_claims(token, user) -> None:
+    """Copy ``user``'s email and roles into ``token``."""
+    token[EMAIL_CLAIM] = user.email
+    token[ROLES_CLAIM] = sorted(get_roles(user))
+
+
+class RoleRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry email and role claims."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        set_user_claims(token, user)
+        return token
+
+
+def _deny_key(user_id) -> str:
+    return f'auth:deny:{user_id}'
+
+
+def deny_issued_tokens(user_ids: Iterable[int], now: Optional[float] = None) -> None:
+    """Reject access tokens issued to ``user_ids`` before now."""
+    cutoff = int(now if now is not None else time.time())
+    timeout = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()) + 1
+    cache.set_many({_deny_key(user_id): cutoff for user_id in user_ids}, timeout)
+
+
+def is_denied(user_id, issued_at) -> bool:
+    """
+    Whether a token issued to ``user_id`` at ``issued_at`` (seconds) falls
+    before the user's cutoff. ``iat`` has one-second resolution, so tokens
+    issued in the same second as the cutoff are still accepted.
+    """
+    cutoff = cache.get(_deny_key(user_id))
+    return cutoff is not None and (issued_at is None or issued_at < cutoff)
@@ -3,11 +3,14 @@ Accounts app URL configuration.
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
+from .views import (
+    LoginView,
+    LogoutView,
+    ProfileView,
+    RegisterView,
     TokenRefreshView,
+    UserViewSet,
 )
-from .views import RegisterView, ProfileView, UserViewSet
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')
@@ -15,8 +18,9 @@ router.register(r'users', UserViewSet, basename='user')
 urlpatterns = [
     # Authentication endpoints
     path('register/', RegisterView.as_view(), name='register'),
-    path('login/', TokenObtainPairView.as_view(), name='login'),
+    path('login/', LoginView.as_view(), name='login'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('logout/', LogoutView.as_view(), name='logout'),
     path('me/', ProfileView.as_view(), name='profile'),
     # Admin user management
     path('', include(router.urls)),
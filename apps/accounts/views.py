@@ -2,10 +2,21 @@
 Accounts app views.
 """
 from rest_framework import generics, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import get_user_model
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_yasg.utils import swagger_auto_schema, no_body
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView as BaseTokenRefreshView
+from .filters import UserFilter
+from .pagination import UserCursorPagination
+from .provisioning import provision_members
+from .revocation import revoke_token, revoke_user_tokens
 from .serializers import (
+    BulkProvisionSerializer,
+    LogoutSerializer,
     UserRegistrationSerializer,
     UserSerializer,
     UserUpdateSerializer,
@@ -24,6 +35,7 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegistrationSerializer
     permission_classes = [AllowAny]
+    throttle_scope = 'auth'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -35,6 +47,16 @@ class RegisterView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
+class LoginView(TokenObtainPairView):
+    """Obtain an access/refresh token pair (rate limited as ``auth``)."""
+    throttle_scope = 'auth'
+
+
+class TokenRefreshView(BaseTokenRefreshView):
+    """Exchange a refresh token for new tokens (rate limited as ``auth``)."""
+    throttle_scope = 'auth'
+
+
 class ProfileView(generics.RetrieveUpdateAPIView):
     """
     Current user profile endpoint.
@@ -52,6 +74,23 @@ class ProfileView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 
+class LogoutView(generics.GenericAPIView):
+    """
+    Log out of this session: revoke the given refresh token and the access
+    token the request was made with.
+    """
+    serializer_class = LogoutSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        revoke_token(serializer.validated_data['refresh'], request.user.pk)
+        if request.auth is not None and api_settings.JTI_CLAIM in request.auth:
+            revoke_token(request.auth, request.user.pk)
+        return Response({'message': 'Logged out successfully'})
+
+
 class UserViewSet(viewsets.ModelViewSet):
     """
     Admin endpoint for managing users.
@@ -60,8 +99,40 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserAdminSerializer
     permission_classes = [IsAdministrator]
-    filter_backends = []  # Disable search/ordering/pagination in Swagger
-    pagination_class = None  # Simple list
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = UserFilter
+    pagination_class = UserCursorPagination
 
     def get_queryset(self):
-        return User.objects.prefetch_related('groups').order_by('-created_at')
+        # Prefetched groups give every row's roles (and is_administrator)
+        # without a query per user
+        return User.objects.prefetch_related('groups')
+
+    @swagger_auto_schema(
+        operation_summary="Provision members in bulk (Admin)",
+        operation_description="""
+Create up to `PROVISIONING_MAX_ROWS` Members at once from a `users` list or
+an uploaded CSV/JSONL `file`. Invalid or duplicate rows are skipped and
+reported by line; the rest are created. Passwords are hashed in the web
+worker, so the limit is kept small enough to finish within the request
+timeout; use the `provision_members` management command for larger imports.
+        """,
+        request_body=BulkProvisionSerializer,
+    )
+    @action(detail=False, methods=['post'], serializer_class=BulkProvisionSerializer)
+    def provision(self, request):
+        """Create members in bulk (Admin only)."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Hash in this process: a pool forked from a web worker would take
+        # every core, and the command exists for imports that need one.
+        report = provision_members(serializer.validated_data['rows'], workers=1)
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
+
+    @swagger_auto_schema(request_body=no_body)
+    @action(detail=True, methods=['post'], url_path='logout-everywhere')
+    def logout_everywhere(self, request, pk=None):
+        """Revoke every token issued to the user so far (Admin only)."""
+        user = self.get_object()
+        revoke_user_tokens([user.pk])
+        return Response({'message': f'All sessions of {user.email} have been revoked.'})
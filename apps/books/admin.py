@@ -2,16 +2,16 @@
 Books app admin configuration.
 """
 from django.contrib import admin
-from .models import Book
+from .models import Book, Genre
 
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
     """Admin configuration for Book model."""
     list_display = ['title', 'author', 'isbn', 'genre', 'is_available', 'created_at']
-    list_filter = ['is_available', 'genre', 'created_at']
+    list_filter = ['is_available', 'genre_ref', 'created_at']
     search_fields = ['title', 'author', 'isbn', 'description']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['genre_ref', 'created_at', 'updated_at']
     ordering = ['-created_at']
     list_per_page = 25
     date_hierarchy = 'created_at'
@@ -21,7 +21,7 @@ class BookAdmin(admin.ModelAdmin):
             'fields': ('title', 'author', 'isbn')
         }),
         ('Details', {
-            'fields': ('description', 'page_count', 'genre', 'published_date')
+            'fields': ('description', 'page_count', 'genre', 'genre_ref', 'published_date')
         }),
         ('Status', {
             'fields': ('is_available',)
@@ -31,3 +31,12 @@ class BookAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+@admin.register(Genre)
+class GenreAdmin(admin.ModelAdmin):
+    """Admin configuration for Genre model."""
+    list_display = ['name', 'slug']
+    search_fields = ['name', 'slug']
+    prepopulated_fields = {'slug': ('name',)}
+    ordering = ['name']
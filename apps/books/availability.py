@@ -0,0 +1,143 @@
+"""
+Shared availability map: book id -> available flag and due date.
+
+Each book has one small integer cache entry:
+
+- ``0``: available
+- ``> 0``: checked out, value is the active loan's due date (UNIX seconds)
+- ``-1``: unavailable without an active loan (e.g. reserved for a hold)
+- ``-2``: no such book
+
+Checkout, checkin and hold changes write the entry after their transaction
+commits, and saving a book through any other path drops it. Lookups for
+thousands of ids are one ``get_many`` round trip; only cache misses fall back
+to the database, and the results are written back with ``add`` so a value
+read before a concurrent checkout commits never replaces the one it writes.
+Entries also expire after ``AVAILABILITY_CACHE_TIMEOUT`` to bound any drift.
+"""
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.core.metrics import cache_lookups
+
+from .models import Book
+
+KEY_PREFIX = 'avail:'
+AVAILABLE = 0
+UNAVAILABLE = -1
+MISSING = -2
+MISSING_TIMEOUT = 300
+DEFAULT_TIMEOUT = 600
+
+
+def _key(book_id: int) -> str:
+    return f'{KEY_PREFIX}{book_id}'
+
+
+def _timeout() -> int:
+    return getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def _encode_due(due_date: datetime) -> int:
+    return int(due_date.timestamp())
+
+
+def _set(book_id: int, value: int) -> None:
+    transaction.on_commit(lambda: cache.set(_key(book_id), value, _timeout()))
+
+
+def mark_checked_out(book_id: int, due_date: datetime) -> None:
+    """Record an active loan once the transaction commits."""
+    _set(book_id, _encode_due(due_date))
+
+
+def mark_available(book_id: int) -> None:
+    """Record that the book is on the shelf once the transaction commits."""
+    _set(book_id, AVAILABLE)
+
+
+def mark_unavailable(book_id: int) -> None:
+    """Record a book that is unavailable without an active loan."""
+    _set(book_id, UNAVAILABLE)
+
+
+def invalidate(book_id: int) -> None:
+    """Drop the entry so the next lookup reloads it from the database."""
+    cache.delete(_key(book_id))
+
+
+def _load(book_ids: Iterable[int]) -> Dict[int, int]:
+    """Compute entries for ``book_ids`` from the database (cache-miss path)."""
+    from apps.borrowings.models import Borrowing
+
+    book_ids = list(book_ids)
+    values = {book_id: MISSING for book_id in book_ids}
+    for book_id, is_available in Book.objects.filter(pk__in=book_ids).values_list('id', 'is_available'):
+        values[book_id] = AVAILABLE if is_available else UNAVAILABLE
+    loans = Borrowing.objects.filter(
+        book_id__in=book_ids, returned_at__isnull=True
+    ).values_list('book_id', 'due_date')
+    for book_id, due_date in loans:
+        values[book_id] = _encode_due(due_date)
+    return values
+
+
+def get_availability(book_ids: Iterable[int]) -> Dict[int, int]:
+    """Return raw entries for ``book_ids``, filling cache misses from the database."""
+    book_ids = list(dict.fromkeys(book_ids))
+    cached = cache.get_many([_key(book_id) for book_id in book_ids])
+    values = {}
+    misses = []
+    for book_id in book_ids:
+        value = cached.get(_key(book_id))
+        if value is None:
+            misses.append(book_id)
+        else:
+            values[book_id] = value
+
+    cache_lookups.labels('availability', 'hit').inc(len(values))
+    if misses:
+        cache_lookups.labels('availability', 'miss').inc(len(misses))
+        loaded = _load(misses)
+        values.update(loaded)
+        # Only fill entries that are still absent: a checkout or checkin
+        # committing after our read has already written the newer value.
+        timeout = _timeout()
+        for book_id, value in loaded.items():
+            cache.add(_key(book_id), value, MISSING_TIMEOUT if value == MISSING else timeout)
+    return values
+
+
+def describe(value: int) -> Optional[dict]:
+    """Turn a raw entry into ``{'available': ..., 'due_date': ...}`` (None if missing)."""
+    if value == MISSING:
+        return None
+    due_date = None
+    if value > 0:
+        due_date = datetime.fromtimestamp(value, tz=dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+    return {'available': value == AVAILABLE, 'due_date': due_date}
+
+
+def warm(batch_size: int = 5000) -> int:
+    """Load the whole catalog into the cache. Returns entries written."""
+    written = 0
+    ids = Book.objects.order_by('id').values_list('id', flat=True)
+    batch = []
+    for book_id in ids.iterator(chunk_size=batch_size):
+        batch.append(book_id)
+        if len(batch) >= batch_size:
+            written += _warm_batch(batch)
+            batch = []
+    if batch:
+        written += _warm_batch(batch)
+    return written
+
+
+def _warm_batch(book_ids) -> int:
+    values = _load(book_ids)
+    cache.set_many({_key(k): v for k, v in values.items()}, _timeout())
+    return len(values)
@@ -1,7 +1,14 @@
 """
 Books app filters.
+
+Range filters compare the raw column against constants (``published_date >=
+'2001-01-01'``) rather than wrapping the column in a function such as
+``EXTRACT(year ...)``, so they can use the indexes declared on ``Book``.
 """
+from datetime import date
+
 import django_filters
+from .genres import genre_cache
 from .models import Book
 
 
@@ -10,14 +17,56 @@ class BookFilter(django_filters.FilterSet):
 
     title = django_filters.CharFilter(lookup_expr='icontains')
     author = django_filters.CharFilter(lookup_expr='icontains')
-    genre = django_filters.CharFilter(lookup_expr='icontains')
+    genre = django_filters.CharFilter(method='filter_genre')
+    genre_id = django_filters.NumberFilter(field_name='genre_ref_id')
+    genre_slug = django_filters.CharFilter(method='filter_genre_slug')
     isbn = django_filters.CharFilter(lookup_expr='exact')
-    published_year = django_filters.NumberFilter(
-        field_name='published_date',
-        lookup_expr='year'
-    )
+    published_year = django_filters.NumberFilter(method='filter_published_year')
+    published_after = django_filters.DateFilter(field_name='published_date', lookup_expr='gte')
+    published_before = django_filters.DateFilter(field_name='published_date', lookup_expr='lte')
+    year_min = django_filters.NumberFilter(method='filter_year_min')
+    year_max = django_filters.NumberFilter(method='filter_year_max')
+    pages_min = django_filters.NumberFilter(field_name='page_count', lookup_expr='gte')
+    pages_max = django_filters.NumberFilter(field_name='page_count', lookup_expr='lte')
+    created_since = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
     is_available = django_filters.BooleanFilter()
 
     class Meta:
         model = Book
         fields = ['title', 'author', 'genre', 'isbn', 'is_available']
+
+    def filter_genre(self, queryset, name, value):
+        """
+        Exact, indexed match when ``value`` names a known genre; otherwise
+        fall back to a substring match on the free-text column.
+        """
+        genre_id = genre_cache.find(value)
+        if genre_id is not None:
+            return queryset.filter(genre_ref_id=genre_id)
+        return queryset.filter(genre__icontains=value)
+
+    def filter_genre_slug(self, queryset, name, value):
+        """Exact match on the genre slug, resolved to an id without a join."""
+        genre_id = genre_cache.find(value)
+        if genre_id is None:
+            return queryset.none()
+        return queryset.filter(genre_ref_id=genre_id)
+
+    @staticmethod
+    def _year_start(year):
+        """January 1st of ``year``, clamped to the range ``date`` supports."""
+        return date(min(max(int(year), date.min.year), date.max.year), 1, 1)
+
+    def filter_published_year(self, queryset, name, value):
+        """Books published during ``value``, as a date range."""
+        return self.filter_year_max(self.filter_year_min(queryset, name, value), name, value)
+
+    def filter_year_min(self, queryset, name, value):
+        """Books published in ``value`` or later."""
+        return queryset.filter(published_date__gte=self._year_start(value))
+
+    def filter_year_max(self, queryset, name, value):
+        """Books published in ``value`` or earlier."""
+        if int(value) >= date.max.year:
+            return queryset.filter(published_date__isnull=False)
+        return queryset.filter(published_date__lt=self._year_start(int(value) + 1))
@@ -0,0 +1,109 @@
+"""
+In-process genre lookup cache.
+
+The genre table is tiny and rarely changes, so each worker keeps the whole
+table in memory: resolving a name or slug to an id and an id back to a name
+or slug is a dict lookup, with no join or query. Local changes invalidate the
+cache immediately (see signals). Other workers pick up changes within
+``GENRE_CACHE_SECONDS``.
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+from .models import Genre
+
+DEFAULT_CACHE_SECONDS = 300
+
+
+class GenreCache:
+    """Snapshot of the genre table keyed by id, slug and lowercase name."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._by_id: Dict[int, Tuple[str, str]] = {}
+        self._by_key: Dict[str, int] = {}
+
+    def _ttl(self) -> float:
+        return getattr(settings, 'GENRE_CACHE_SECONDS', DEFAULT_CACHE_SECONDS)
+
+    def _snapshot(self) -> Tuple[Dict[int, Tuple[str, str]], Dict[str, int]]:
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self._ttl():
+            return self._by_id, self._by_key
+        by_id, by_key = {}, {}
+        for genre_id, name, slug in Genre.objects.values_list('id', 'name', 'slug'):
+            by_id[genre_id] = (name, slug)
+            by_key[slug] = genre_id
+            by_key[name.lower()] = genre_id
+        with self._lock:
+            self._by_id, self._by_key = by_id, by_key
+            self._loaded_at = time.monotonic()
+        return by_id, by_key
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+    def get(self, genre_id: Optional[int]) -> Optional[Tuple[str, str]]:
+        """Return ``(name, slug)`` for ``genre_id``."""
+        if genre_id is None:
+            return None
+        by_id, _ = self._snapshot()
+        return by_id.get(genre_id)
+
+    def find(self, value: str) -> Optional[int]:
+        """Return the id of the genre whose slug or name matches ``value`` exactly."""
+        value = (value or '').strip()
+        if not value:
+            return None
+        _, by_key = self._snapshot()
+        return by_key.get(value.lower()) or by_key.get(slugify(value, allow_unicode=True))
+
+
+genre_cache = GenreCache()
+
+CREATE_ATTEMPTS = 3
+
+
+def _free_slug(name: str) -> str:
+    """
+    Slug for a new genre ``name``. Non-ASCII letters are kept, and a clash
+    with another genre's slug gets a numeric suffix.
+    """
+    base = slugify(name, allow_unicode=True)[:100] or 'genre'
+    taken = set(Genre.objects.filter(slug__startswith=base[:90]).values_list('slug', flat=True))
+    slug, number = base, 1
+    while slug in taken:
+        number += 1
+        suffix = f'-{number}'
+        slug = base[:100 - len(suffix)] + suffix
+    return slug
+
+
+def resolve_genre_id(name: str) -> Optional[int]:
+    """
+    Return the genre id for ``name`` (matched case-insensitively), creating
+    the genre if it is new.
+
+    This is the write path, so it reads the table rather than the cache: a
+    cached id could belong to a genre whose transaction was rolled back.
+    """
+    name = (name or '').strip()[:100]
+    if not name:
+        return None
+    for attempt in range(CREATE_ATTEMPTS):
+        genre_id = Genre.objects.filter(name__iexact=name).values_list('pk', flat=True).first()
+        if genre_id is not None:
+            return genre_id
+        try:
+            with transaction.atomic():
+                return Genre.objects.create(name=name, slug=_free_slug(name)).pk
+        except IntegrityError:
+            # A concurrent save took the name or the slug; look again
+            if attempt == CREATE_ATTEMPTS - 1:
+                raise
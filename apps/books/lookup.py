@@ -0,0 +1,89 @@
+"""
+Batch lookup of books by id and ISBN.
+
+ISBN-10 and ISBN-13 identify the same book (ISBN-13 = "978" + the first
+nine ISBN-10 digits + a new check digit), and the catalog may store either
+form. Every requested ISBN is expanded to both forms and the whole batch is
+resolved with one query against the primary key and the unique isbn index.
+"""
+from typing import Dict, List, Optional
+
+from django.db.models import Q
+from rest_framework import serializers
+
+from .models import Book
+from .serializers import normalize_isbn
+
+
+def isbn13_check_digit(first_twelve: str) -> str:
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(first_twelve))
+    return str((10 - total % 10) % 10)
+
+
+def isbn10_check_digit(first_nine: str) -> str:
+    total = sum(int(digit) * (10 - i) for i, digit in enumerate(first_nine))
+    check = (11 - total % 11) % 11
+    return 'X' if check == 10 else str(check)
+
+
+def isbn_variants(isbn: str) -> List[str]:
+    """Return the stored forms an already-normalized ISBN may have."""
+    if len(isbn) == 10:
+        return [isbn, '978' + isbn[:9] + isbn13_check_digit('978' + isbn[:9])]
+    if isbn.startswith('978'):
+        isbn10 = isbn[3:12] + isbn10_check_digit(isbn[3:12])
+        # Catalog ISBNs are digits only, so an 'X' check digit can't be stored
+        if isbn10.isdigit():
+            return [isbn, isbn10]
+    return [isbn]
+
+
+def lookup_books(ids: List[int], isbns: List[str], serialize) -> Dict:
+    """
+    Resolve ``ids`` then ``isbns`` in input order.
+
+    ``serialize`` turns a ``Book`` into its output representation. Misses
+    (including malformed ISBNs) are reported explicitly with ``book: None``.
+    """
+    normalized: List[Optional[str]] = []
+    errors: Dict[int, str] = {}
+    wanted_isbns = set()
+    for position, raw in enumerate(isbns):
+        try:
+            isbn = normalize_isbn(raw)
+        except serializers.ValidationError as exc:
+            normalized.append(None)
+            errors[position] = str(exc.detail[0])
+            continue
+        normalized.append(isbn)
+        wanted_isbns.update(isbn_variants(isbn))
+
+    books = []
+    if ids or wanted_isbns:
+        books = list(Book.objects.filter(Q(pk__in=ids) | Q(isbn__in=wanted_isbns)))
+    by_id = {book.pk: book for book in books}
+    by_isbn = {book.isbn: book for book in books}
+
+    results = []
+    for book_id in ids:
+        book = by_id.get(book_id)
+        results.append({
+            'type': 'id',
+            'query': book_id,
+            'book': serialize(book) if book else None,
+        })
+    for position, raw in enumerate(isbns):
+        entry = {'type': 'isbn', 'query': raw, 'book': None}
+        isbn = normalized[position]
+        if isbn is None:
+            entry['error'] = errors[position]
+        else:
+            book = next(
+                (by_isbn[variant] for variant in isbn_variants(isbn) if variant in by_isbn),
+                None,
+            )
+            entry['book'] = serialize(book) if book else None
+        results.append(entry)
+
+    found = sum(1 for entry in results if entry['book'] is not None)
+    return {'found': found, 'missing': len(results) - found, 'results': results}
@@ -0,0 +1,40 @@
+"""
+Management command to build precomputed book recommendations.
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Build precomputed "also borrowed" and "similar content" neighbor lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind', choices=['all', 'also_borrowed', 'similar'], default='all',
+            help='Which neighbor lists to build'
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Only fold in loans / book changes since the last build'
+        )
+        parser.add_argument(
+            '--neighbors', type=int, default=None,
+            help='Neighbors kept per book (default: RECOMMENDATION_NEIGHBORS)'
+        )
+
+    def handle(self, *args, **options):
+        from apps.books.recommendations import rebuild_also_borrowed, update_also_borrowed
+        from apps.books.similarity import rebuild_similar, update_similar
+
+        builders = {
+            'also_borrowed': (rebuild_also_borrowed, update_also_borrowed),
+            'similar': (rebuild_similar, update_similar),
+        }
+        kinds = list(builders) if options['kind'] == 'all' else [options['kind']]
+        mode = 'Updating' if options['incremental'] else 'Rebuilding'
+
+        for kind in kinds:
+            rebuild, update = builders[kind]
+            self.stdout.write(f'{mode} "{kind}" lists...')
+            build = update if options['incremental'] else rebuild
+            count = build(options['neighbors'])
+            self.stdout.write(self.style.SUCCESS(f'Wrote {kind} neighbor lists for {count} books.'))
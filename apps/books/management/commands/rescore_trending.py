@@ -0,0 +1,15 @@
+"""
+Management command to recompute trending scores from the loans.
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Recompute trending scores from all loans (run after changing TRENDING_HALF_LIFE_DAYS)'
+
+    def handle(self, *args, **options):
+        from apps.books.popularity import rescore_trending
+
+        self.stdout.write('Rescoring trending books...')
+        count = rescore_trending()
+        self.stdout.write(self.style.SUCCESS(f'Rescored {count} borrowed books.'))
@@ -0,0 +1,15 @@
+"""
+Management command to preload the shared availability map.
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Load availability and due dates for every book into the shared cache'
+
+    def handle(self, *args, **options):
+        from apps.books.availability import warm
+
+        self.stdout.write('Warming availability map...')
+        count = warm()
+        self.stdout.write(self.style.SUCCESS(f'Cached availability for {count} books.'))
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.17 on 2026-10-19 07:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0002_enable_pg_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='borrow_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='trending_score',
+            field=models.FloatField(default=0.0, help_text='Exponentially decayed borrow count, stored relative to TRENDING_EPOCH'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['borrow_count', 'id'], name='books_borrow_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['trending_score', 'id'], name='books_trending_score_idx'),
+        ),
+    ]
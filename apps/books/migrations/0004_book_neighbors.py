@@ -0,0 +1,43 @@
+# Generated by Django 4.2.17 on 2026-10-19 07:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_book_popularity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NeighborBuild',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20, unique=True)),
+                ('watermark', models.BigIntegerField(default=0, help_text='Highest source row id already folded into the neighbor lists')),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'book_neighbor_builds',
+            },
+        ),
+        migrations.CreateModel(
+            name='BookNeighbors',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('also_borrowed', 'Readers also borrowed')], max_length=20)),
+                ('data', models.BinaryField(default=bytes)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbor_lists', to='books.book')),
+            ],
+            options={
+                'db_table': 'book_neighbors',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bookneighbors',
+            constraint=models.UniqueConstraint(fields=('book', 'kind'), name='unique_book_neighbors_kind'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.17 on 2026-10-19 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0004_book_neighbors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='neighborbuild',
+            name='started_at',
+            field=models.DateTimeField(blank=True, help_text='When the last build started; rows changed later are picked up next run', null=True),
+        ),
+        migrations.AlterField(
+            model_name='bookneighbors',
+            name='kind',
+            field=models.CharField(choices=[('also_borrowed', 'Readers also borrowed'), ('similar', 'Similar content')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,49 @@
+"""
+Data migration: build the genre table from existing free-text genres.
+"""
+from django.db import migrations
+from django.utils.text import slugify
+
+
+def populate_genres(apps, schema_editor):
+    Book = apps.get_model('books', 'Book')
+    Genre = apps.get_model('books', 'Genre')
+
+    names = (
+        Book.objects.exclude(genre='')
+        .values_list('genre', flat=True)
+        .distinct()
+    )
+    genre_ids = {}
+    by_name = {}
+    taken = set(Genre.objects.values_list('slug', flat=True))
+    for raw in names:
+        name = raw.strip()[:100]
+        if not name:
+            continue
+        if name.lower() not in by_name:
+            # Keep non-ASCII names apart: suffix a clashing slug rather than
+            # reuse another genre's row
+            base = slugify(name, allow_unicode=True)[:100] or 'genre'
+            slug, number = base, 1
+            while slug in taken:
+                number += 1
+                suffix = f'-{number}'
+                slug = base[:100 - len(suffix)] + suffix
+            taken.add(slug)
+            by_name[name.lower()] = Genre.objects.create(name=name, slug=slug).pk
+        genre_ids[raw] = by_name[name.lower()]
+
+    for raw, genre_id in genre_ids.items():
+        Book.objects.filter(genre=raw).update(genre_ref_id=genre_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0006_genre'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_genres, migrations.RunPython.noop),
+    ]
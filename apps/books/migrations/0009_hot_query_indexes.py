@@ -0,0 +1,17 @@
+# Generated by Django 4.2.17 on 2026-10-19 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0008_book_range_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['genre_ref', 'created_at'], name='books_genre_created_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.17 on 2026-10-19 09:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='content_hash',
+            field=models.BigIntegerField(blank=True, editable=False, help_text='Hash of the TF-IDF source fields when similar books were last computed', null=True),
+        ),
+        migrations.AlterField(
+            model_name='neighborbuild',
+            name='started_at',
+            field=models.DateTimeField(blank=True, help_text='When the last build started', null=True),
+        ),
+    ]
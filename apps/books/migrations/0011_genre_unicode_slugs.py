@@ -0,0 +1,65 @@
+# Generated by Django 4.2.17 on 2026-10-19 09:28
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def split_merged_genres(apps, schema_editor):
+    """
+    Names without ASCII letters all slugified to 'genre', so their books
+    were attached to whichever such genre was created first. Move books of
+    that genre whose name differs to a genre of their own, and give the
+    genre its real slug.
+    """
+    Book = apps.get_model('books', 'Book')
+    Genre = apps.get_model('books', 'Genre')
+
+    by_name = {name.lower(): pk for pk, name in Genre.objects.values_list('pk', 'name')}
+    names = {pk: name for name, pk in by_name.items()}
+    taken = set(Genre.objects.values_list('slug', flat=True))
+    rows = (
+        Book.objects.filter(genre_ref__slug='genre')
+        .values_list('genre', 'genre_ref_id')
+        .distinct()
+    )
+    moves = {}
+    for raw, genre_id in rows:
+        name = raw.strip()[:100]
+        if not name or names.get(genre_id) == name.lower():
+            continue
+        if name.lower() not in by_name:
+            base = slugify(name, allow_unicode=True)[:100] or 'genre'
+            slug, number = base, 1
+            while slug in taken:
+                number += 1
+                suffix = f'-{number}'
+                slug = base[:100 - len(suffix)] + suffix
+            taken.add(slug)
+            by_name[name.lower()] = Genre.objects.create(name=name, slug=slug).pk
+        moves[raw] = by_name[name.lower()]
+
+    for raw, genre_id in moves.items():
+        Book.objects.filter(genre=raw).update(genre_ref_id=genre_id)
+
+    # The genre that kept the books gets its real slug too
+    for genre in Genre.objects.filter(slug='genre'):
+        slug = slugify(genre.name, allow_unicode=True)[:100]
+        if slug and slug not in taken:
+            genre.slug = slug
+            genre.save(update_fields=['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0010_book_content_hash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='genre',
+            name='slug',
+            field=models.SlugField(allow_unicode=True, max_length=100, unique=True),
+        ),
+        migrations.RunPython(split_merged_genres, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.17 on 2026-10-19 09:31
+
+import math
+
+from django.db import migrations, models
+
+
+def _convert(apps, convert, unscored, scored_filter):
+    Book = apps.get_model('books', 'Book')
+    books = list(Book.objects.filter(**scored_filter).only('pk', 'trending_score'))
+    for book in books:
+        book.trending_score = convert(book.trending_score)
+    Book.objects.exclude(**scored_filter).update(trending_score=unscored)
+    Book.objects.bulk_update(books, ['trending_score'], batch_size=1000)
+
+
+def to_log_scores(apps, schema_editor):
+    """Store log2 of each decayed borrow count; unborrowed books get -inf."""
+    _convert(apps, math.log2, float('-inf'), {'trending_score__gt': 0})
+
+
+def to_linear_scores(apps, schema_editor):
+    _convert(apps, lambda score: 2.0 ** score, 0.0, {'trending_score__gt': float('-inf')})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0011_genre_unicode_slugs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='book',
+            name='trending_score',
+            field=models.FloatField(default=float("-inf"), help_text='log2 of the exponentially decayed borrow count, relative to TRENDING_EPOCH'),
+        ),
+        migrations.RunPython(to_log_scores, to_linear_scores),
+    ]
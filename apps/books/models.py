@@ -8,6 +8,25 @@ from django.contrib.postgres.search import SearchVectorField
 from django.contrib.postgres.indexes import GinIndex
 
 
+class Genre(models.Model):
+    """
+    Normalized genre dimension.
+
+    ``Book.genre`` keeps the display name (it feeds full-text search), while
+    ``Book.genre_ref`` points here so genre browsing is an exact integer match.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    slug = models.SlugField(max_length=100, unique=True, allow_unicode=True)
+
+    class Meta:
+        db_table = 'genres'
+        ordering = ['name']
+
+    def __str__(self) -> str:
+        return self.name
+
+
 class Book(models.Model):
     """
     Book model for the catalog inventory.
@@ -21,10 +40,32 @@ class Book(models.Model):
     description = models.TextField(blank=True)
     page_count = models.PositiveIntegerField(null=True, blank=True)
     genre = models.CharField(max_length=100, blank=True, db_index=True)
+    genre_ref = models.ForeignKey(
+        Genre,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='books',
+        help_text='Normalized genre, kept in sync with the genre name on save'
+    )
     published_date = models.DateField(null=True, blank=True)
     is_available = models.BooleanField(default=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    # Popularity counters, maintained in batches by apps.books.popularity
+    borrow_count = models.PositiveIntegerField(default=0)
+    trending_score = models.FloatField(
+        default=float('-inf'),
+        help_text='log2 of the exponentially decayed borrow count, relative to TRENDING_EPOCH'
+    )
+    # Maintained by apps.books.similarity
+    content_hash = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text='Hash of the TF-IDF source fields when similar books were last computed'
+    )
     
     # PostgreSQL Full-Text Search vector field
     search_vector = SearchVectorField(null=True, blank=True)
@@ -35,11 +76,53 @@ class Book(models.Model):
         indexes = [
             models.Index(fields=['title', 'author']),
             models.Index(fields=['is_available', 'genre']),
+            models.Index(fields=['genre_ref', 'is_available'], name='books_genre_ref_avail_idx'),
             GinIndex(fields=['search_vector'], name='book_search_vector_idx'),
+            models.Index(fields=['borrow_count', 'id'], name='books_borrow_count_idx'),
+            models.Index(fields=['trending_score', 'id'], name='books_trending_score_idx'),
+            # Range filters (see BookFilter), alone and combined with the
+            # availability filter, in the list's default created_at order.
+            models.Index(fields=['created_at', 'id'], name='books_created_id_idx'),
+            models.Index(fields=['published_date', 'id'], name='books_published_id_idx'),
+            models.Index(fields=['page_count', 'id'], name='books_pages_id_idx'),
+            models.Index(fields=['is_available', 'created_at'], name='books_avail_created_idx'),
+            models.Index(fields=['is_available', 'published_date'], name='books_avail_published_idx'),
+            models.Index(fields=['genre_ref', 'created_at'], name='books_genre_created_idx'),
         ]
 
     def __str__(self) -> str:
         return f"{self.title} by {self.author}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'genre' in field_names:
+            instance._loaded_genre = values[field_names.index('genre')]
+        return instance
+
+    def _genre_changed(self) -> bool:
+        """Whether ``genre`` differs from the value loaded from the database."""
+        if 'genre' in self.get_deferred_fields():
+            return False
+        genre = (self.genre or '').strip()
+        if genre and self.genre_ref_id is None:
+            return True
+        return not hasattr(self, '_loaded_genre') or genre != self._loaded_genre
+
+    def save(self, *args, **kwargs):
+        """
+        Keep ``genre_ref`` pointing at the normalized form of ``genre``,
+        resolving it only when ``genre`` has changed since it was loaded.
+        """
+        update_fields = kwargs.get('update_fields')
+        if (update_fields is None or 'genre' in update_fields) and self._genre_changed():
+            from .genres import resolve_genre_id
+            self.genre = (self.genre or '').strip()
+            self.genre_ref_id = resolve_genre_id(self.genre)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'genre_ref'}
+        super().save(*args, **kwargs)
+        self._loaded_genre = self.genre
     
     def update_search_vector(self) -> None:
         """
@@ -60,3 +143,56 @@ class Book(models.Model):
                 """, [self.pk])
         except Exception:
             pass
+
+
+class BookNeighbors(models.Model):
+    """
+    Precomputed top-K neighbor list for a book.
+
+    Neighbors are packed into ``data`` as little-endian int64 book ids
+    followed by float32 scores (see ``apps.books.recommendations``), so
+    serving a recommendation is a single keyed read.
+    """
+
+    KIND_ALSO_BORROWED = 'also_borrowed'
+    KIND_SIMILAR = 'similar'
+    KIND_CHOICES = [
+        (KIND_ALSO_BORROWED, 'Readers also borrowed'),
+        (KIND_SIMILAR, 'Similar content'),
+    ]
+
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='neighbor_lists')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    data = models.BinaryField(default=bytes)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'book_neighbors'
+        constraints = [
+            models.UniqueConstraint(fields=['book', 'kind'], name='unique_book_neighbors_kind'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} neighbors of book {self.book_id}"
+
+
+class NeighborBuild(models.Model):
+    """Bookkeeping for incremental neighbor rebuilds (one row per kind)."""
+
+    kind = models.CharField(max_length=20, unique=True)
+    watermark = models.BigIntegerField(
+        default=0,
+        help_text='Highest source row id already folded into the neighbor lists'
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When the last build started'
+    )
+    built_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'book_neighbor_builds'
+
+    def __str__(self) -> str:
+        return f"{self.kind} @ {self.watermark}"
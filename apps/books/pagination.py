@@ -4,8 +4,10 @@ Custom pagination classes.
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
+from apps.core.pagination import TimedPaginationMixin
 
-class CustomPageNumberPagination(PageNumberPagination):
+
+class CustomPageNumberPagination(TimedPaginationMixin, PageNumberPagination):
     """
     Custom pagination with clear response fields.
     
@@ -0,0 +1,223 @@
+"""
+Book popularity and trending scores.
+
+Checkouts are counted in a per-process buffer and written to ``books`` in
+one batched UPDATE, so a popular title doesn't turn its row into a write
+hotspot with one UPDATE per checkout.
+
+The trending score is an exponentially decayed borrow count. Instead of
+rewriting every row as time passes, each borrow is worth
+``2 ** ((t - TRENDING_EPOCH) / half_life)``: every score is scaled by the
+same factor, so ordering by the stored value is the same as ordering by the
+decayed value. Those weights grow without bound (past float range within
+about three years at a one day half-life), so the stored value is their
+base-2 logarithm, which grows linearly; a borrow adds to it with
+:func:`add_scores` (in SQL when flushing). A book never borrowed stores
+``NO_SCORE``. :func:`decayed_score` converts a stored value back to
+"borrows, decayed to now".
+
+Stored scores are only comparable under one ``TRENDING_HALF_LIFE_DAYS``;
+after changing it, recompute them from the loans with
+``manage.py rescore_trending``.
+"""
+import atexit
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Func, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.core.metrics import cache_lookups
+
+from .models import Book
+
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+TRENDING_CACHE_KEY = 'books:trending'
+NO_SCORE = float('-inf')
+
+DEFAULT_HALF_LIFE_DAYS = 7
+DEFAULT_FLUSH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 30
+DEFAULT_TRENDING_REFRESH_SECONDS = 300
+DEFAULT_TRENDING_LIST_SIZE = 20
+
+
+def _half_life_seconds() -> float:
+    days = getattr(settings, 'TRENDING_HALF_LIFE_DAYS', DEFAULT_HALF_LIFE_DAYS)
+    return days * 86400.0
+
+
+def trending_weight(when: Optional[datetime] = None) -> float:
+    """Return the stored score of one borrow at ``when`` (log2 of its weight)."""
+    when = when or timezone.now()
+    return (when - TRENDING_EPOCH).total_seconds() / _half_life_seconds()
+
+
+def add_scores(first: float, second: float) -> float:
+    """Return ``log2(2 ** first + 2 ** second)`` without leaving float range."""
+    high, low = max(first, second), min(first, second)
+    if low == NO_SCORE:
+        return high
+    return high + math.log2(1.0 + 2.0 ** (low - high))
+
+
+def _add_score_sql(score: float):
+    """``add_scores(trending_score, score)`` as an SQL expression."""
+    stored = F('trending_score')
+    high = Greatest(stored, Value(score), output_field=FloatField())
+    total = (
+        Func(Value(2.0), stored - high, function='POWER', output_field=FloatField())
+        + Func(Value(2.0), Value(score) - high, function='POWER', output_field=FloatField())
+    )
+    return high + Func(total, function='LN', output_field=FloatField()) / Value(math.log(2.0))
+
+
+def decayed_score(stored: float, now: Optional[datetime] = None) -> float:
+    """Convert a stored trending score into borrows decayed to ``now``."""
+    if stored == NO_SCORE:
+        return 0.0
+    # Capped so scores stored under a longer half-life (not yet rescored)
+    # cannot overflow
+    return 2.0 ** min(stored - trending_weight(now), 64.0)
+
+
+class PopularityBuffer:
+    """
+    Thread-safe, per-process buffer of pending borrow increments.
+
+    Increments are flushed when ``flush_size`` are pending or ``flush_interval``
+    seconds have passed since the last flush, whichever comes first.
+    """
+
+    def __init__(self, flush_size: int = None, flush_interval: float = None) -> None:
+        self._flush_size = flush_size
+        self._flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._scores: Dict[int, float] = defaultdict(lambda: NO_SCORE)
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    @property
+    def flush_size(self) -> int:
+        if self._flush_size is not None:
+            return self._flush_size
+        return getattr(settings, 'POPULARITY_FLUSH_SIZE', DEFAULT_FLUSH_SIZE)
+
+    @property
+    def flush_interval(self) -> float:
+        if self._flush_interval is not None:
+            return self._flush_interval
+        return getattr(settings, 'POPULARITY_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)
+
+    def add(self, book_id: int, when: Optional[datetime] = None) -> None:
+        """Buffer one borrow of ``book_id`` and flush if a threshold is reached."""
+        with self._lock:
+            self._counts[book_id] += 1
+            self._scores[book_id] = add_scores(self._scores[book_id], trending_weight(when))
+            self._pending += 1
+            due = (
+                self._pending >= self.flush_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write pending increments in one UPDATE. Returns the number of books touched."""
+        with self._lock:
+            counts, scores = self._counts, self._scores
+            self._counts, self._scores = Counter(), defaultdict(lambda: NO_SCORE)
+            self._pending = 0
+            self._last_flush = time.monotonic()
+        if not counts:
+            return 0
+
+        Book.objects.filter(pk__in=counts.keys()).update(
+            borrow_count=F('borrow_count') + Case(
+                *[When(pk=pk, then=Value(n)) for pk, n in counts.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            trending_score=Case(
+                *[When(pk=pk, then=_add_score_sql(score)) for pk, score in scores.items()],
+                default=F('trending_score'),
+                output_field=FloatField(),
+            ),
+        )
+        return len(counts)
+
+
+popularity_buffer = PopularityBuffer()
+
+
+def _flush_at_exit() -> None:
+    try:
+        popularity_buffer.flush()
+    except Exception:
+        pass  # Database may already be unavailable during shutdown
+
+
+atexit.register(_flush_at_exit)
+
+
+def record_borrow(book_id: int) -> None:
+    """Count a borrow once the surrounding transaction commits."""
+    when = timezone.now()
+    transaction.on_commit(lambda: popularity_buffer.add(book_id, when))
+
+
+RESCORE_BATCH_SIZE = 1000
+
+
+def rescore_trending() -> int:
+    """
+    Recompute every trending score from the loans (active and archived)
+    under the current half-life. Returns the number of books with a score.
+    """
+    from apps.borrowings.models import ArchivedBorrowing, Borrowing
+
+    scores: Dict[int, float] = defaultdict(lambda: NO_SCORE)
+    for model in (Borrowing, ArchivedBorrowing):
+        loans = model.objects.values_list('book_id', 'borrowed_at')
+        for book_id, borrowed_at in loans.iterator(chunk_size=RESCORE_BATCH_SIZE):
+            scores[book_id] = add_scores(scores[book_id], trending_weight(borrowed_at))
+
+    books = [Book(pk=pk, trending_score=score) for pk, score in scores.items()]
+    with transaction.atomic():
+        Book.objects.update(trending_score=NO_SCORE)
+        Book.objects.bulk_update(books, ['trending_score'], batch_size=RESCORE_BATCH_SIZE)
+    cache.delete(TRENDING_CACHE_KEY)
+    return len(books)
+
+
+def get_trending_books(limit: int = None) -> List[Book]:
+    """Return the current top trending books straight from the database."""
+    limit = limit or getattr(settings, 'TRENDING_LIST_SIZE', DEFAULT_TRENDING_LIST_SIZE)
+    return list(
+        Book.objects.filter(trending_score__gt=NO_SCORE)
+        .order_by('-trending_score', '-id')[:limit]
+    )
+
+
+def get_cached_trending(build) -> list:
+    """
+    Return the precomputed trending list, rebuilding it when it expires.
+
+    ``build`` turns a list of books into the cached representation.
+    """
+    data = cache.get(TRENDING_CACHE_KEY)
+    cache_lookups.labels('trending', 'miss' if data is None else 'hit').inc()
+    if data is None:
+        data = build(get_trending_books())
+        timeout = getattr(settings, 'TRENDING_REFRESH_SECONDS', DEFAULT_TRENDING_REFRESH_SECONDS)
+        cache.set(TRENDING_CACHE_KEY, data, timeout)
+    return data
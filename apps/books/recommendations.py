@@ -0,0 +1,318 @@
+"""
+Precomputed book-to-book neighbor lists.
+
+Storage and serving helpers are shared by every neighbor kind; content
+similarity lives in ``apps.books.similarity``.
+
+"Readers also borrowed" is built from a sparse book x book co-occurrence
+matrix: two books co-occur once for every member who borrowed both. The
+matrix is never materialized. Streaming loans ordered by member fills two
+compressed sparse arrays, member -> books and its transpose book ->
+members, and each book's row is computed from them when it is needed,
+pruned to its top K neighbors and written out with the rest of its block.
+Memory grows with the number of loans, not with the number of non-zero
+pairs, and stored lists are packed arrays.
+"""
+import heapq
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Book, BookNeighbors, NeighborBuild
+
+DEFAULT_NEIGHBORS = 20
+# Only the most recent books in a member's history pair with each other,
+# which caps the pairs contributed by a single heavy reader.
+MAX_HISTORY_PER_USER = 50
+STREAM_CHUNK_SIZE = 5000
+WRITE_BATCH_SIZE = 500
+BUILD_BLOCK_SIZE = 2000
+
+Neighbor = Tuple[int, float]
+
+
+def get_neighbor_count() -> int:
+    return getattr(settings, 'RECOMMENDATION_NEIGHBORS', DEFAULT_NEIGHBORS)
+
+
+def pack_neighbors(neighbors: List[Neighbor]) -> bytes:
+    """Pack ``[(book_id, score), ...]`` as int64 ids then float32 scores."""
+    ids = array('q', [book_id for book_id, _ in neighbors])
+    scores = array('f', [score for _, score in neighbors])
+    if sys.byteorder == 'big':
+        ids.byteswap()
+        scores.byteswap()
+    return ids.tobytes() + scores.tobytes()
+
+
+def unpack_neighbors(data: bytes) -> List[Neighbor]:
+    """Inverse of :func:`pack_neighbors`."""
+    data = bytes(data)
+    count = len(data) // 12
+    ids, scores = array('q'), array('f')
+    ids.frombytes(data[:count * 8])
+    scores.frombytes(data[count * 8:count * 12])
+    if sys.byteorder == 'big':
+        ids.byteswap()
+        scores.byteswap()
+    return list(zip(ids, scores))
+
+
+def top_k(counts: Dict[int, float], k: int) -> List[Neighbor]:
+    """Highest-scoring ``k`` neighbors, ties broken by lower book id."""
+    return heapq.nsmallest(k, counts.items(), key=lambda item: (-item[1], item[0]))
+
+
+def get_neighbor_lists(book_ids: Iterable[int], kind: str) -> Dict[int, List[Neighbor]]:
+    """Return stored neighbor lists for several books in one query."""
+    rows = BookNeighbors.objects.filter(kind=kind, book_id__in=list(book_ids))
+    return {book_id: unpack_neighbors(data) for book_id, data in rows.values_list('book_id', 'data')}
+
+
+def get_neighbors(book_id: int, kind: str) -> List[Neighbor]:
+    """Return the stored neighbor list for ``book_id`` (one keyed read)."""
+    data = (
+        BookNeighbors.objects
+        .filter(book_id=book_id, kind=kind)
+        .values_list('data', flat=True)
+        .first()
+    )
+    return unpack_neighbors(data) if data else []
+
+
+def save_neighbor_lists(kind: str, lists: Dict[int, List[Neighbor]]) -> int:
+    """Upsert neighbor lists for the given books. Returns rows written."""
+    written = 0
+    items = list(lists.items())
+    for start in range(0, len(items), WRITE_BATCH_SIZE):
+        batch = dict(items[start:start + WRITE_BATCH_SIZE])
+        existing = {
+            row.book_id: row
+            for row in BookNeighbors.objects.filter(kind=kind, book_id__in=batch.keys())
+        }
+        to_update, to_create = [], []
+        for book_id, neighbors in batch.items():
+            row = existing.get(book_id)
+            if row is None:
+                to_create.append(BookNeighbors(book_id=book_id, kind=kind, data=pack_neighbors(neighbors)))
+            else:
+                row.data = pack_neighbors(neighbors)
+                to_update.append(row)
+        BookNeighbors.objects.bulk_create(to_create)
+        BookNeighbors.objects.bulk_update(to_update, ['data', 'updated_at'])
+        written += len(batch)
+    return written
+
+
+# Co-occurrence ("readers also borrowed")
+
+def _loan_stream(max_id: int, user_ids: Optional[Iterable[int]] = None) -> Iterator[Tuple[int, int, int]]:
+    """
+    Yield (user_id, book_id, loan_id) for every loan up to ``max_id`` (of
+    ``user_ids`` only, when given), grouped by user in borrowing order.
+    """
+    from apps.borrowings.archive import MergedBorrowingQuerySet
+    from apps.borrowings.models import ArchivedBorrowing, Borrowing
+
+    querysets = []
+    for model in (Borrowing, ArchivedBorrowing):
+        queryset = model.objects.filter(id__lte=max_id)
+        if user_ids is not None:
+            queryset = queryset.filter(user_id__in=list(user_ids))
+        querysets.append(queryset.only('id', 'user_id', 'book_id', 'borrowed_at'))
+    merged = MergedBorrowingQuerySet(*querysets).order_by('user_id', 'borrowed_at', 'id')
+    for loan in merged.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        yield loan.user_id, loan.book_id, loan.id
+
+
+def _latest_loan_id() -> int:
+    from apps.borrowings.models import ArchivedBorrowing, Borrowing
+
+    ids = [
+        model.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        for model in (Borrowing, ArchivedBorrowing)
+    ]
+    return max(ids)
+
+
+def capped_history(books: Iterable[int]) -> List[int]:
+    """A member's distinct books, keeping the last ``MAX_HISTORY_PER_USER``."""
+    return list(dict.fromkeys(books))[-MAX_HISTORY_PER_USER:]
+
+
+def _histories(loans: Iterable[Tuple]) -> Iterator[List[int]]:
+    """Capped book history of each member in ``loans`` (grouped by user)."""
+    current_user, books = None, []
+    for user_id, book_id, *_ in loans:
+        if user_id != current_user:
+            if books:
+                yield capped_history(books)
+            current_user, books = user_id, []
+        books.append(book_id)
+    if books:
+        yield capped_history(books)
+
+
+class CooccurrenceMatrix:
+    """
+    Co-occurrence counts held as compressed sparse arrays of loans.
+
+    ``history[history_start[m]:history_start[m + 1]]`` are the dense book
+    indexes in member ``m``'s capped history, and ``readers`` is the
+    transpose (book index -> member indexes). Row ``i`` of the matrix is the
+    count of each book over the histories of book ``i``'s readers, so it is
+    computed on demand and only one row's counts exist at a time.
+    """
+
+    def __init__(self, histories: Iterable[List[int]]) -> None:
+        book_history = array('q')
+        self.history_start = array('q', [0])
+        for books in histories:
+            book_history.extend(books)
+            self.history_start.append(len(book_history))
+        self.book_ids = array('q', sorted(set(book_history)))
+
+        self.history = array('i', (bisect_left(self.book_ids, book_id) for book_id in book_history))
+        del book_history
+
+        self.readers_start = array('q', bytes(8 * (len(self.book_ids) + 1)))
+        for index in self.history:
+            self.readers_start[index + 1] += 1
+        for index in range(len(self.book_ids)):
+            self.readers_start[index + 1] += self.readers_start[index]
+        self.readers = array('i', bytes(4 * len(self.history)))
+        fill = array('q', self.readers_start[:-1])
+        for member in range(len(self.history_start) - 1):
+            for position in range(self.history_start[member], self.history_start[member + 1]):
+                index = self.history[position]
+                self.readers[fill[index]] = member
+                fill[index] += 1
+
+    def __len__(self) -> int:
+        return len(self.book_ids)
+
+    def _row(self, index: int) -> Counter:
+        counts: Counter = Counter()
+        history, history_start = self.history, self.history_start
+        for position in range(self.readers_start[index], self.readers_start[index + 1]):
+            member = self.readers[position]
+            counts.update(history[history_start[member]:history_start[member + 1]])
+        del counts[index]
+        return counts
+
+    def row(self, book_id: int) -> Counter:
+        """Co-occurrence counts of ``book_id`` with every other book."""
+        index = bisect_left(self.book_ids, book_id)
+        if index == len(self.book_ids) or self.book_ids[index] != book_id:
+            return Counter()
+        return Counter({self.book_ids[other]: count for other, count in self._row(index).items()})
+
+    def top_k_blocks(self, k: int, block_size: int = BUILD_BLOCK_SIZE) -> Iterator[Dict[int, List[Neighbor]]]:
+        """Yield ``{book_id: top k neighbors}`` for ``block_size`` books at a time."""
+        for start in range(0, len(self.book_ids), block_size):
+            block = {}
+            for index in range(start, min(start + block_size, len(self.book_ids))):
+                block[self.book_ids[index]] = [
+                    (self.book_ids[other], count) for other, count in top_k(self._row(index), k)
+                ]
+            yield block
+
+
+def build_cooccurrence(loans: Iterable[Tuple]) -> CooccurrenceMatrix:
+    """
+    Build the co-occurrence matrix from (user_id, book_id, ...) loans.
+
+    ``loans`` must be grouped by user, in borrowing order within a user.
+    """
+    return CooccurrenceMatrix(_histories(loans))
+
+
+def rebuild_also_borrowed(k: int = None) -> int:
+    """Rebuild every "also borrowed" list from scratch. Returns lists written."""
+    k = k or get_neighbor_count()
+    kind = BookNeighbors.KIND_ALSO_BORROWED
+    watermark = _latest_loan_id()
+    matrix = build_cooccurrence(_loan_stream(watermark))
+
+    with transaction.atomic():
+        BookNeighbors.objects.filter(kind=kind).delete()
+        written = 0
+        for block in matrix.top_k_blocks(k):
+            written += save_neighbor_lists(kind, block)
+        NeighborBuild.objects.update_or_create(kind=kind, defaults={'watermark': watermark})
+    return written
+
+
+def _add_pairs(deltas: Dict[int, Counter], books: List[int], sign: int) -> None:
+    for a in books:
+        row = deltas[a]
+        for b in books:
+            if a != b:
+                row[b] += sign
+
+
+def update_also_borrowed(k: int = None) -> int:
+    """
+    Fold loans made since the last build into the stored lists.
+
+    For each member with new loans, the pairs of their capped history
+    before the new loans are subtracted and those of the capped history
+    after them added, exactly as a rebuild would count them. The deltas are
+    applied to the stored top-K scores and re-pruned. A neighbor that was
+    just below the top K before the update is not recovered, so run
+    :func:`rebuild_also_borrowed` periodically as well.
+    """
+    from apps.borrowings.models import Borrowing
+
+    k = k or get_neighbor_count()
+    kind = BookNeighbors.KIND_ALSO_BORROWED
+    state, _ = NeighborBuild.objects.get_or_create(kind=kind)
+    new_loans = list(
+        Borrowing.objects.filter(id__gt=state.watermark)
+        .order_by('id')
+        .values_list('id', 'user_id')
+    )
+    if not new_loans:
+        return 0
+    watermark = new_loans[-1][0]
+
+    loans_by_user: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+    for user_id, book_id, loan_id in _loan_stream(watermark, {user_id for _, user_id in new_loans}):
+        loans_by_user[user_id].append((loan_id, book_id))
+
+    deltas: Dict[int, Counter] = defaultdict(Counter)
+    for loans in loans_by_user.values():
+        before = capped_history(book_id for loan_id, book_id in loans if loan_id <= state.watermark)
+        after = capped_history(book_id for _, book_id in loans)
+        if before != after:
+            _add_pairs(deltas, before, -1)
+            _add_pairs(deltas, after, 1)
+
+    with transaction.atomic():
+        stored = get_neighbor_lists(deltas.keys(), kind)
+        lists = {}
+        for book_id, delta in deltas.items():
+            merged = Counter(dict(stored.get(book_id, [])))
+            merged.update(delta)
+            lists[book_id] = top_k({other: score for other, score in merged.items() if score > 0}, k)
+        save_neighbor_lists(kind, lists)
+        state.watermark = watermark
+        state.save(update_fields=['watermark', 'built_at'])
+    return len(lists)
+
+
+def get_neighbor_books(book_id: int, kind: str) -> List[Tuple[Book, float]]:
+    """Return ``(book, score)`` pairs for a stored neighbor list, in order."""
+    neighbors = get_neighbors(book_id, kind)
+    books = Book.objects.in_bulk([neighbor_id for neighbor_id, _ in neighbors])
+    return [(books[neighbor_id], score) for neighbor_id, score in neighbors if neighbor_id in books]
+
+
+def get_also_borrowed(book_id: int) -> List[Tuple[Book, float]]:
+    """Return ``(book, score)`` pairs for the "readers also borrowed" list."""
+    return get_neighbor_books(book_id, BookNeighbors.KIND_ALSO_BORROWED)
@@ -2,33 +2,100 @@
 Books app serializers.
 """
 from rest_framework import serializers
-from .models import Book
+from .genres import genre_cache
+from .models import Book, Genre
+from .popularity import decayed_score
 
 
-class BookSerializer(serializers.ModelSerializer):
+def normalize_isbn(value: str) -> str:
+    """Strip hyphens and spaces and check the ISBN is 10 or 13 digits."""
+    isbn = value.replace('-', '').replace(' ', '')
+    if len(isbn) not in [10, 13]:
+        raise serializers.ValidationError(
+            'ISBN must be 10 or 13 characters long.'
+        )
+    if not isbn.isdigit():
+        raise serializers.ValidationError(
+            'ISBN must contain only digits.'
+        )
+    return isbn
+
+
+class GenreFieldsMixin(serializers.Serializer):
+    """Genre id and slug, read from the in-process genre cache (no join)."""
+
+    genre_id = serializers.IntegerField(source='genre_ref_id', read_only=True)
+    genre_slug = serializers.SerializerMethodField()
+
+    def get_genre_slug(self, obj):
+        entry = genre_cache.get(obj.genre_ref_id)
+        return entry[1] if entry else None
+
+
+class BookSerializer(GenreFieldsMixin, serializers.ModelSerializer):
     """Full serializer for Book model."""
 
     class Meta:
         model = Book
         fields = [
             'id', 'title', 'author', 'isbn', 'description',
-            'page_count', 'genre', 'published_date',
-            'is_available', 'created_at', 'updated_at'
+            'page_count', 'genre', 'genre_id', 'genre_slug', 'published_date',
+            'is_available', 'borrow_count', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'borrow_count', 'created_at', 'updated_at']
 
 
-class BookListSerializer(serializers.ModelSerializer):
+class BookListSerializer(GenreFieldsMixin, serializers.ModelSerializer):
     """Lightweight serializer for book listing."""
 
     class Meta:
         model = Book
         fields = [
             'id', 'title', 'author', 'isbn',
-            'genre', 'is_available'
+            'genre', 'genre_id', 'genre_slug', 'is_available'
         ]
 
 
+class TrendingBookSerializer(BookListSerializer):
+    """Book listing entry with popularity figures."""
+
+    trending_score = serializers.SerializerMethodField()
+
+    class Meta(BookListSerializer.Meta):
+        fields = BookListSerializer.Meta.fields + ['borrow_count', 'trending_score']
+
+    def get_trending_score(self, obj) -> float:
+        """Borrows decayed to now (see apps.books.popularity)."""
+        return round(decayed_score(obj.trending_score), 3)
+
+
+class RecommendedBookSerializer(BookListSerializer):
+    """Book listing entry with a recommendation score."""
+
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(BookListSerializer.Meta):
+        fields = BookListSerializer.Meta.fields + ['score']
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """Serialize ``[(book, score), ...]`` in order."""
+        serializer = cls()
+        data = []
+        for book, score in pairs:
+            book.score = round(score, 4)
+            data.append(serializer.to_representation(book))
+        return data
+
+
+class GenreSerializer(serializers.ModelSerializer):
+    """Serializer for Genre model."""
+
+    class Meta:
+        model = Genre
+        fields = ['id', 'name', 'slug']
+
+
 class BookCreateUpdateSerializer(serializers.ModelSerializer):
     """Serializer for creating and updating books."""
 
@@ -41,14 +108,33 @@ class BookCreateUpdateSerializer(serializers.ModelSerializer):
 
     def validate_isbn(self, value):
         """Validate ISBN format."""
-        # Remove any hyphens or spaces
-        isbn = value.replace('-', '').replace(' ', '')
-        if len(isbn) not in [10, 13]:
-            raise serializers.ValidationError(
-                'ISBN must be 10 or 13 characters long.'
-            )
-        if not isbn.isdigit():
+        return normalize_isbn(value)
+
+
+class BookLookupSerializer(serializers.Serializer):
+    """Request body for batch lookup by ids and/or ISBNs."""
+
+    MAX_ITEMS = 500
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        default=list,
+        help_text='Book ids'
+    )
+    isbns = serializers.ListField(
+        child=serializers.CharField(max_length=32),
+        required=False,
+        default=list,
+        help_text='ISBN-10 or ISBN-13, hyphens and spaces allowed'
+    )
+
+    def validate(self, attrs: dict) -> dict:
+        total = len(attrs['ids']) + len(attrs['isbns'])
+        if not total:
+            raise serializers.ValidationError('Provide at least one id or ISBN.')
+        if total > self.MAX_ITEMS:
             raise serializers.ValidationError(
-                'ISBN must contain only digits.'
+                f'At most {self.MAX_ITEMS} ids and ISBNs per request.'
             )
-        return isbn
+        return attrs
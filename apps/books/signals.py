@@ -1,11 +1,16 @@
 """
 Books app signals.
 
-Updates search vector after book save for PostgreSQL full-text search.
+Updates search vector after book save for PostgreSQL full-text search and
+keeps the shared availability map consistent with direct book edits.
+Genre edits drop the in-process genre cache.
 """
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from .models import Book
+from . import availability
+from .genres import genre_cache
+from .models import Book, Genre
 
 
 @receiver(post_save, sender=Book)
@@ -19,3 +24,24 @@ def update_book_search_vector(sender, instance, created, **kwargs):
             instance.update_search_vector()
     except Exception:
         pass  # Silently fail for non-PostgreSQL databases
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_book_availability(sender, instance, **kwargs):
+    """
+    Drop the cached availability entry once the change commits.
+
+    Checkout/checkin register their own write after this, so the entry ends
+    up with the loan's due date rather than being reloaded.
+    """
+    book_id = instance.pk
+    transaction.on_commit(lambda: availability.invalidate(book_id))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre_cache(sender, instance, **kwargs):
+    """Reload the genre cache now and again once the change commits."""
+    genre_cache.invalidate()
+    transaction.on_commit(genre_cache.invalidate)
@@ -0,0 +1,237 @@
+"""
+Content-based "more like this" via TF-IDF.
+
+Each book's title, author, genre and description are turned into a sparse,
+L2-normalized TF-IDF vector. Cosine similarity between all books is the
+product of the document-term matrix with its transpose; it is computed in
+blocks of books against an inverted index (term -> postings), so only
+books that share at least one term are ever compared. Each book's top K
+neighbors are stored in ``BookNeighbors`` and served with one keyed read.
+
+Each build stores a hash of every book's source fields in
+``Book.content_hash``; an incremental update rescores only books whose
+hash differs, so circulation writes that bump ``updated_at`` cost nothing.
+"""
+import hashlib
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Book, BookNeighbors, NeighborBuild
+from .recommendations import (
+    Neighbor,
+    get_neighbor_books,
+    get_neighbor_count,
+    get_neighbor_lists,
+    save_neighbor_lists,
+    top_k,
+)
+
+BLOCK_SIZE = 256
+# Terms found in more than this share of books carry almost no signal and
+# have the longest postings lists, so they are left out of the index.
+MAX_DOCUMENT_FREQUENCY = 0.5
+FIELD_WEIGHTS = (('title', 2), ('author', 2), ('genre', 2), ('description', 1))
+SOURCE_FIELDS = ['id', 'content_hash'] + [field for field, _ in FIELD_WEIGHTS]
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset(
+    'a an and are as at be by for from has in is it its of on or that the '
+    'this to was were will with'.split()
+)
+
+Vector = Dict[str, float]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stop words or single characters."""
+    return [
+        token for token in TOKEN_RE.findall((text or '').lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+def term_counts(book) -> Counter:
+    """Weighted term frequencies for one book."""
+    counts: Counter = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for token in tokenize(getattr(book, field)):
+            counts[token] += weight
+    return counts
+
+
+def content_hash(book) -> int:
+    """Signed 64-bit hash of the fields the vectors are built from."""
+    text = '\x1f'.join(getattr(book, field) or '' for field, _ in FIELD_WEIGHTS)
+    digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+
+def build_vectors(documents: Dict[int, Counter]) -> Dict[int, Vector]:
+    """Turn term counts into L2-normalized TF-IDF vectors."""
+    total = len(documents)
+    document_frequency: Counter = Counter()
+    for counts in documents.values():
+        document_frequency.update(counts.keys())
+
+    max_df = max(1, int(total * MAX_DOCUMENT_FREQUENCY)) if total > 2 else total
+    idf = {
+        term: math.log((1 + total) / (1 + df)) + 1.0
+        for term, df in document_frequency.items()
+        if df <= max_df
+    }
+
+    vectors = {}
+    for book_id, counts in documents.items():
+        vector = {
+            term: (1.0 + math.log(tf)) * idf[term]
+            for term, tf in counts.items()
+            if term in idf
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if norm:
+            vectors[book_id] = {term: weight / norm for term, weight in vector.items()}
+    return vectors
+
+
+def build_index(vectors: Dict[int, Vector]) -> Dict[str, List[Tuple[int, float]]]:
+    """Inverted index: term -> [(book_id, weight), ...]."""
+    index: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+    for book_id, vector in vectors.items():
+        for term, weight in vector.items():
+            index[term].append((book_id, weight))
+    return index
+
+
+def similarity_scores(
+    book_id: int,
+    vectors: Dict[int, Vector],
+    index: Dict[str, List[Tuple[int, float]]],
+) -> Dict[int, float]:
+    """Cosine similarity of one book with every book sharing a term."""
+    scores: Dict[int, float] = defaultdict(float)
+    for term, weight in vectors[book_id].items():
+        for other_id, other_weight in index[term]:
+            if other_id != book_id:
+                scores[other_id] += weight * other_weight
+    return scores
+
+
+def similar_for_block(
+    block: Iterable[int],
+    vectors: Dict[int, Vector],
+    index: Dict[str, List[Tuple[int, float]]],
+    k: int,
+) -> Dict[int, List[Neighbor]]:
+    """Top ``k`` cosine neighbors for each book in ``block``."""
+    return {book_id: top_k(similarity_scores(book_id, vectors, index), k) for book_id in block}
+
+
+def _load_documents() -> Tuple[Dict[int, Counter], Dict[int, int]]:
+    """Term counts for every book, and the new content hash of each book whose content changed."""
+    documents, changed = {}, {}
+    for book in Book.objects.only(*SOURCE_FIELDS).iterator(chunk_size=2000):
+        documents[book.id] = term_counts(book)
+        digest = content_hash(book)
+        if digest != book.content_hash:
+            changed[book.id] = digest
+    return documents, changed
+
+
+def _store_hashes(hashes: Dict[int, int]) -> None:
+    """Record the content the lists were computed from (no ``updated_at`` bump)."""
+    Book.objects.bulk_update(
+        [Book(id=book_id, content_hash=digest) for book_id, digest in hashes.items()],
+        ['content_hash'],
+        batch_size=1000,
+    )
+
+
+def rebuild_similar(k: int = None) -> int:
+    """Recompute similar-book lists for the whole catalog. Returns lists written."""
+    k = k or get_neighbor_count()
+    kind = BookNeighbors.KIND_SIMILAR
+    started_at = timezone.now()
+    documents, hashes = _load_documents()
+    vectors = build_vectors(documents)
+    index = build_index(vectors)
+
+    with transaction.atomic():
+        BookNeighbors.objects.filter(kind=kind).exclude(book_id__in=vectors.keys()).delete()
+        written = 0
+        book_ids = list(vectors)
+        for start in range(0, len(book_ids), BLOCK_SIZE):
+            block = similar_for_block(book_ids[start:start + BLOCK_SIZE], vectors, index, k)
+            written += save_neighbor_lists(kind, block)
+        _store_hashes(hashes)
+        NeighborBuild.objects.update_or_create(kind=kind, defaults={'started_at': started_at})
+    return written
+
+
+def update_similar(k: int = None) -> int:
+    """
+    Recompute lists for books whose content changed since the last build.
+
+    Changed books get a fresh top-K list. Their new scores are merged into
+    the lists of the books they are similar to, replacing stale entries.
+    IDF weights are recomputed from the full catalog, but unchanged books'
+    lists are not otherwise rescored, so a periodic full rebuild is still
+    worthwhile.
+    """
+    k = k or get_neighbor_count()
+    kind = BookNeighbors.KIND_SIMILAR
+    state, _ = NeighborBuild.objects.get_or_create(kind=kind)
+    if state.started_at is None:
+        return rebuild_similar(k)
+
+    started_at = timezone.now()
+    documents, hashes = _load_documents()
+    changed = list(hashes)
+    if not changed:
+        return 0
+
+    vectors = build_vectors(documents)
+    index = build_index(vectors)
+    changed_set = set(changed)
+
+    # Similarity is symmetric, so a changed book's full score row also tells
+    # every other book its new score for the changed book.
+    fresh: Dict[int, List[Neighbor]] = {}
+    affected: Dict[int, Dict[int, float]] = defaultdict(dict)
+    for book_id in changed:
+        scores = similarity_scores(book_id, vectors, index) if book_id in vectors else {}
+        fresh[book_id] = top_k(scores, k)
+        for other_id, score in scores.items():
+            if other_id not in changed_set:
+                affected[other_id][book_id] = score
+
+    with transaction.atomic():
+        # Books that listed a changed book before may need it removed
+        for neighbors in get_neighbor_lists(changed, kind).values():
+            for other_id, _ in neighbors:
+                if other_id not in changed_set:
+                    affected.setdefault(other_id, {})
+        stored = get_neighbor_lists(affected.keys(), kind)
+        lists = dict(fresh)
+        for other_id, new_scores in affected.items():
+            merged = {
+                neighbor_id: score
+                for neighbor_id, score in stored.get(other_id, [])
+                if neighbor_id not in changed_set
+            }
+            merged.update(new_scores)
+            lists[other_id] = top_k(merged, k)
+        written = save_neighbor_lists(kind, lists)
+        _store_hashes(hashes)
+        state.started_at = started_at
+        state.save(update_fields=['started_at', 'built_at'])
+    return written
+
+
+def get_similar(book_id: int) -> List[Tuple[Book, float]]:
+    """Return ``(book, score)`` pairs for the "similar content" list."""
+    return get_neighbor_books(book_id, BookNeighbors.KIND_SIMILAR)
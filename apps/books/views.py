@@ -2,19 +2,40 @@
 Books app views.
 """
 from rest_framework import viewsets
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from .models import Book
-from .serializers import BookSerializer, BookListSerializer, BookCreateUpdateSerializer
+from .models import Book, Genre
+from .serializers import (
+    BookSerializer,
+    BookListSerializer,
+    BookCreateUpdateSerializer,
+    TrendingBookSerializer,
+    RecommendedBookSerializer,
+    BookLookupSerializer,
+    GenreSerializer,
+)
+from .lookup import lookup_books
+from . import availability as availability_map
+from .popularity import get_cached_trending
+from .recommendations import get_also_borrowed
+from .similarity import get_similar
 from .filters import BookFilter
 from .search import BookSearchFilter
 from .ordering import CustomOrderingFilter
 from .pagination import CustomPageNumberPagination
 from apps.accounts.permissions import IsAdministratorOrReadOnly
+from apps.core.mixins import PhaseTimingMixin
 
 
-class BookViewSet(viewsets.ModelViewSet):
+AVAILABILITY_MAX_IDS = 5000
+
+
+class BookViewSet(PhaseTimingMixin, viewsets.ModelViewSet):
     """
     Library Books API - Search, filter, and browse books
     
@@ -22,6 +43,7 @@ class BookViewSet(viewsets.ModelViewSet):
     - Full-text search with typo tolerance (PostgreSQL trigram)
     - Filter by title, author, genre, availability
     - Sorting and pagination
+    - Per-phase Server-Timing for list requests (see PhaseTimingMixin)
     """
     
     queryset = Book.objects.all()
@@ -29,7 +51,10 @@ class BookViewSet(viewsets.ModelViewSet):
     filter_backends = [BookSearchFilter, DjangoFilterBackend, CustomOrderingFilter]
     filterset_class = BookFilter
     search_fields = ['title', 'author', 'description', 'isbn', 'genre']
-    ordering_fields = ['title', 'author', 'created_at', 'published_date']
+    ordering_fields = [
+        'title', 'author', 'created_at', 'published_date',
+        'borrow_count', 'trending_score',
+    ]
     ordering = ['created_at']
     pagination_class = CustomPageNumberPagination
 
@@ -68,7 +93,21 @@ class BookViewSet(viewsets.ModelViewSet):
             openapi.Parameter(
                 'genre',
                 openapi.IN_QUERY,
-                description="Filter by genre",
+                description="Filter by genre name or slug (exact when known, else substring)",
+                type=openapi.TYPE_STRING,
+                required=False,
+            ),
+            openapi.Parameter(
+                'genre_id',
+                openapi.IN_QUERY,
+                description="Filter by genre id",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+            openapi.Parameter(
+                'genre_slug',
+                openapi.IN_QUERY,
+                description="Filter by genre slug",
                 type=openapi.TYPE_STRING,
                 required=False,
             ),
@@ -79,6 +118,58 @@ class BookViewSet(viewsets.ModelViewSet):
                 type=openapi.TYPE_STRING,
                 required=False,
             ),
+            openapi.Parameter(
+                'published_after',
+                openapi.IN_QUERY,
+                description="Published on or after this date (YYYY-MM-DD)",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE,
+                required=False,
+            ),
+            openapi.Parameter(
+                'published_before',
+                openapi.IN_QUERY,
+                description="Published on or before this date (YYYY-MM-DD)",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATE,
+                required=False,
+            ),
+            openapi.Parameter(
+                'year_min',
+                openapi.IN_QUERY,
+                description="Published in this year or later",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+            openapi.Parameter(
+                'year_max',
+                openapi.IN_QUERY,
+                description="Published in this year or earlier",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+            openapi.Parameter(
+                'pages_min',
+                openapi.IN_QUERY,
+                description="At least this many pages",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+            openapi.Parameter(
+                'pages_max',
+                openapi.IN_QUERY,
+                description="At most this many pages",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+            openapi.Parameter(
+                'created_since',
+                openapi.IN_QUERY,
+                description="Added to the catalog at or after this ISO 8601 timestamp",
+                type=openapi.TYPE_STRING,
+                format=openapi.FORMAT_DATETIME,
+                required=False,
+            ),
             openapi.Parameter(
                 'is_available',
                 openapi.IN_QUERY,
@@ -91,7 +182,11 @@ class BookViewSet(viewsets.ModelViewSet):
                 openapi.IN_QUERY,
                 description="Sort results",
                 type=openapi.TYPE_STRING,
-                enum=['title_asc', 'title_desc', 'author_asc', 'author_desc', 'created_at_asc', 'created_at_desc'],
+                enum=[
+                    'title_asc', 'title_desc', 'author_asc', 'author_desc',
+                    'created_at_asc', 'created_at_desc',
+                    'borrow_count_desc', 'trending_score_desc',
+                ],
                 required=False,
             ),
             openapi.Parameter(
@@ -116,6 +211,120 @@ class BookViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
     
+    @swagger_auto_schema(
+        operation_summary="Batch lookup by ids or ISBNs",
+        operation_description="""
+Resolve up to 500 book ids and/or ISBNs in one request. ISBN-10 and ISBN-13
+forms of the same book match each other. Results come back in input order
+(ids first, then ISBNs); misses have `book: null`.
+        """,
+        request_body=BookLookupSerializer,
+    )
+    @action(
+        detail=False, methods=['post'], permission_classes=[AllowAny],
+        pagination_class=None, filter_backends=[],
+    )
+    def lookup(self, request):
+        """Resolve a batch of ids and ISBNs with one query."""
+        serializer = BookLookupSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        book_serializer = BookListSerializer()
+        return Response(lookup_books(
+            serializer.validated_data['ids'],
+            serializer.validated_data['isbns'],
+            book_serializer.to_representation,
+        ))
+
+    @swagger_auto_schema(
+        operation_summary="Availability by id",
+        operation_description="""
+Availability and due date for up to 5000 books per call, e.g. `?ids=1,2,3`.
+Served from a shared cache kept current by checkout and checkin. Unknown
+ids map to `null`.
+        """,
+        manual_parameters=[
+            openapi.Parameter(
+                'ids',
+                openapi.IN_QUERY,
+                description="Comma-separated book ids (max: 5000)",
+                type=openapi.TYPE_STRING,
+                required=True,
+            ),
+        ],
+    )
+    @action(detail=False, methods=['get'], pagination_class=None, filter_backends=[])
+    def availability(self, request):
+        """Availability map lookup that bypasses the books table when cached."""
+        raw = request.query_params.get('ids', '')
+        try:
+            book_ids = [int(part) for part in raw.split(',') if part.strip()]
+        except ValueError:
+            return Response(
+                {'ids': 'Must be a comma-separated list of integers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not book_ids:
+            return Response({'ids': 'This parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(book_ids) > AVAILABILITY_MAX_IDS:
+            return Response(
+                {'ids': f'At most {AVAILABILITY_MAX_IDS} ids per request.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        values = availability_map.get_availability(book_ids)
+        return Response({
+            'results': {
+                str(book_id): availability_map.describe(value)
+                for book_id, value in values.items()
+            }
+        })
+
+    @swagger_auto_schema(
+        operation_summary="Trending books",
+        operation_description="Most borrowed books recently (exponentially decayed). Refreshed periodically.",
+        responses={200: TrendingBookSerializer(many=True)},
+    )
+    @action(detail=False, methods=['get'], pagination_class=None, filter_backends=[])
+    def trending(self, request):
+        """Precomputed list of trending books."""
+        data = get_cached_trending(
+            lambda books: TrendingBookSerializer(books, many=True).data
+        )
+        return Response(data)
+    
+    @swagger_auto_schema(
+        operation_summary="Readers also borrowed",
+        operation_description="Books most often borrowed by members who borrowed this book. Precomputed offline.",
+        responses={200: RecommendedBookSerializer(many=True)},
+    )
+    @action(
+        detail=True, methods=['get'], url_path='also-borrowed',
+        pagination_class=None, filter_backends=[],
+    )
+    def also_borrowed(self, request, pk=None):
+        """Precomputed co-borrowing recommendations."""
+        return self._neighbor_response(pk, get_also_borrowed)
+
+    @swagger_auto_schema(
+        operation_summary="Similar books",
+        operation_description="Books with similar title, author, genre and description (TF-IDF). Precomputed offline.",
+        responses={200: RecommendedBookSerializer(many=True)},
+    )
+    @action(detail=True, methods=['get'], pagination_class=None, filter_backends=[])
+    def similar(self, request, pk=None):
+        """Precomputed content-similar books."""
+        return self._neighbor_response(pk, get_similar)
+
+    def _neighbor_response(self, pk, lookup):
+        """Serve a precomputed neighbor list without loading the book itself."""
+        try:
+            book_id = int(pk)
+        except (TypeError, ValueError):
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        recommendations = lookup(book_id)
+        if not recommendations and not Book.objects.filter(pk=book_id).exists():
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(RecommendedBookSerializer.from_pairs(recommendations))
+    
     def perform_create(self, serializer):
         """Create book and update search vector."""
         book = serializer.save()
@@ -131,3 +340,14 @@ class BookViewSet(viewsets.ModelViewSet):
             book.update_search_vector()
         except Exception:
             pass
+
+
+class GenreViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Genres - the values accepted by the ``genre_id`` and ``genre_slug``
+    book filters. Genres are created automatically from book data.
+    """
+    queryset = Genre.objects.all()
+    serializer_class = GenreSerializer
+    permission_classes = [AllowAny]
+    pagination_class = None
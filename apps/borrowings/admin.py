@@ -2,7 +2,7 @@
 Borrowings app admin configuration.
 """
 from django.contrib import admin
-from .models import Borrowing
+from .models import ArchivedBorrowing, Borrowing, Hold
 
 
 @admin.register(Borrowing)
@@ -33,3 +33,34 @@ class BorrowingAdmin(admin.ModelAdmin):
         elif obj.is_overdue:
             return 'Overdue'
         return 'Active'
+
+
+@admin.register(ArchivedBorrowing)
+class ArchivedBorrowingAdmin(admin.ModelAdmin):
+    """Read-only admin for archived borrowings."""
+
+    list_display = ['user', 'book', 'borrowed_at', 'due_date', 'returned_at', 'archived_at']
+    list_filter = ['returned_at', 'borrowed_at']
+    search_fields = ['user__email', 'user__username', 'book__title', 'book__isbn']
+    ordering = ['-borrowed_at']
+    date_hierarchy = 'borrowed_at'
+    list_per_page = 25
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+
+@admin.register(Hold)
+class HoldAdmin(admin.ModelAdmin):
+    """Admin configuration for Hold model."""
+
+    list_display = ['user', 'book', 'position', 'status', 'created_at', 'expires_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['user__email', 'user__username', 'book__title', 'book__isbn']
+    readonly_fields = ['created_at', 'ready_at']
+    ordering = ['-created_at']
+    autocomplete_fields = ['user', 'book']
+    list_per_page = 25
@@ -0,0 +1,121 @@
+"""
+Archival of closed borrowings.
+
+Closed loans older than ``BORROWING_ARCHIVE_AFTER_DAYS`` are moved out of the
+hot ``borrowings`` table into ``borrowings_archive`` so that checkout, checkin
+and current-loan queries only ever touch the small active set. Reporting
+endpoints read both tables through :class:`MergedBorrowingQuerySet`.
+"""
+import heapq
+from datetime import datetime, timedelta
+from operator import attrgetter
+from typing import Iterator, List, Sequence
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import ArchivedBorrowing, Borrowing
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+DEFAULT_ARCHIVE_BATCH_SIZE = 1000
+
+ARCHIVED_FIELDS = ['id', 'user_id', 'book_id', 'borrowed_at', 'due_date', 'returned_at']
+
+
+def get_archive_cutoff(days: int = None) -> datetime:
+    """Return the return-date before which closed loans are archived."""
+    if days is None:
+        days = getattr(settings, 'BORROWING_ARCHIVE_AFTER_DAYS', DEFAULT_ARCHIVE_AFTER_DAYS)
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_batch(cutoff: datetime, batch_size: int = DEFAULT_ARCHIVE_BATCH_SIZE) -> int:
+    """
+    Move one batch of closed loans returned before ``cutoff`` to the archive.
+
+    Each batch copies and deletes its rows inside a single transaction, so the
+    process can be interrupted at any point and simply re-run. Archived rows
+    keep their original primary key, which makes the copy idempotent.
+
+    Returns the number of rows moved.
+    """
+    with transaction.atomic():
+        rows = list(
+            Borrowing.objects
+            .filter(returned_at__isnull=False, returned_at__lt=cutoff)
+            .order_by('id')
+            .values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ArchivedBorrowing.objects.bulk_create(
+            [ArchivedBorrowing(**row) for row in rows],
+            ignore_conflicts=True,
+        )
+        Borrowing.objects.filter(id__in=[row['id'] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_closed_borrowings(
+    cutoff: datetime,
+    batch_size: int = DEFAULT_ARCHIVE_BATCH_SIZE,
+) -> Iterator[int]:
+    """Archive batches until none remain, yielding each batch size."""
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            return
+        yield moved
+
+
+class MergedBorrowingQuerySet:
+    """
+    Read-only view over the active and archived borrowing querysets.
+
+    Implements just enough of the ``QuerySet`` API (``filter``, ``order_by``
+    and slicing) for :class:`rest_framework.pagination.CursorPagination`.
+    Both sides are sliced independently and merged on the ordering key, so a
+    page costs one indexed range scan per table. Ordering must use a single
+    direction for all fields; ids are unique across both tables because
+    archived rows keep their original primary key.
+    """
+
+    def __init__(self, *querysets: QuerySet, ordering: Sequence[str] = ()) -> None:
+        self.querysets = querysets
+        self.ordering = tuple(ordering)
+
+    def _clone(self, querysets, ordering=None) -> 'MergedBorrowingQuerySet':
+        return MergedBorrowingQuerySet(
+            *querysets,
+            ordering=self.ordering if ordering is None else ordering,
+        )
+
+    def filter(self, *args, **kwargs) -> 'MergedBorrowingQuerySet':
+        return self._clone([qs.filter(*args, **kwargs) for qs in self.querysets])
+
+    def order_by(self, *fields: str) -> 'MergedBorrowingQuerySet':
+        return self._clone([qs.order_by(*fields) for qs in self.querysets], fields)
+
+    def _merge(self, iterables) -> Iterator:
+        if not self.ordering:
+            return heapq.merge(*iterables)
+        reverse = self.ordering[0].startswith('-')
+        key = attrgetter(*[field.lstrip('-') for field in self.ordering])
+        return heapq.merge(*iterables, key=key, reverse=reverse)
+
+    def iterator(self, chunk_size: int = 2000) -> Iterator:
+        """Stream both tables in order without materializing either."""
+        return self._merge(qs.iterator(chunk_size=chunk_size) for qs in self.querysets)
+
+    def __getitem__(self, index) -> List:
+        if not isinstance(index, slice) or index.step is not None:
+            raise TypeError('MergedBorrowingQuerySet only supports slicing.')
+        start = index.start or 0
+        stop = index.stop
+        if stop is None:
+            merged = self._merge(self.querysets)
+        else:
+            merged = self._merge(qs[:stop] for qs in self.querysets)
+        return list(merged)[start:stop]
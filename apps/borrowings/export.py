@@ -0,0 +1,48 @@
+"""
+Streaming exports for borrowing records.
+
+Full exports are written as NDJSON (one JSON object per line) so that
+neither the database nor the web worker has to hold the whole result set
+in memory at once.
+"""
+from typing import Iterator, Type
+
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from rest_framework.serializers import Serializer
+from rest_framework.utils.encoders import JSONEncoder
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+EXPORT_CHUNK_SIZE = 2000
+
+
+def iter_ndjson(
+    queryset: QuerySet,
+    serializer_class: Type[Serializer],
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[str]:
+    """
+    Yield one serialized line per row.
+
+    ``QuerySet.iterator()`` uses a server-side cursor on PostgreSQL, so rows
+    are fetched ``chunk_size`` at a time instead of being materialized up
+    front. A single serializer instance is reused for every row.
+    """
+    serializer = serializer_class()
+    encoder = JSONEncoder()
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        yield encoder.encode(serializer.to_representation(obj)) + '\n'
+
+
+def ndjson_response(
+    queryset: QuerySet,
+    serializer_class: Type[Serializer],
+    filename: str,
+) -> StreamingHttpResponse:
+    """Return a streaming NDJSON download for ``queryset``."""
+    response = StreamingHttpResponse(
+        iter_ndjson(queryset, serializer_class),
+        content_type=NDJSON_CONTENT_TYPE,
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,116 @@
+"""
+Hold (reservation) queue operations.
+
+Every function that changes a book's queue expects to run inside a
+transaction holding a row lock on that book (``select_for_update``), which
+serializes queue changes per book without a global lock.
+"""
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.books import availability
+from apps.books.models import Book
+from .models import Hold
+
+DEFAULT_EXPIRY_BATCH_SIZE = 500
+
+
+def get_pickup_deadline():
+    """Return the pickup deadline for a hold allocated now."""
+    days = getattr(settings, 'HOLD_PICKUP_DAYS', Hold.DEFAULT_PICKUP_DAYS)
+    return timezone.now() + timedelta(days=days)
+
+
+def place_hold(user, book: Book) -> Hold:
+    """Append ``user`` to the end of ``book``'s queue. ``book`` must be locked."""
+    last_position = (
+        Hold.objects.filter(book=book)
+        .aggregate(last=Max('position'))['last']
+    )
+    return Hold.objects.create(user=user, book=book, position=(last_position or 0) + 1)
+
+
+def release_book(book: Book) -> Optional[Hold]:
+    """
+    Hand a returned book to the next waiting hold, or make it available.
+
+    The next hold is found with a single probe of the partial
+    ``(book, position) WHERE status = 'waiting'`` index. ``book`` must be
+    locked. Returns the allocated hold, if any.
+    """
+    hold = (
+        Hold.objects.select_for_update()
+        .filter(book=book, status=Hold.Status.WAITING)
+        .order_by('position')
+        .first()
+    )
+    if hold is None:
+        book.is_available = True
+        book.save(update_fields=['is_available', 'updated_at'])
+        availability.mark_available(book.pk)
+        return None
+
+    now = timezone.now()
+    hold.status = Hold.Status.READY
+    hold.ready_at = now
+    hold.expires_at = get_pickup_deadline()
+    hold.save(update_fields=['status', 'ready_at', 'expires_at'])
+    if book.is_available:
+        book.is_available = False
+        book.save(update_fields=['is_available', 'updated_at'])
+    availability.mark_unavailable(book.pk)
+    return hold
+
+
+def get_ready_hold(user, book_id: int) -> Optional[Hold]:
+    """Return ``user``'s hold on ``book_id`` if it is ready for pickup."""
+    return Hold.objects.filter(
+        user=user, book_id=book_id, status=Hold.Status.READY
+    ).first()
+
+
+def cancel_hold(hold: Hold) -> None:
+    """Cancel an open hold, passing the book on if it was ready."""
+    with transaction.atomic():
+        book = Book.objects.select_for_update().get(pk=hold.book_id)
+        hold = Hold.objects.select_for_update().get(pk=hold.pk)
+        if not hold.is_open:
+            return
+        was_ready = hold.status == Hold.Status.READY
+        hold.status = Hold.Status.CANCELLED
+        hold.save(update_fields=['status'])
+        if was_ready:
+            release_book(book)
+
+
+def expire_ready_holds(batch_size: int = DEFAULT_EXPIRY_BATCH_SIZE) -> int:
+    """
+    Expire one batch of ready holds whose pickup deadline has passed.
+
+    Each expired hold passes its book on to the next member in the queue.
+    Returns the number of holds expired; call repeatedly until it returns 0.
+    """
+    now = timezone.now()
+    candidates = list(
+        Hold.objects.filter(status=Hold.Status.READY, expires_at__lt=now)
+        .order_by('expires_at')
+        .values_list('id', 'book_id')[:batch_size]
+    )
+    expired = 0
+    for hold_id, book_id in candidates:
+        with transaction.atomic():
+            # Lock order matches checkin: book first, then its holds
+            book = Book.objects.select_for_update().get(pk=book_id)
+            hold = Hold.objects.select_for_update().get(pk=hold_id)
+            if hold.status != Hold.Status.READY:
+                continue
+            hold.status = Hold.Status.EXPIRED
+            hold.save(update_fields=['status'])
+            release_book(book)
+            expired += 1
+    return expired
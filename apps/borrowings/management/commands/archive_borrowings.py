@@ -0,0 +1,35 @@
+"""
+Management command to move old closed borrowings into the archive table.
+"""
+from django.core.management.base import BaseCommand
+from apps.borrowings.archive import (
+    DEFAULT_ARCHIVE_BATCH_SIZE,
+    archive_closed_borrowings,
+    get_archive_cutoff,
+)
+
+
+class Command(BaseCommand):
+    help = 'Archive closed borrowings returned more than N days ago (batched, restartable)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=None,
+            help='Archive loans returned more than this many days ago '
+                 '(default: BORROWING_ARCHIVE_AFTER_DAYS)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_ARCHIVE_BATCH_SIZE,
+            help='Rows moved per transaction'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = get_archive_cutoff(options['older_than_days'])
+        self.stdout.write(f'Archiving borrowings returned before {cutoff:%Y-%m-%d %H:%M}...')
+
+        total = 0
+        for moved in archive_closed_borrowings(cutoff, options['batch_size']):
+            total += moved
+            self.stdout.write(f'  moved {moved} rows ({total} total)')
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} borrowings.'))
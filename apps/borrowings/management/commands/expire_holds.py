@@ -0,0 +1,26 @@
+"""
+Management command to expire uncollected holds and pass books down the queue.
+"""
+from django.core.management.base import BaseCommand
+from apps.borrowings.holds import DEFAULT_EXPIRY_BATCH_SIZE, expire_ready_holds
+
+
+class Command(BaseCommand):
+    help = 'Expire ready holds past their pickup deadline (run periodically, e.g. from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_EXPIRY_BATCH_SIZE,
+            help='Holds processed per batch'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            expired = expire_ready_holds(options['batch_size'])
+            if not expired:
+                break
+            total += expired
+            self.stdout.write(f'  expired {expired} holds ({total} total)')
+
+        self.stdout.write(self.style.SUCCESS(f'Expired {total} holds.'))
@@ -0,0 +1,41 @@
+"""
+Management command to rebuild circulation rollups from borrowing history.
+"""
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.borrowings.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute daily circulation rollups for a date range (backfill / catch-up)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since', type=date.fromisoformat, default=None,
+            help='First day to rebuild, YYYY-MM-DD (default: 7 days ago)'
+        )
+        parser.add_argument(
+            '--until', type=date.fromisoformat, default=None,
+            help='Last day to rebuild, YYYY-MM-DD (default: today)'
+        )
+        parser.add_argument(
+            '--chunk-days', type=int, default=31,
+            help='Days recomputed per transaction'
+        )
+
+    def handle(self, *args, **options):
+        until = options['until'] or timezone.localdate()
+        since = options['since'] or until - timedelta(days=7)
+        if since > until:
+            raise CommandError('--since must not be after --until')
+
+        chunk = timedelta(days=options['chunk_days'])
+        start = since
+        while start <= until:
+            end = min(start + chunk - timedelta(days=1), until)
+            book_rows, genre_rows = rebuild_rollups(start, end)
+            self.stdout.write(f'  {start} .. {end}: {book_rows} book rows, {genre_rows} genre rows')
+            start = end + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt circulation rollups for {since} .. {until}.'))
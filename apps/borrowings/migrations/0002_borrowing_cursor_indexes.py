@@ -0,0 +1,25 @@
+# Generated by Django 4.2.17 on 2026-10-19 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('borrowings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(fields=['borrowed_at', 'id'], name='borrowings_borrowed_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(fields=['user', 'borrowed_at', 'id'], name='borrowings_user_borrowed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(fields=['due_date', 'id'], name='borrowings_due_id_idx'),
+        ),
+    ]
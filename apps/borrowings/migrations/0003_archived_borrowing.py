@@ -0,0 +1,36 @@
+# Generated by Django 4.2.17 on 2026-10-19 07:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('books', '0002_enable_pg_trgm'),
+        ('borrowings', '0002_borrowing_cursor_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBorrowing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('borrowed_at', models.DateTimeField(help_text='When the book was checked out')),
+                ('due_date', models.DateTimeField(help_text='When the book should have been returned')),
+                ('returned_at', models.DateTimeField(help_text='When the book was checked in')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('book', models.ForeignKey(help_text='Book that was borrowed', on_delete=django.db.models.deletion.CASCADE, related_name='archived_borrowings', to='books.book')),
+                ('user', models.ForeignKey(help_text='User who borrowed the book', on_delete=django.db.models.deletion.CASCADE, related_name='archived_borrowings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Borrowing',
+                'verbose_name_plural': 'Archived Borrowings',
+                'db_table': 'borrowings_archive',
+                'ordering': ['-borrowed_at'],
+                'indexes': [models.Index(fields=['borrowed_at', 'id'], name='borrow_arch_borrowed_id_idx'), models.Index(fields=['user', 'borrowed_at', 'id'], name='borrow_arch_user_borrowed_idx')],
+            },
+        ),
+    ]
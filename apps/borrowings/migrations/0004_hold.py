@@ -0,0 +1,41 @@
+# Generated by Django 4.2.17 on 2026-10-19 07:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('books', '0002_enable_pg_trgm'),
+        ('borrowings', '0003_archived_borrowing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Hold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField(help_text='Queue position for the book (lower is served first)')),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('ready', 'Ready for pickup'), ('fulfilled', 'Fulfilled'), ('cancelled', 'Cancelled'), ('expired', 'Expired')], default='waiting', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('ready_at', models.DateTimeField(blank=True, help_text='When the book was allocated to this hold', null=True)),
+                ('expires_at', models.DateTimeField(blank=True, help_text='Pickup deadline once the hold is ready', null=True)),
+                ('book', models.ForeignKey(help_text='Book being reserved', on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='books.book')),
+                ('user', models.ForeignKey(help_text='User waiting for the book', on_delete=django.db.models.deletion.CASCADE, related_name='holds', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Hold',
+                'verbose_name_plural': 'Holds',
+                'db_table': 'holds',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'waiting')), fields=['book', 'position'], name='holds_book_waiting_pos_idx'), models.Index(condition=models.Q(('status', 'ready')), fields=['expires_at'], name='holds_ready_expiry_idx'), models.Index(fields=['user', 'status'], name='holds_user_status_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='hold',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['waiting', 'ready'])), fields=('user', 'book'), name='unique_open_hold_per_user_book'),
+        ),
+    ]
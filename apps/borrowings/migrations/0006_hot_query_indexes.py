@@ -0,0 +1,25 @@
+# Generated by Django 4.2.17 on 2026-10-19 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('borrowings', '0005_circulation_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(condition=models.Q(('returned_at__isnull', True)), fields=['user', 'borrowed_at', 'id'], name='borrowings_user_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(condition=models.Q(('returned_at__isnull', True)), fields=['borrowed_at', 'id'], name='borrowings_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='borrowing',
+            index=models.Index(condition=models.Q(('returned_at__isnull', True)), fields=['due_date', 'id'], name='borrowings_active_due_idx'),
+        ),
+    ]
@@ -53,6 +53,29 @@ class Borrowing(models.Model):
         indexes = [
             models.Index(fields=['user', 'returned_at']),
             models.Index(fields=['book', 'returned_at']),
+            # Keyset pagination: (borrowed_at, id) globally and per user
+            models.Index(fields=['borrowed_at', 'id'], name='borrowings_borrowed_id_idx'),
+            models.Index(
+                fields=['user', 'borrowed_at', 'id'],
+                name='borrowings_user_borrowed_idx',
+            ),
+            models.Index(fields=['due_date', 'id'], name='borrowings_due_id_idx'),
+            # Active loans only: current (per user and for admins) and overdue
+            models.Index(
+                fields=['user', 'borrowed_at', 'id'],
+                condition=models.Q(returned_at__isnull=True),
+                name='borrowings_user_active_idx',
+            ),
+            models.Index(
+                fields=['borrowed_at', 'id'],
+                condition=models.Q(returned_at__isnull=True),
+                name='borrowings_active_idx',
+            ),
+            models.Index(
+                fields=['due_date', 'id'],
+                condition=models.Q(returned_at__isnull=True),
+                name='borrowings_active_due_idx',
+            ),
         ]
 
     def save(self, *args, **kwargs):
@@ -81,3 +104,185 @@ class Borrowing(models.Model):
     def __str__(self) -> str:
         status = 'Active' if self.is_active else 'Returned'
         return f"{self.user.email} - {self.book.title} ({status})"
+
+
+class ArchivedBorrowing(models.Model):
+    """
+    Closed borrowing moved out of the hot ``borrowings`` table.
+
+    Rows are copied verbatim (including the primary key) by the
+    ``archive_borrowings`` management command. Only returned loans are
+    archived, so an archived borrowing is never active or overdue.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_borrowings',
+        help_text='User who borrowed the book'
+    )
+    book = models.ForeignKey(
+        'books.Book',
+        on_delete=models.CASCADE,
+        related_name='archived_borrowings',
+        help_text='Book that was borrowed'
+    )
+    borrowed_at = models.DateTimeField(help_text='When the book was checked out')
+    due_date = models.DateTimeField(help_text='When the book should have been returned')
+    returned_at = models.DateTimeField(help_text='When the book was checked in')
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'borrowings_archive'
+        ordering = ['-borrowed_at']
+        verbose_name = 'Archived Borrowing'
+        verbose_name_plural = 'Archived Borrowings'
+        indexes = [
+            models.Index(fields=['borrowed_at', 'id'], name='borrow_arch_borrowed_id_idx'),
+            models.Index(
+                fields=['user', 'borrowed_at', 'id'],
+                name='borrow_arch_user_borrowed_idx',
+            ),
+        ]
+
+    is_active = False
+    is_overdue = False
+
+    def __str__(self) -> str:
+        return f"{self.user.email} - {self.book.title} (Archived)"
+
+
+class Hold(models.Model):
+    """
+    A member's place in the FIFO reservation queue for a checked-out book.
+
+    When the book is checked in, the waiting hold with the lowest position
+    becomes ``READY`` and the book stays reserved for that member until the
+    hold is collected or expires.
+    """
+
+    DEFAULT_PICKUP_DAYS = 3
+
+    class Status(models.TextChoices):
+        WAITING = 'waiting', 'Waiting'
+        READY = 'ready', 'Ready for pickup'
+        FULFILLED = 'fulfilled', 'Fulfilled'
+        CANCELLED = 'cancelled', 'Cancelled'
+        EXPIRED = 'expired', 'Expired'
+
+    OPEN_STATUSES = (Status.WAITING, Status.READY)
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='holds',
+        help_text='User waiting for the book'
+    )
+    book = models.ForeignKey(
+        'books.Book',
+        on_delete=models.CASCADE,
+        related_name='holds',
+        help_text='Book being reserved'
+    )
+    position = models.PositiveIntegerField(
+        help_text='Queue position for the book (lower is served first)'
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.WAITING
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    ready_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When the book was allocated to this hold'
+    )
+    expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='Pickup deadline once the hold is ready'
+    )
+
+    class Meta:
+        db_table = 'holds'
+        ordering = ['-created_at']
+        verbose_name = 'Hold'
+        verbose_name_plural = 'Holds'
+        indexes = [
+            # Next-in-queue lookup on checkin: one index probe per book
+            models.Index(
+                fields=['book', 'position'],
+                condition=models.Q(status='waiting'),
+                name='holds_book_waiting_pos_idx',
+            ),
+            # Expiry sweep over ready holds only
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(status='ready'),
+                name='holds_ready_expiry_idx',
+            ),
+            models.Index(fields=['user', 'status'], name='holds_user_status_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'book'],
+                condition=models.Q(status__in=['waiting', 'ready']),
+                name='unique_open_hold_per_user_book',
+            ),
+        ]
+
+    @property
+    def is_open(self) -> bool:
+        """Check if the hold is still waiting or ready for pickup."""
+        return self.status in self.OPEN_STATUSES
+
+    def __str__(self) -> str:
+        return f"{self.user.email} - {self.book.title} (#{self.position}, {self.status})"
+
+
+class DailyBookCirculation(models.Model):
+    """
+    Per-day, per-book circulation counters.
+
+    Maintained incrementally on checkout/checkin and rebuilt by the
+    ``rebuild_circulation`` command, so reports never scan ``borrowings``.
+    """
+
+    day = models.DateField()
+    book = models.ForeignKey(
+        'books.Book',
+        on_delete=models.CASCADE,
+        related_name='daily_circulation'
+    )
+    checkouts = models.PositiveIntegerField(default=0)
+    returns = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'circulation_daily_book'
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'book'], name='unique_daily_book_circulation'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} book={self.book_id} out={self.checkouts} in={self.returns}"
+
+
+class DailyGenreCirculation(models.Model):
+    """Per-day, per-genre circulation counters."""
+
+    day = models.DateField()
+    genre = models.CharField(max_length=100, blank=True)
+    checkouts = models.PositiveIntegerField(default=0)
+    returns = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'circulation_daily_genre'
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'genre'], name='unique_daily_genre_circulation'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} genre={self.genre!r} out={self.checkouts} in={self.returns}"
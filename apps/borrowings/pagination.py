@@ -0,0 +1,36 @@
+"""
+Borrowings app pagination classes.
+
+Borrowing tables only ever grow, so list endpoints use keyset (cursor)
+pagination instead of OFFSET/COUNT: every page is a single indexed range
+scan no matter how deep the client pages.
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class BorrowingCursorPagination(CursorPagination):
+    """
+    Cursor pagination ordered by newest borrowing first.
+
+    Query parameters:
+    - cursor: Opaque cursor taken from the 'next'/'previous' links
+    - page_size: Items per page (default: 20, max: 100)
+
+    The ``(borrowed_at, id)`` ordering is backed by matching composite
+    indexes on the ``borrowings`` table; ``id`` breaks ties between rows
+    created within the same timestamp.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-borrowed_at', '-id')
+
+
+class OverdueCursorPagination(BorrowingCursorPagination):
+    """Cursor pagination for overdue loans, most recently due first."""
+    ordering = ('-due_date', '-id')
+
+
+class HoldCursorPagination(BorrowingCursorPagination):
+    """Cursor pagination for holds, newest first."""
+    ordering = ('-created_at', '-id')
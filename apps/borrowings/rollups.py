@@ -0,0 +1,128 @@
+"""
+Incremental circulation rollups.
+
+Checkout and checkin bump per-day counters for the book and its genre in
+the same transaction as the loan change. ``rebuild_rollups`` recomputes a
+date range from the loan tables and is used for backfills and catch-up.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ArchivedBorrowing, Borrowing, DailyBookCirculation, DailyGenreCirculation
+
+ROLLUP_BATCH_SIZE = 1000
+
+
+def _increment(model, lookup: dict, field: str) -> None:
+    """Add one to ``field`` on the row matching ``lookup``, creating it if needed."""
+    if model.objects.filter(**lookup).update(**{field: F(field) + 1}):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **{field: 1})
+    except IntegrityError:
+        # Another request created the row first
+        model.objects.filter(**lookup).update(**{field: F(field) + 1})
+
+
+def _record(book, field: str, when: Optional[datetime]) -> None:
+    day = timezone.localdate(when or timezone.now())
+    _increment(DailyBookCirculation, {'day': day, 'book_id': book.pk}, field)
+    _increment(DailyGenreCirculation, {'day': day, 'genre': book.genre}, field)
+
+
+def record_checkout(book, when: Optional[datetime] = None) -> None:
+    """Count a checkout of ``book``."""
+    _record(book, 'checkouts', when)
+
+
+def record_return(book, when: Optional[datetime] = None) -> None:
+    """Count a return of ``book``."""
+    _record(book, 'returns', when)
+
+
+def _loan_counts(date_field: str, start: date, end: date):
+    """Yield (day, book_id, genre, count) for loans whose ``date_field`` falls in range."""
+    # Compare against plain datetime bounds so the column index stays usable
+    lower = timezone.make_aware(datetime.combine(start, time.min))
+    upper = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+    for model in (Borrowing, ArchivedBorrowing):
+        rows = (
+            model.objects
+            .filter(**{f'{date_field}__gte': lower, f'{date_field}__lt': upper})
+            .annotate(day=TruncDate(date_field))
+            .values('day', 'book_id', 'book__genre')
+            .annotate(total=Count('id'))
+            .order_by()
+        )
+        for row in rows:
+            yield row['day'], row['book_id'], row['book__genre'], row['total']
+
+
+def rebuild_rollups(start: date, end: date) -> Tuple[int, int]:
+    """
+    Recompute rollups for ``start``..``end`` (inclusive) from the loan tables.
+
+    Returns the number of per-book and per-genre rows written.
+    """
+    books: Dict[tuple, Dict[str, int]] = defaultdict(lambda: {'checkouts': 0, 'returns': 0})
+    genres: Dict[tuple, Dict[str, int]] = defaultdict(lambda: {'checkouts': 0, 'returns': 0})
+
+    for field, counter in (('borrowed_at', 'checkouts'), ('returned_at', 'returns')):
+        for day, book_id, genre, total in _loan_counts(field, start, end):
+            books[(day, book_id)][counter] += total
+            genres[(day, genre)][counter] += total
+
+    with transaction.atomic():
+        DailyBookCirculation.objects.filter(day__gte=start, day__lte=end).delete()
+        DailyGenreCirculation.objects.filter(day__gte=start, day__lte=end).delete()
+        DailyBookCirculation.objects.bulk_create(
+            [DailyBookCirculation(day=day, book_id=book_id, **counts)
+             for (day, book_id), counts in books.items()],
+            batch_size=ROLLUP_BATCH_SIZE,
+        )
+        DailyGenreCirculation.objects.bulk_create(
+            [DailyGenreCirculation(day=day, genre=genre, **counts)
+             for (day, genre), counts in genres.items()],
+            batch_size=ROLLUP_BATCH_SIZE,
+        )
+    return len(books), len(genres)
+
+
+def daily_totals(start: date, end: date):
+    """Checkouts and returns per day."""
+    return (
+        DailyGenreCirculation.objects
+        .filter(day__gte=start, day__lte=end)
+        .values('day')
+        .annotate(checkouts=Sum('checkouts'), returns=Sum('returns'))
+        .order_by('day')
+    )
+
+
+def top_books(start: date, end: date, limit: int):
+    """Most borrowed books in the range."""
+    return (
+        DailyBookCirculation.objects
+        .filter(day__gte=start, day__lte=end)
+        .values('book_id', 'book__title', 'book__author')
+        .annotate(checkouts=Sum('checkouts'), returns=Sum('returns'))
+        .order_by('-checkouts', 'book_id')[:limit]
+    )
+
+
+def genre_totals(start: date, end: date):
+    """Checkouts and returns per genre over the range."""
+    return (
+        DailyGenreCirculation.objects
+        .filter(day__gte=start, day__lte=end)
+        .values('genre')
+        .annotate(checkouts=Sum('checkouts'), returns=Sum('returns'))
+        .order_by('-checkouts', 'genre')
+    )
@@ -3,8 +3,10 @@ Borrowings app serializers.
 
 Handles serialization for book checkout and return operations.
 """
+from datetime import timedelta
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Borrowing
+from .models import Borrowing, Hold
 from apps.books.serializers import BookListSerializer
 from apps.books.models import Book
 
@@ -54,11 +56,67 @@ class CheckoutBookSerializer(serializers.Serializer):
         except Book.DoesNotExist:
             raise serializers.ValidationError('Book not found.')
 
-        if not book.is_available:
+        if not book.is_available and not self._holds_ready_hold(value):
             raise serializers.ValidationError('Book is not available for checkout.')
 
         return value
 
+    def _holds_ready_hold(self, book_id: int) -> bool:
+        """Check if the requesting user has this book waiting on a ready hold."""
+        request = self.context.get('request')
+        if not request or not request.user.is_authenticated:
+            return False
+        return Hold.objects.filter(
+            user=request.user, book_id=book_id, status=Hold.Status.READY
+        ).exists()
+
+
+class HoldSerializer(serializers.ModelSerializer):
+    """Serializer for a hold and its queue state."""
+
+    book = BookListSerializer(read_only=True)
+    user_email = serializers.EmailField(source='user.email', read_only=True)
+
+    class Meta:
+        model = Hold
+        fields = [
+            'id', 'user_email', 'book', 'position', 'status',
+            'created_at', 'ready_at', 'expires_at'
+        ]
+        read_only_fields = fields
+
+
+class PlaceHoldSerializer(serializers.Serializer):
+    """Serializer for placing a hold on a book."""
+
+    book_id = serializers.IntegerField(help_text='ID of the book to reserve')
+
+    def validate_book_id(self, value: int) -> int:
+        if not Book.objects.filter(pk=value).exists():
+            raise serializers.ValidationError('Book not found.')
+        return value
+
+
+class CirculationRangeSerializer(serializers.Serializer):
+    """Query parameters for circulation reports."""
+
+    DEFAULT_DAYS = 30
+    MAX_DAYS = 366 * 5
+
+    start = serializers.DateField(required=False, help_text='First day (default: 30 days ago)')
+    end = serializers.DateField(required=False, help_text='Last day, inclusive (default: today)')
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100, default=10)
+
+    def validate(self, attrs: dict) -> dict:
+        end = attrs.get('end') or timezone.localdate()
+        start = attrs.get('start') or end - timedelta(days=self.DEFAULT_DAYS - 1)
+        if start > end:
+            raise serializers.ValidationError({'start': 'start must not be after end.'})
+        if (end - start).days > self.MAX_DAYS:
+            raise serializers.ValidationError({'start': 'Date range is too long.'})
+        attrs['start'], attrs['end'] = start, end
+        return attrs
+
 
 class EmptySerializer(serializers.Serializer):
     """Empty serializer for endpoints that don't need a request body."""
@@ -3,10 +3,12 @@ Borrowings app URL configuration.
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BorrowingViewSet
+from .views import BorrowingViewSet, CirculationStatsViewSet, HoldViewSet
 
 router = DefaultRouter()
 router.register(r'borrowings', BorrowingViewSet, basename='borrowing')
+router.register(r'holds', HoldViewSet, basename='hold')
+router.register(r'circulation', CirculationStatsViewSet, basename='circulation')
 
 urlpatterns = [
     path('', include(router.urls)),
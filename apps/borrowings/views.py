@@ -5,21 +5,38 @@ Handles book borrowing, returning, and borrowing history endpoints.
 """
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 from django.db import transaction
 from drf_yasg.utils import swagger_auto_schema, no_body
 from drf_yasg import openapi
-from .models import Borrowing
+from .archive import MergedBorrowingQuerySet
+from . import rollups
+from .holds import cancel_hold, get_ready_hold, place_hold, release_book
+from .models import ArchivedBorrowing, Borrowing, Hold
+from .export import ndjson_response
+from .pagination import (
+    BorrowingCursorPagination,
+    HoldCursorPagination,
+    OverdueCursorPagination,
+)
 from .serializers import (
     BorrowingSerializer, 
     BorrowingDetailSerializer, 
     CheckoutBookSerializer, 
-    EmptySerializer
+    CirculationRangeSerializer,
+    EmptySerializer,
+    HoldSerializer,
+    PlaceHoldSerializer,
 )
+from apps.books import availability
 from apps.books.models import Book
+from apps.books.popularity import record_borrow
 from apps.accounts.permissions import IsAdministrator, IsOwnerOrAdministrator
+from apps.accounts.roles import is_administrator
+from apps.core.metrics import checkouts
 
 
 class BorrowingViewSet(viewsets.ModelViewSet):
@@ -36,7 +53,7 @@ class BorrowingViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     http_method_names = ['get', 'post']
     filter_backends = []
-    pagination_class = None
+    pagination_class = BorrowingCursorPagination
 
     def get_queryset(self):
         """
@@ -51,15 +68,28 @@ class BorrowingViewSet(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Borrowing.objects.none()
         
-        if user.groups.filter(name='Administrators').exists():
+        if is_administrator(user):
             return queryset.order_by('-borrowed_at')
-        return queryset.filter(user=user).order_by('-borrowed_at')
+        return queryset.filter(user_id=user.pk).order_by('-borrowed_at')
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return BorrowingDetailSerializer
         return BorrowingSerializer
 
+    def get_throttles(self):
+        if self.action == 'checkout':
+            self.throttle_scope = 'checkout'
+        return super().get_throttles()
+
+    def _paginated_response(self, queryset, paginator_class=None):
+        """Serialize one cursor page of ``queryset``."""
+        if paginator_class is not None:
+            self._paginator = paginator_class()
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @swagger_auto_schema(
         operation_summary="List borrowings",
         operation_description="""
@@ -100,24 +130,32 @@ class BorrowingViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def checkout(self, request):
         """Checkout a book by ID."""
-        serializer = CheckoutBookSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
+        serializer = CheckoutBookSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            checkouts.labels('invalid').inc()
+            raise ValidationError(serializer.errors)
         book_id = serializer.validated_data['book_id']
 
         with transaction.atomic():
             try:
                 book = Book.objects.select_for_update().get(pk=book_id)
             except Book.DoesNotExist:
+                checkouts.labels('not_found').inc()
                 return Response(
                     {'error': 'Book not found.'}, 
                     status=status.HTTP_404_NOT_FOUND
                 )
 
+            # A reserved book can only be collected by the member whose hold is ready
+            hold = None
             if not book.is_available:
-                return Response(
-                    {'error': 'Book is not available.'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+                hold = get_ready_hold(request.user, book.id)
+                if hold is None:
+                    checkouts.labels('unavailable').inc()
+                    return Response(
+                        {'error': 'Book is not available.'}, 
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
 
             # Check if user already has this book
             if Borrowing.objects.filter(
@@ -125,6 +163,7 @@ class BorrowingViewSet(viewsets.ModelViewSet):
                 book=book, 
                 returned_at__isnull=True
             ).exists():
+                checkouts.labels('already_borrowed').inc()
                 return Response(
                     {'error': 'You already have this book checked out.'}, 
                     status=status.HTTP_400_BAD_REQUEST
@@ -135,15 +174,23 @@ class BorrowingViewSet(viewsets.ModelViewSet):
                 user=request.user, 
                 returned_at__isnull=True
             ).exists():
+                checkouts.labels('limit_reached').inc()
                 return Response(
                     {'error': 'You can only have 1 book checked out at a time.'}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
             borrowing = Borrowing.objects.create(user=request.user, book=book)
+            if hold is not None:
+                hold.status = Hold.Status.FULFILLED
+                hold.save(update_fields=['status'])
             book.is_available = False
-            book.save()
+            book.save(update_fields=['is_available', 'updated_at'])
+            rollups.record_checkout(book, borrowing.borrowed_at)
+            record_borrow(book.id)
+            availability.mark_checked_out(book.id, borrowing.due_date)
 
+        checkouts.labels('success').inc()
         return Response(BorrowingSerializer(borrowing).data, status=status.HTTP_201_CREATED)
 
     @swagger_auto_schema(
@@ -161,17 +208,26 @@ class BorrowingViewSet(viewsets.ModelViewSet):
         """Process a book return (Admin only)."""
         borrowing = self.get_object()
 
-        if borrowing.returned_at:
-            return Response(
-                {'error': 'Book already returned.'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
         with transaction.atomic():
+            # Lock the book, then the loan (the order checkout uses), and
+            # re-check under the lock: a concurrent checkin of the same loan
+            # must not release the book to a second hold.
+            book = Book.objects.select_for_update().get(pk=borrowing.book_id)
+            returned_at = (
+                Borrowing.objects.select_for_update()
+                .values_list('returned_at', flat=True)
+                .get(pk=borrowing.pk)
+            )
+            if returned_at:
+                return Response(
+                    {'error': 'Book already returned.'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             borrowing.returned_at = timezone.now()
             borrowing.save()
-            borrowing.book.is_available = True
-            borrowing.book.save()
+            # Allocate to the next hold in the queue, or make the book available
+            release_book(book)
+            rollups.record_return(book, borrowing.returned_at)
 
         return Response(BorrowingSerializer(borrowing).data)
 
@@ -187,19 +243,41 @@ Get your currently active (unreturned) borrowings.
     def current(self, request):
         """Get active borrowings."""
         queryset = self.get_queryset().filter(returned_at__isnull=True)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self._paginated_response(queryset)
 
     @swagger_auto_schema(
         operation_summary="All borrowings (Admin)",
-        operation_description="View all borrowings in the system - requires administrator access"
+        operation_description="""
+View all borrowings in the system - requires administrator access.
+
+Pass `export=ndjson` to stream every record as newline-delimited JSON
+instead of paging through the results.
+        """,
+        manual_parameters=[
+            openapi.Parameter(
+                'export',
+                openapi.IN_QUERY,
+                description="Set to 'ndjson' to stream a full export",
+                type=openapi.TYPE_STRING,
+                enum=['ndjson'],
+                required=False,
+            ),
+        ]
     )
     @action(detail=False, methods=['get'], permission_classes=[IsAdministrator])
     def all_records(self, request):
-        """Get all borrowings in the system (Admin only)."""
-        queryset = Borrowing.objects.select_related('user', 'book').order_by('-borrowed_at')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        """Get all borrowings in the system, archived ones included (Admin only)."""
+        queryset = MergedBorrowingQuerySet(
+            Borrowing.objects.select_related('user', 'book'),
+            ArchivedBorrowing.objects.select_related('user', 'book'),
+        )
+        if request.query_params.get('export') == 'ndjson':
+            return ndjson_response(
+                queryset.order_by('-borrowed_at', '-id'),
+                BorrowingSerializer,
+                filename='borrowings.ndjson',
+            )
+        return self._paginated_response(queryset)
 
     @swagger_auto_schema(
         operation_summary="Overdue borrowings (Admin)",
@@ -211,9 +289,8 @@ Get your currently active (unreturned) borrowings.
         queryset = Borrowing.objects.filter(
             returned_at__isnull=True,
             due_date__lt=timezone.now()
-        ).select_related('user', 'book').order_by('-due_date')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        ).select_related('user', 'book')
+        return self._paginated_response(queryset, OverdueCursorPagination)
 
     @swagger_auto_schema(
         operation_summary="My borrowing history",
@@ -221,9 +298,211 @@ Get your currently active (unreturned) borrowings.
     )
     @action(detail=False, methods=['get'])
     def history(self, request):
-        """Get current user's complete borrowing history."""
-        queryset = Borrowing.objects.filter(
-            user=request.user
-        ).select_related('book').order_by('-borrowed_at')
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        """Get current user's complete borrowing history, archived loans included."""
+        queryset = MergedBorrowingQuerySet(
+            Borrowing.objects.filter(user_id=request.user.pk).select_related('user', 'book'),
+            ArchivedBorrowing.objects.filter(user_id=request.user.pk).select_related('user', 'book'),
+        )
+        return self._paginated_response(queryset)
+
+
+class HoldViewSet(viewsets.ModelViewSet):
+    """
+    Book Hold (Reservation) API
+
+    Members join a FIFO queue for a checked-out book instead of polling for
+    availability. When the book is returned, it is allocated to the first
+    waiting hold, which then has a limited pickup window to check it out.
+
+    - **Members**: Place, view and cancel own holds
+    - **Administrators**: View all holds
+    """
+    serializer_class = HoldSerializer
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get', 'post', 'delete']
+    filter_backends = []
+    pagination_class = HoldCursorPagination
+
+    def get_queryset(self):
+        """Members see their own holds; administrators see all holds."""
+        if getattr(self, 'swagger_fake_view', False):
+            return Hold.objects.none()
+
+        user = self.request.user
+        queryset = Hold.objects.select_related('user', 'book')
+        if is_administrator(user):
+            return queryset
+        return queryset.filter(user_id=user.pk)
+
+    @swagger_auto_schema(
+        operation_summary="List holds",
+        operation_description="""
+**Administrators**: View all holds in the system  
+**Members**: View only your own holds
+        """,
+        responses={200: HoldSerializer(many=True)},
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @swagger_auto_schema(operation_summary="Get hold details")
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_summary="Place a hold",
+        operation_description="Join the queue for a book that is currently checked out.",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['book_id'],
+            properties={
+                'book_id': openapi.Schema(
+                    type=openapi.TYPE_INTEGER,
+                    description='ID of the book to reserve'
+                )
+            }
+        ),
+        responses={
+            201: HoldSerializer,
+            400: "Book is available or hold already exists"
+        }
+    )
+    def create(self, request, *args, **kwargs):
+        serializer = PlaceHoldSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        book_id = serializer.validated_data['book_id']
+
+        with transaction.atomic():
+            book = Book.objects.select_for_update().get(pk=book_id)
+
+            if book.is_available:
+                return Response(
+                    {'error': 'Book is available; check it out instead.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            if Hold.objects.filter(
+                user=request.user,
+                book=book,
+                status__in=Hold.OPEN_STATUSES
+            ).exists():
+                return Response(
+                    {'error': 'You already have a hold on this book.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            if Borrowing.objects.filter(
+                user=request.user,
+                book=book,
+                returned_at__isnull=True
+            ).exists():
+                return Response(
+                    {'error': 'You already have this book checked out.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            hold = place_hold(request.user, book)
+
+        return Response(HoldSerializer(hold).data, status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        operation_summary="Cancel a hold",
+        operation_description="Leave the queue. A ready hold passes the book to the next member."
+    )
+    def destroy(self, request, *args, **kwargs):
+        hold = self.get_object()
+        if hold.user_id != request.user.id:
+            return Response(
+                {'error': 'You can only cancel your own holds.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        if not hold.is_open:
+            return Response(
+                {'error': 'Hold is no longer active.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        cancel_hold(hold)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+CIRCULATION_RANGE_PARAMETERS = [
+    openapi.Parameter(
+        'start', openapi.IN_QUERY, description="First day, YYYY-MM-DD (default: 30 days ago)",
+        type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False,
+    ),
+    openapi.Parameter(
+        'end', openapi.IN_QUERY, description="Last day, inclusive (default: today)",
+        type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE, required=False,
+    ),
+]
+
+
+class CirculationStatsViewSet(viewsets.ViewSet):
+    """
+    Circulation Analytics API (Admin)
+
+    Reports are read from daily rollup tables that checkout and checkin keep
+    up to date, so a year-long report reads a few hundred rows instead of
+    scanning every borrowing.
+    """
+    permission_classes = [IsAdministrator]
+
+    def _get_range(self, request) -> dict:
+        serializer = CirculationRangeSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def _respond(self, params: dict, results) -> Response:
+        return Response({
+            'start': params['start'],
+            'end': params['end'],
+            'results': list(results),
+        })
+
+    @swagger_auto_schema(
+        operation_summary="Daily circulation (Admin)",
+        operation_description="Checkouts and returns per day",
+        manual_parameters=CIRCULATION_RANGE_PARAMETERS,
+    )
+    @action(detail=False, methods=['get'])
+    def daily(self, request):
+        """Checkouts and returns per day."""
+        params = self._get_range(request)
+        return self._respond(params, rollups.daily_totals(params['start'], params['end']))
+
+    @swagger_auto_schema(
+        operation_summary="Top borrowed books (Admin)",
+        operation_description="Most borrowed books in the date range",
+        manual_parameters=CIRCULATION_RANGE_PARAMETERS + [
+            openapi.Parameter(
+                'limit', openapi.IN_QUERY, description="Number of books (max: 100)",
+                type=openapi.TYPE_INTEGER, required=False, default=10,
+            ),
+        ],
+    )
+    @action(detail=False, methods=['get'])
+    def top_books(self, request):
+        """Most borrowed books in the range."""
+        params = self._get_range(request)
+        results = rollups.top_books(params['start'], params['end'], params['limit'])
+        return self._respond(params, [
+            {
+                'book_id': row['book_id'],
+                'title': row['book__title'],
+                'author': row['book__author'],
+                'checkouts': row['checkouts'],
+                'returns': row['returns'],
+            }
+            for row in results
+        ])
+
+    @swagger_auto_schema(
+        operation_summary="Circulation by genre (Admin)",
+        operation_description="Checkouts and returns per genre in the date range",
+        manual_parameters=CIRCULATION_RANGE_PARAMETERS,
+    )
+    @action(detail=False, methods=['get'])
+    def genres(self, request):
+        """Checkouts and returns per genre."""
+        params = self._get_range(request)
+        return self._respond(params, rollups.genre_totals(params['start'], params['end']))
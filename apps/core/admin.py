@@ -0,0 +1,18 @@
+"""
+Core app admin configuration.
+"""
+from django.contrib import admin
+from .models import QueryFingerprint
+
+
+@admin.register(QueryFingerprint)
+class QueryFingerprintAdmin(admin.ModelAdmin):
+    """Read-only view of the slow-query log."""
+    list_display = ['fingerprint', 'route', 'slow_count', 'slow_max_ms', 'repeat_requests', 'last_seen']
+    list_filter = ['route']
+    search_fields = ['sql', 'origin']
+    ordering = ['-last_seen']
+    readonly_fields = [field.name for field in QueryFingerprint._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
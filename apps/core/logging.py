@@ -0,0 +1,65 @@
+"""
+Logging helpers: a JSON formatter and a handler that writes from a
+background thread.
+
+``QueueStreamHandler`` formats a record on the calling thread (cheap) and
+hands the finished line to a bounded queue; a ``QueueListener`` thread does
+the actual write. A slow or blocked stdout therefore never stalls a
+request. When the queue is full, records are dropped and counted rather
+than waited for.
+"""
+import atexit
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+DEFAULT_QUEUE_SIZE = 10000
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message and the fields
+    passed as ``extra={'data': {...}}``.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'data', None) or {})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class QueueStreamHandler(QueueHandler):
+    """Write formatted records to ``stream`` (stdout) from a background thread."""
+
+    def __init__(self, stream=None, maxsize: int = DEFAULT_QUEUE_SIZE) -> None:
+        super().__init__(queue.Queue(maxsize))
+        self.dropped = 0
+        target = logging.StreamHandler(stream or sys.stdout)
+        target.setFormatter(logging.Formatter('%(message)s'))
+        self.listener = QueueListener(self.queue, target)
+        self.listener.start()
+        atexit.register(self._stop_listener)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _stop_listener(self) -> None:
+        """Write out queued records and stop the thread, if still running."""
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def close(self) -> None:
+        self._stop_listener()
+        super().close()
@@ -0,0 +1,234 @@
+"""
+Worker memory diagnostics and recycling.
+
+Each worker keeps a ``MemoryMonitor`` that the middleware ticks after
+every request. Every ``MEMORY_CHECK_EVERY`` requests it reads the
+worker's resident set size, publishes a status line to the shared cache
+(listed for all workers at ``/api/diagnostics/memory/``) and, when RSS is
+over ``MEMORY_RECYCLE_RSS_MB``, logs why and asks gunicorn to replace the
+worker: SIGTERM to itself, which finishes the current request first.
+
+For finding what grows, administrators can take ``tracemalloc`` snapshots
+in the worker that serves the request, compare any two of the last
+``MEMORY_SNAPSHOT_KEEP``, and count live objects by type. Tracing starts
+with the first snapshot (or at startup with ``PYTHONTRACEMALLOC=<frames>``)
+and stops when the snapshots are deleted. Snapshots are per worker;
+responses say which worker (pid) served them.
+"""
+import gc
+import itertools
+import logging
+import os
+import resource
+import signal
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger('apps.memory')
+
+WORKER_COUNT_KEY = 'memory:workers'
+WORKER_SLOT_KEY = 'memory:workers:{}'
+WORKER_KEY = 'memory:worker:{}'
+MAX_WORKERS = 200
+DEFAULT_CHECK_EVERY = 100
+DEFAULT_SNAPSHOT_KEEP = 5
+DEFAULT_TRACE_FRAMES = 10
+STATUS_TIMEOUT = 900
+TOP_LIMIT = 25
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+]
+
+
+def rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # kB on Linux
+
+
+def object_counts(limit: int = TOP_LIMIT) -> List[Dict]:
+    """Live objects tracked by the garbage collector, by type."""
+    counts = Counter(
+        f'{type(obj).__module__}.{type(obj).__qualname__}' for obj in gc.get_objects()
+    )
+    return [{'type': name, 'count': count} for name, count in counts.most_common(limit)]
+
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    frame = traceback[0]
+    return f'{frame.filename}:{frame.lineno}'
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, limit: int = TOP_LIMIT) -> List[Dict]:
+    """Allocation sites holding the most memory in ``snapshot``."""
+    return [
+        {'site': _site(stat.traceback), 'size_bytes': stat.size, 'count': stat.count}
+        for stat in snapshot.statistics('lineno')[:limit]
+    ]
+
+
+def compare(old: tracemalloc.Snapshot, new: tracemalloc.Snapshot, limit: int = TOP_LIMIT) -> List[Dict]:
+    """Allocation sites that grew the most from ``old`` to ``new``."""
+    return [
+        {
+            'site': _site(stat.traceback), 'size_bytes': stat.size, 'size_diff_bytes': stat.size_diff,
+            'count': stat.count, 'count_diff': stat.count_diff,
+        }
+        for stat in new.compare_to(old, 'lineno')[:limit]
+    ]
+
+
+class MemoryMonitor:
+    """Memory state of this worker."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._requests = itertools.count(1)
+        self.requests = 0
+        self.started = time.time()
+        self.recycling = False
+        self._snapshot_ids = itertools.count(1)
+        self.snapshots: 'OrderedDict[int, tuple]' = OrderedDict()
+        self._slot: Optional[int] = None
+
+    @property
+    def worker(self) -> str:
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def status(self) -> Dict:
+        tracing = tracemalloc.is_tracing()
+        return {
+            'worker': self.worker,
+            'pid': os.getpid(),
+            'rss_bytes': rss_bytes(),
+            'peak_rss_bytes': peak_rss_bytes(),
+            'requests': self.requests,
+            'uptime_seconds': round(time.time() - self.started),
+            'gc_counts': gc.get_count(),
+            'tracing': tracing,
+            'traced_bytes': tracemalloc.get_traced_memory()[0] if tracing else None,
+            'snapshots': [
+                {'id': snapshot_id, 'taken_at': taken_at}
+                for snapshot_id, (taken_at, _) in self.snapshots.items()
+            ],
+            'recycling': self.recycling,
+            'checked_at': time.time(),
+        }
+
+    # Snapshots
+
+    def take_snapshot(self) -> int:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(getattr(settings, 'MEMORY_TRACE_FRAMES', DEFAULT_TRACE_FRAMES))
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        keep = getattr(settings, 'MEMORY_SNAPSHOT_KEEP', DEFAULT_SNAPSHOT_KEEP)
+        with self._lock:
+            snapshot_id = next(self._snapshot_ids)
+            self.snapshots[snapshot_id] = (time.time(), snapshot)
+            while len(self.snapshots) > keep:
+                self.snapshots.popitem(last=False)
+        return snapshot_id
+
+    def get_snapshot(self, snapshot_id: int) -> Optional[tracemalloc.Snapshot]:
+        entry = self.snapshots.get(snapshot_id)
+        return entry[1] if entry else None
+
+    def previous_snapshot_id(self, snapshot_id: int) -> Optional[int]:
+        earlier = [other for other in self.snapshots if other < snapshot_id]
+        return earlier[-1] if earlier else None
+
+    def stop_tracing(self) -> None:
+        with self._lock:
+            self.snapshots.clear()
+        tracemalloc.stop()
+
+    # Periodic checks
+
+    def request_finished(self, request) -> None:
+        """Count a request, and check memory every ``MEMORY_CHECK_EVERY``."""
+        self.requests = next(self._requests)
+        if self.requests % getattr(settings, 'MEMORY_CHECK_EVERY', DEFAULT_CHECK_EVERY) == 0:
+            self.check(request)
+
+    def check(self, request=None) -> Dict:
+        status = self.status()
+        limit_mb = getattr(settings, 'MEMORY_RECYCLE_RSS_MB', 0)
+        if limit_mb and status['rss_bytes'] > limit_mb * 1024 * 1024 and not self.recycling:
+            self.recycle(
+                f"RSS {status['rss_bytes'] // (1024 * 1024)} MB over MEMORY_RECYCLE_RSS_MB={limit_mb} "
+                f"after {status['requests']} requests",
+                request, status,
+            )
+        self.publish(status)
+        return status
+
+    def recycle(self, reason: str, request, status: Dict) -> None:
+        """Log ``reason`` and let gunicorn replace this worker."""
+        under_gunicorn = request is not None and request.META.get('SERVER_SOFTWARE', '').startswith('gunicorn')
+        data = {
+            'event': 'worker_recycle', 'reason': reason, 'pid': status['pid'],
+            'rss_bytes': status['rss_bytes'], 'requests': status['requests'],
+        }
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+            data['top_allocations'] = top_allocations(snapshot, 10)
+        if not under_gunicorn:
+            logger.warning('Worker over memory limit, not recycling outside gunicorn: %s', reason,
+                           extra={'data': data})
+            return
+        logger.warning('Recycling worker %s: %s', status['pid'], reason, extra={'data': data})
+        self.recycling = status['recycling'] = True
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    def publish(self, status: Dict) -> None:
+        """
+        Share this worker's status. Each worker takes a numbered slot with an
+        atomic increment (again if the counter was lost, e.g. evicted) and
+        only ever writes its own keys; stale workers drop out when their
+        keys expire.
+        """
+        if cache.add(WORKER_COUNT_KEY, 0, None) or self._slot is None:
+            self._slot = cache.incr(WORKER_COUNT_KEY)
+        cache.set_many({
+            WORKER_SLOT_KEY.format(self._slot): status['worker'],
+            WORKER_KEY.format(status['worker']): status,
+        }, STATUS_TIMEOUT)
+
+    @staticmethod
+    def workers() -> List[Dict]:
+        """Last published status of every live worker (of the newest ``MAX_WORKERS``)."""
+        count = cache.get(WORKER_COUNT_KEY) or 0
+        slots = range(max(1, count - MAX_WORKERS + 1), count + 1)
+        names = cache.get_many([WORKER_SLOT_KEY.format(slot) for slot in slots]).values()
+        statuses = cache.get_many([WORKER_KEY.format(name) for name in set(names)])
+        return sorted(statuses.values(), key=lambda status: status['worker'])
+
+    def reset(self) -> None:
+        self.__init__()
+
+
+monitor = MemoryMonitor()
+
+# A forked worker starts its own count, snapshots and recycling state
+os.register_at_fork(after_in_child=monitor.reset)
@@ -0,0 +1,420 @@
+"""
+Application metrics in the Prometheus text format.
+
+A small registry of counters and histograms, recorded in-process and served
+at ``/metrics``. Recording a sample is a dict lookup and a float add, so
+the request middleware can afford several per request.
+
+Under gunicorn each worker is a separate process with its own counters.
+When ``METRICS_MULTIPROC_DIR`` is set, every process keeps its values in a
+memory-mapped file ``metrics_<pid>.db`` in that directory instead of a
+dict, and a scrape (served by any worker) sums the files of all processes.
+When a worker exits, the gunicorn master folds its file into
+``metrics_aggregate.db`` and removes it (``merge_exited_worker``, called
+from ``config/gunicorn.conf.py``), so counters never go backwards and the
+directory holds one file per live worker plus the aggregate. Empty the
+directory when the server starts (``start.sh`` does).
+
+Histograms store per-bucket counts and a sum; cumulative ``_bucket`` and
+``_count`` samples are computed at scrape time.
+"""
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0,
+)
+
+Key = Tuple[str, str, Tuple[str, ...], str]  # (metric, suffix, label values, le)
+
+AGGREGATE_FILE = 'metrics_aggregate.db'
+LOCK_FILE = 'metrics.lock'
+
+
+class MemoryStore:
+    """Values of this process only, in a dict."""
+
+    def __init__(self) -> None:
+        self._values: Dict[Key, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def add(self, key: Key, amount: float) -> None:
+        with self._lock:
+            self._values[key] += amount
+
+    def samples(self) -> Dict[Key, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class MmapStore:
+    """
+    Values of this process in a memory-mapped file.
+
+    Layout: an 8-byte header holding the number of bytes used, then
+    entries of (uint32 key length, JSON key padded to 8 bytes, float64
+    value). Entries are only appended, and the header is updated after the
+    entry is written, so readers in other processes never see a partial one.
+    """
+
+    INITIAL_SIZE = 1 << 16
+    HEADER = struct.Struct('<Q')
+    LENGTH = struct.Struct('<I')
+    VALUE = struct.Struct('<d')
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._positions: Dict[Key, int] = {}
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self._file.truncate(self.INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = self.HEADER.unpack_from(self._map, 0)[0] or self.HEADER.size
+        for key, _, position in self._entries(self._map, self._used):
+            self._positions[key] = position
+
+    @classmethod
+    def _entries(cls, data, used: int) -> Iterator[Tuple[Key, float, int]]:
+        """Yield ``(key, value, value offset)`` for every entry."""
+        position = cls.HEADER.size
+        while position < used:
+            length = cls.LENGTH.unpack_from(data, position)[0]
+            start = position + cls.LENGTH.size
+            metric, suffix, labels, le = json.loads(bytes(data[start:start + length]))
+            offset = start + _padded(cls.LENGTH.size + length) - cls.LENGTH.size
+            yield (metric, suffix, tuple(labels), le), cls.VALUE.unpack_from(data, offset)[0], offset
+            position = offset + cls.VALUE.size
+
+    def _append(self, key: Key) -> int:
+        encoded = json.dumps(key).encode()
+        size = _padded(self.LENGTH.size + len(encoded)) + self.VALUE.size
+        if self._used + size > len(self._map):
+            capacity = len(self._map)
+            while self._used + size > capacity:
+                capacity *= 2
+            self._map.close()
+            self._file.truncate(capacity)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        position = self._used
+        self.LENGTH.pack_into(self._map, position, len(encoded))
+        self._map[position + self.LENGTH.size:position + self.LENGTH.size + len(encoded)] = encoded
+        offset = position + size - self.VALUE.size
+        self.VALUE.pack_into(self._map, offset, 0.0)
+        self._used += size
+        self.HEADER.pack_into(self._map, 0, self._used)
+        self._positions[key] = offset
+        return offset
+
+    def add(self, key: Key, amount: float) -> None:
+        with self._lock:
+            offset = self._positions.get(key)
+            if offset is None:
+                offset = self._append(key)
+            self.VALUE.pack_into(self._map, offset, self.VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def samples(self) -> Dict[Key, float]:
+        with self._lock:
+            return {key: value for key, value, _ in self._entries(self._map, self._used)}
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    @classmethod
+    def read(cls, path: str) -> Dict[Key, float]:
+        """Read another process's file."""
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < cls.HEADER.size:
+            return {}
+        used = cls.HEADER.unpack_from(data, 0)[0]
+        return {key: value for key, value, _ in cls._entries(data, used)}
+
+
+def _padded(size: int) -> int:
+    return (size + 7) & ~7
+
+
+@contextmanager
+def _directory_lock(directory: str, exclusive: bool) -> Iterator[None]:
+    """
+    Scrapes share the lock and merges take it alone, so a scrape never sees
+    an exited worker's values both in its file and in the aggregate.
+    """
+    import fcntl  # gunicorn, and so multiprocess mode, is POSIX only
+
+    with open(os.path.join(directory, LOCK_FILE), 'a+b') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def merge_exited_worker(directory: str, pid: int) -> None:
+    """Fold the file of process ``pid``, which has exited, into the aggregate file."""
+    path = os.path.join(directory, f'metrics_{pid}.db')
+    if not os.path.exists(path):
+        return
+    with _directory_lock(directory, exclusive=True):
+        aggregate = MmapStore(os.path.join(directory, AGGREGATE_FILE))
+        try:
+            for key, value in MmapStore.read(path).items():
+                aggregate.add(key, value)
+        finally:
+            aggregate.close()
+        os.remove(path)
+
+
+class Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional['Registry'] = None) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry or REGISTRY
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self.registry.register(self)
+
+    def labels(self, *values) -> object:
+        """The series for ``values`` (one per label name, in order)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} takes labels {self.labelnames}')
+            child = self._children[values] = self._child(tuple(str(value) for value in values))
+        return child
+
+    def _child(self, labels: Tuple[str, ...]) -> object:
+        raise NotImplementedError
+
+    def expose(self, samples: Dict[Key, float]) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ('registry', 'key')
+
+    def __init__(self, registry: 'Registry', key: Key) -> None:
+        self.registry = registry
+        self.key = key
+
+    def inc(self, amount: float = 1) -> None:
+        self.registry.store.add(self.key, amount)
+
+
+class Counter(Metric):
+    """A value that only goes up. Exposed as ``<name>_total``."""
+
+    kind = 'counter'
+
+    def _child(self, labels):
+        return _CounterChild(self.registry, (self.name, '_total', labels, ''))
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def expose(self, samples):
+        return [
+            f'{self.name}_total{_labels(self.labelnames, key[2])} {_number(value)}'
+            for key, value in sorted(samples.items())
+        ]
+
+
+class _HistogramChild:
+    __slots__ = ('registry', 'bounds', 'bucket_keys', 'sum_key')
+
+    def __init__(self, registry: 'Registry', name: str, labels: Tuple[str, ...],
+                 bounds: Tuple[float, ...]) -> None:
+        self.registry = registry
+        self.bounds = bounds
+        self.bucket_keys = [(name, '_bucket', labels, _number(bound)) for bound in bounds]
+        self.bucket_keys.append((name, '_bucket', labels, '+Inf'))
+        self.sum_key = (name, '_sum', labels, '')
+
+    def observe(self, value: float) -> None:
+        store = self.registry.store
+        store.add(self.bucket_keys[bisect_left(self.bounds, value)], 1)
+        store.add(self.sum_key, value)
+
+
+class Histogram(Metric):
+    """Observations counted into buckets of upper bounds ``buckets``."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+                 registry: Optional['Registry'] = None) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _child(self, labels):
+        return _HistogramChild(self.registry, self.name, labels, self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def expose(self, samples):
+        series = defaultdict(dict)
+        for (_, suffix, labels, le), value in samples.items():
+            series[labels][le or suffix] = value
+        bounds = [_number(bound) for bound in self.buckets] + ['+Inf']
+        lines = []
+        for labels, values in sorted(series.items()):
+            total = 0.0
+            for le in bounds:
+                total += values.get(le, 0.0)
+                lines.append(
+                    f'{self.name}_bucket{_labels(self.labelnames + ("le",), labels + (le,))} {_number(total)}'
+                )
+            rendered = _labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{rendered} {_number(values.get("_sum", 0.0))}')
+            lines.append(f'{self.name}_count{rendered} {_number(total)}')
+        return lines
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(
+        '{}="{}"'.format(name, value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"'))
+        for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    """The metrics of this application and the store their values live in."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._store = None
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f'Duplicate metric: {metric.name}')
+        self._metrics[metric.name] = metric
+
+    @staticmethod
+    def multiprocess_dir() -> Optional[str]:
+        return getattr(settings, 'METRICS_MULTIPROC_DIR', None) or None
+
+    @property
+    def store(self):
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    directory = self.multiprocess_dir()
+                    if directory:
+                        self._store = MmapStore(os.path.join(directory, f'metrics_{os.getpid()}.db'))
+                    else:
+                        self._store = MemoryStore()
+        return self._store
+
+    def reset(self) -> None:
+        """Start over with a fresh store (tests; and a forked child)."""
+        self._store = None
+        for metric in self._metrics.values():
+            metric._children.clear()
+
+    def collect(self) -> Dict[Key, float]:
+        """All samples, summed over every process in multiprocess mode."""
+        directory = self.multiprocess_dir()
+        if not directory:
+            return self.store.samples()
+        totals: Dict[Key, float] = defaultdict(float)
+        with _directory_lock(directory, exclusive=False):
+            for path in glob.glob(os.path.join(directory, 'metrics_*.db')):
+                for key, value in MmapStore.read(path).items():
+                    totals[key] += value
+        return totals
+
+    def exposition(self) -> str:
+        """The Prometheus text format of every metric."""
+        by_metric: Dict[str, Dict[Key, float]] = defaultdict(dict)
+        for key, value in self.collect().items():
+            by_metric[key[0]][key] = value
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.expose(by_metric.get(name, {})))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# A worker forked from a process that already recorded metrics must not
+# write to its parent's file.
+os.register_at_fork(after_in_child=REGISTRY.reset)
+
+
+http_requests = Counter(
+    'http_requests', 'HTTP requests by route and response status.',
+    ['method', 'route', 'status'],
+)
+http_request_duration = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response.',
+    ['method', 'route'],
+)
+http_request_db_queries = Histogram(
+    'http_request_db_queries', 'SQL queries run per request.',
+    ['route'], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+http_request_db_duration = Histogram(
+    'http_request_db_duration_seconds', 'Time per request spent in SQL queries.',
+    ['route'], buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+http_request_phase_duration = Histogram(
+    'http_request_phase_duration_seconds',
+    'Time per request phase (filtering, count, page fetch, serialization, rendering).',
+    ['route', 'phase'],
+)
+checkouts = Counter(
+    'library_checkouts', 'Checkout attempts by outcome.', ['outcome'],
+)
+cache_lookups = Counter(
+    'cache_lookups', 'Lookups in the shared catalog caches by result (hit or miss).',
+    ['cache', 'result'],
+)
+
+
+# Any token is a valid HTTP method; others are recorded as "other" so clients
+# cannot create series at will.
+KNOWN_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+
+def record_request(method: str, route: str, status: int, seconds: float,
+                   queries: int, query_seconds: float, phases: Optional[Dict[str, float]] = None) -> None:
+    """Record one served request, with its phase timings if it has any."""
+    if method not in KNOWN_METHODS:
+        method = 'other'
+    http_requests.labels(method, route, status).inc()
+    http_request_duration.labels(method, route).observe(seconds)
+    http_request_db_queries.labels(route).observe(queries)
+    http_request_db_duration.labels(route).observe(query_seconds)
+    for name, phase_seconds in (phases or {}).items():
+        http_request_phase_duration.labels(route, name).observe(phase_seconds)
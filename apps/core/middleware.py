@@ -1,5 +1,5 @@
 """
-Security middleware for enhanced protection.
+Security headers, access logging, profiling and memory watch middleware.
 
 Adds security headers to all responses for protection against:
 - XSS (Cross-Site Scripting)
@@ -7,8 +7,22 @@ Adds security headers to all responses for protection against:
 - MIME type sniffing
 - Information disclosure
 """
+import cProfile
+import logging
+import random
+import time
+from contextlib import ExitStack
 from typing import Callable
+
+from django.conf import settings
 from django.http import HttpRequest, HttpResponse
+from django.utils.functional import LazyObject, empty
+
+from . import memory, metrics, profiling
+from .querylog import QueryProfiler
+from .timing import PhaseTimings, time_queries
+
+access_logger = logging.getLogger('apps.access')
 
 
 class SecurityHeadersMiddleware:
@@ -63,13 +77,193 @@ class SecurityHeadersMiddleware:
 
 class RequestLoggingMiddleware:
     """
-    Middleware for logging API requests (useful for debugging/monitoring).
+    Structured access log.
+
+    Logs one record per request to the ``apps.access`` logger with the
+    method, route, status, latency, number of SQL queries and time spent in
+    them, user id and response size (see ``apps.core.logging`` for the JSON
+    formatter and the non-blocking handler).
+
+    ``ACCESS_LOG_SAMPLE_RATE`` (0-1) sets the share of requests logged, and
+    ``ACCESS_LOG_SAMPLE_RATES`` overrides it per route name for
+    high-traffic routes. Server errors are always logged. Each record
+    carries the rate it was sampled at so counts can be scaled back up.
+
+    Every request, sampled or not, is also recorded in the request metrics
+    (``apps.core.metrics``). Views that time their phases (see
+    ``apps.core.timing.PhaseTimings``) add them to the metrics and the log
+    record, and to a ``Server-Timing`` header when the view asks for one.
+    Slow and repeated queries are reported by ``apps.core.querylog``.
+
+    Streamed responses are recorded when the stream closes, so their
+    latency, queries and size cover the body as well.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        request.timings = timings = PhaseTimings()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            queries = stack.enter_context(time_queries(QueryProfiler()))
+            response = self.get_response(request)
+            if timings.emit:
+                response['Server-Timing'] = timings.header(
+                    db=queries.seconds, total=time.perf_counter() - started,
+                )
+            if response.streaming and not getattr(response, 'is_async', False):
+                # The body (and its queries) runs as the server sends it, so
+                # keep timing until the stream is closed and record then.
+                timing = stack.pop_all()
+
+                def finished(sent_bytes):
+                    timing.close()
+                    self._record(request, response, started, queries, sent_bytes)
+
+                response.streaming_content = _ObservedStream(response.streaming_content, finished)
+                return response
+        self._record(
+            request, response, started, queries,
+            None if response.streaming else len(response.content),
+        )
+        return response
+
+    def _record(self, request, response, started, queries, size) -> None:
+        duration = time.perf_counter() - started
+        timings = request.timings
+        match = request.resolver_match
+        route_name = match.view_name if match else None
+        queries.finish(route_name)
+        metrics.record_request(
+            request.method, route_name or 'unmatched', response.status_code,
+            duration, queries.count, queries.seconds, timings.phases,
+        )
+        sample_rate = getattr(settings, 'ACCESS_LOG_SAMPLE_RATES', {}).get(
+            route_name, getattr(settings, 'ACCESS_LOG_SAMPLE_RATE', 1.0)
+        )
+        if response.status_code < 500 and sample_rate < 1 and random.random() >= sample_rate:
+            return
+
+        access_logger.info(
+            '%s %s %s', request.method, request.path, response.status_code,
+            extra={'data': {
+                'method': request.method,
+                'path': request.path,
+                'route': route_name,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'db_queries': queries.count,
+                'db_ms': round(queries.seconds * 1000, 2),
+                'user_id': _user_id(request),
+                'bytes': size,
+                'sample_rate': sample_rate,
+                'phases_ms': {
+                    name: round(seconds * 1000, 2) for name, seconds in timings.phases.items()
+                } or None,
+            }},
+        )
+
+
+class _ObservedStream:
+    """
+    Iterator over a streamed body that counts the bytes sent and calls
+    ``on_close(sent_bytes)`` once, when the body is exhausted or the
+    response is closed (the client went away), whichever comes first.
+    """
+
+    def __init__(self, content, on_close: Callable[[int], None]) -> None:
+        self._content = iter(content)
+        self._on_close = on_close
+        self.sent_bytes = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        try:
+            chunk = next(self._content)
+        except StopIteration:
+            self.close()
+            raise
+        self.sent_bytes += len(chunk)
+        return chunk
+
+    def close(self) -> None:
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close(self.sent_bytes)
+
+
+def _user_id(request: HttpRequest):
+    """
+    The authenticated user's id, without loading a user the request never
+    looked at (a session user that was not evaluated, or the row behind a
+    token user).
+    """
+    user = request.__dict__.get('user')
+    if user is None:
+        return None
+    if isinstance(user, LazyObject):
+        if 'pk' in user.__dict__:  # TokenUser
+            return user.__dict__['pk']
+        user = user._wrapped
+        if user is empty:
+            return None
+    return user.pk if user.is_authenticated else None
+
+
+class RequestProfilingMiddleware:
+    """
+    Run a request under ``cProfile`` when an administrator asks for it or
+    the worker's sampler picks it, and store the profile (see
+    ``apps.core.profiling``). On-demand profiles are named in the
+    ``X-Profile-Id`` response header.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        on_demand = profiling.requested(request)
+        if not on_demand and not profiling.sampler.due():
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        profile_id = profiling.profile_store.save(
+            profiler,
+            method=request.method,
+            path=request.path,
+            route=match.view_name if match else None,
+            status=response.status_code,
+            duration_ms=round(duration * 1000, 2),
+            user_id=_user_id(request),
+            sampled=not on_demand,
+        )
+        if on_demand:
+            response['X-Profile-Id'] = str(profile_id)
+        return response
+
+
+class WorkerMemoryMiddleware:
+    """
+    Tick the worker's ``MemoryMonitor`` after each request, which checks
+    RSS periodically and recycles the worker over ``MEMORY_RECYCLE_RSS_MB``.
     """
 
     def __init__(self, get_response: Callable) -> None:
         self.get_response = get_response
 
     def __call__(self, request: HttpRequest) -> HttpResponse:
-        # Log request info (can be extended with proper logging)
         response = self.get_response(request)
+        memory.monitor.request_finished(request)
         return response
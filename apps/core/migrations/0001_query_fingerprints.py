@@ -0,0 +1,37 @@
+# Generated by Django 4.2.17 on 2026-10-19 08:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueryFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=16, unique=True)),
+                ('sql', models.TextField(help_text='Normalized SQL')),
+                ('route', models.CharField(blank=True, help_text='Last route that ran it', max_length=200)),
+                ('origin', models.CharField(blank=True, help_text='Last application frame that ran it', max_length=300)),
+                ('slow_count', models.PositiveIntegerField(default=0)),
+                ('slow_total_ms', models.FloatField(default=0)),
+                ('slow_max_ms', models.FloatField(default=0)),
+                ('repeat_requests', models.PositiveIntegerField(default=0, help_text='Requests that ran it QUERY_REPEAT_THRESHOLD or more times')),
+                ('repeat_max', models.PositiveIntegerField(default=0, help_text='Most runs in one request')),
+                ('plan', models.TextField(blank=True)),
+                ('plan_captured_at', models.DateTimeField(blank=True, null=True)),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'query_fingerprints',
+                'ordering': ['-last_seen'],
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+"""
+View mixins.
+"""
+import random
+import time
+
+from django.conf import settings
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.response import Response
+
+from apps.accounts.roles import is_administrator
+
+from .timing import get_timings, phase
+
+# Phase names for filter backends; other backends are named after their class
+FILTER_PHASES = [
+    (SearchFilter, 'search'),
+    (DjangoFilterBackend, 'filter'),
+    (OrderingFilter, 'ordering'),
+]
+
+
+def filter_phase(backend: type) -> str:
+    for base, name in FILTER_PHASES:
+        if issubclass(backend, base):
+            return name
+    return backend.__name__
+
+
+class PhaseTimingMixin:
+    """
+    Time the phases of a list request: each filter backend, the pagination
+    count (see ``apps.core.pagination``), fetching the page, serialization
+    and rendering.
+
+    Filter backends only build the queryset, so their phases are Python
+    time; the SQL they produce runs in ``count`` and ``page``.
+
+    Retrieval runs the filter backends too, so detail requests report those.
+    The phases go into the request metrics. They are also returned in a
+    ``Server-Timing`` header to administrators who send ``X-Server-Timing``,
+    and to a ``SERVER_TIMING_SAMPLE_RATE`` share of other requests.
+    """
+
+    def filter_queryset(self, queryset):
+        for backend in list(self.filter_backends):
+            with phase(self.request, filter_phase(backend)):
+                queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        with phase(self.request, 'page'):
+            return super().paginate_queryset(queryset)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        with phase(request, 'serialize'):
+            data = self.get_serializer(queryset if page is None else page, many=True).data
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        timings = get_timings(request)
+        if timings is None or not timings.phases:
+            return response
+        timings.emit = self._wants_server_timing(request)
+        if hasattr(response, 'add_post_render_callback'):
+            rendering = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timings.add('render', time.perf_counter() - rendering)
+            )
+        return response
+
+    @staticmethod
+    def _wants_server_timing(request) -> bool:
+        rate = getattr(settings, 'SERVER_TIMING_SAMPLE_RATE', 0.0)
+        if rate and random.random() < rate:
+            return True
+        return 'HTTP_X_SERVER_TIMING' in request.META and is_administrator(request.user)
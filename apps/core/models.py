@@ -0,0 +1,34 @@
+"""
+Core app models.
+"""
+from django.db import models
+
+
+class QueryFingerprint(models.Model):
+    """
+    Aggregated slow and repeated (N+1 suspect) queries, one row per
+    normalized statement. Written by ``apps.core.querylog``.
+    """
+
+    fingerprint = models.CharField(max_length=16, unique=True)
+    sql = models.TextField(help_text='Normalized SQL')
+    route = models.CharField(max_length=200, blank=True, help_text='Last route that ran it')
+    origin = models.CharField(max_length=300, blank=True, help_text='Last application frame that ran it')
+    slow_count = models.PositiveIntegerField(default=0)
+    slow_total_ms = models.FloatField(default=0)
+    slow_max_ms = models.FloatField(default=0)
+    repeat_requests = models.PositiveIntegerField(
+        default=0, help_text='Requests that ran it QUERY_REPEAT_THRESHOLD or more times',
+    )
+    repeat_max = models.PositiveIntegerField(default=0, help_text='Most runs in one request')
+    plan = models.TextField(blank=True)
+    plan_captured_at = models.DateTimeField(null=True, blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'query_fingerprints'
+        ordering = ['-last_seen']
+
+    def __str__(self) -> str:
+        return f"{self.fingerprint} slow={self.slow_count} repeated={self.repeat_requests}"
@@ -0,0 +1,30 @@
+"""
+Pagination helpers.
+"""
+from functools import partial
+
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from .timing import phase
+
+
+class TimedPaginator(Paginator):
+    """Django paginator that times its COUNT query as the ``count`` phase."""
+
+    def __init__(self, *args, request=None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.request = request
+
+    @cached_property
+    def count(self):
+        with phase(self.request, 'count'):
+            return super().count
+
+
+class TimedPaginationMixin:
+    """For DRF paginators: report the COUNT separately from the page fetch."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.django_paginator_class = partial(TimedPaginator, request=request)
+        return super().paginate_queryset(queryset, request, view)
@@ -0,0 +1,117 @@
+"""
+On-demand and sampled request profiling.
+
+An administrator can profile one request by sending ``X-Profile: 1`` (or
+``?profile=1``). The request runs under ``cProfile``, covering everything
+from the outer middleware in: DRF dispatch, authentication and
+permissions, filter backends, serializers and rendering. The response
+carries an ``X-Profile-Id`` header naming the stored profile. With
+``PROFILE_SAMPLE_EVERY = N`` each worker also profiles every Nth request,
+whoever sends it.
+
+Profiles are kept in a ring buffer of ``PROFILE_BUFFER_SIZE`` slots in the
+shared cache, so any worker can serve them, and are listed at
+``/api/diagnostics/profiles/``. Each holds a text summary (functions by
+cumulative time) and the raw ``pstats`` data, downloadable as a ``.prof``
+file for ``pstats``, snakeviz or gprof2dot call graphs.
+"""
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from apps.accounts.permissions import IsAdministrator
+
+COUNTER_KEY = 'profiles:counter'
+SLOT_KEY = 'profiles:slot:{}'
+DEFAULT_BUFFER_SIZE = 50
+DEFAULT_RETENTION_SECONDS = 86400
+SUMMARY_LINES = 60
+
+TRUTHY = {'1', 'true', 'yes', 'on'}
+
+
+def _buffer_size() -> int:
+    return getattr(settings, 'PROFILE_BUFFER_SIZE', DEFAULT_BUFFER_SIZE)
+
+
+def requested(request) -> bool:
+    """Whether the request asks to be profiled and comes from an administrator."""
+    flag = request.META.get('HTTP_X_PROFILE') or request.GET.get('profile')
+    if not flag or flag.lower() not in TRUTHY:
+        return False
+    # Authenticate the way the API views will (this runs before them)
+    api_request = Request(request, authenticators=[
+        authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    try:
+        return IsAdministrator().has_permission(api_request, None)
+    except APIException:
+        return False
+
+
+class Sampler:
+    """Picks every Nth request of this worker (``PROFILE_SAMPLE_EVERY``)."""
+
+    def __init__(self) -> None:
+        self._counter = itertools.count(1)
+
+    def due(self) -> bool:
+        every = getattr(settings, 'PROFILE_SAMPLE_EVERY', 0)
+        return bool(every) and next(self._counter) % every == 0
+
+
+sampler = Sampler()
+
+
+def summarize(stats: pstats.Stats, lines: int = SUMMARY_LINES) -> str:
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats('cumulative').print_stats(lines)
+    return stream.getvalue()
+
+
+class ProfileStore:
+    """Ring buffer of profiles in the shared cache."""
+
+    def save(self, profiler: cProfile.Profile, **details) -> int:
+        """Store a finished profile; returns its id."""
+        cache.add(COUNTER_KEY, 0, None)
+        profile_id = cache.incr(COUNTER_KEY)
+        stats = pstats.Stats(profiler)
+        entry = {
+            'id': profile_id,
+            'created_at': timezone.now().isoformat(),
+            **details,
+            'summary': summarize(stats),
+            'stats': marshal.dumps(stats.stats),
+        }
+        timeout = getattr(settings, 'PROFILE_RETENTION_SECONDS', DEFAULT_RETENTION_SECONDS)
+        cache.set(SLOT_KEY.format(profile_id % _buffer_size()), entry, timeout)
+        return profile_id
+
+    def get(self, profile_id: int) -> Optional[Dict]:
+        """The profile, unless it has been overwritten or expired."""
+        entry = cache.get(SLOT_KEY.format(profile_id % _buffer_size()))
+        return entry if entry and entry['id'] == profile_id else None
+
+    def list(self) -> List[Dict]:
+        """Stored profiles without their data, newest first."""
+        entries = cache.get_many([SLOT_KEY.format(slot) for slot in range(_buffer_size())]).values()
+        return sorted(
+            ({key: value for key, value in entry.items() if key not in ('summary', 'stats')}
+             for entry in entries),
+            key=lambda entry: entry['id'], reverse=True,
+        )
+
+
+profile_store = ProfileStore()
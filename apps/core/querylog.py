@@ -0,0 +1,251 @@
+"""
+Slow-query log and N+1 detection.
+
+``QueryProfiler`` is the execute wrapper the access log middleware installs
+around each request (a ``QueryTimer`` that also looks at the statements):
+
+- a statement slower than ``SLOW_QUERY_MS`` is logged to ``apps.queries``
+  with its normalized SQL, route and the application frame that ran it;
+- a statement run ``QUERY_REPEAT_THRESHOLD`` or more times in one request
+  (same SQL, different parameters: a query per row) is logged as an N+1
+  suspect.
+
+Both are aggregated per normalized statement in ``QueryFingerprint`` rows,
+listed at ``/api/diagnostics/queries/``. On PostgreSQL the plan of a slow
+SELECT is captured with ``EXPLAIN`` (at most once per
+``QUERY_EXPLAIN_INTERVAL`` seconds per statement). Recording and EXPLAIN
+run on a background thread with its own connection, after the response
+(``QUERY_LOG_ASYNC = False`` records inline, for tests).
+"""
+import hashlib
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connections
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .timing import QueryTimer
+
+logger = logging.getLogger('apps.queries')
+
+DEFAULT_SLOW_QUERY_MS = 200
+DEFAULT_REPEAT_THRESHOLD = 10
+DEFAULT_EXPLAIN_INTERVAL = 600
+QUEUE_SIZE = 1000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_LISTS = re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+')
+_SPACE = re.compile(r'\s+')
+
+APPS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_SKIP_FILES = {os.path.abspath(__file__), os.path.join(APPS_DIR, 'core', 'timing.py')}
+
+
+def normalize_sql(sql: str) -> str:
+    """SQL with literals and parameter lists replaced, for grouping."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _LIST.sub('(...)', sql)
+    sql = _LISTS.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+def origin() -> str:
+    """``path:line in function`` of the innermost application frame."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APPS_DIR) and filename not in _SKIP_FILES:
+            path = os.path.relpath(filename, os.path.dirname(APPS_DIR))
+            return f'{path}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return ''
+
+
+def _slow_seconds() -> float:
+    return getattr(settings, 'SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS) / 1000
+
+
+def _repeat_threshold() -> int:
+    return getattr(settings, 'QUERY_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD)
+
+
+class QueryProfiler(QueryTimer):
+    """Execute wrapper that also collects slow and repeated statements."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.slow_seconds = _slow_seconds()
+        self.repeat_threshold = _repeat_threshold()
+        self.statements: Dict[str, int] = {}
+        self.origins: Dict[str, str] = {}
+        self.slow: List[dict] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            runs = self.statements[sql] = self.statements.get(sql, 0) + 1
+            if runs == self.repeat_threshold:
+                self.origins[sql] = origin()
+            if elapsed >= self.slow_seconds:
+                self.slow.append({
+                    'sql': sql,
+                    'params': None if many else params,
+                    'alias': context['connection'].alias,
+                    'ms': elapsed * 1000,
+                    'origin': origin(),
+                })
+
+    def finish(self, route: Optional[str]) -> None:
+        """Log and record what the request ran; call once it is done."""
+        route = route or ''
+        events = []
+        for query in self.slow:
+            normalized = normalize_sql(query['sql'])
+            logger.warning(
+                'Slow query (%.0f ms) in %s', query['ms'], route or 'unrouted request',
+                extra={'data': {
+                    'event': 'slow_query', 'sql': normalized, 'fingerprint': fingerprint(normalized),
+                    'duration_ms': round(query['ms'], 2), 'route': route, 'origin': query['origin'],
+                }},
+            )
+            events.append({**query, 'kind': 'slow', 'normalized': normalized, 'route': route})
+        for sql, origin_frame in self.origins.items():
+            normalized = normalize_sql(sql)
+            runs = self.statements[sql]
+            logger.warning(
+                'Possible N+1: query ran %d times in %s', runs, route or 'unrouted request',
+                extra={'data': {
+                    'event': 'repeated_query', 'sql': normalized, 'fingerprint': fingerprint(normalized),
+                    'runs': runs, 'route': route, 'origin': origin_frame,
+                }},
+            )
+            events.append({
+                'kind': 'repeated', 'normalized': normalized, 'runs': runs,
+                'route': route, 'origin': origin_frame,
+            })
+        if events:
+            recorder.submit(events)
+
+
+def capture_plan(alias: str, sql: str, params) -> Optional[str]:
+    """The PostgreSQL ``EXPLAIN`` of a SELECT, or None."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql' or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN {sql}', params)
+        return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+def record(events: List[dict]) -> None:
+    """Fold events into their ``QueryFingerprint`` rows."""
+    from .models import QueryFingerprint
+
+    now = timezone.now()
+    explain_interval = getattr(settings, 'QUERY_EXPLAIN_INTERVAL', DEFAULT_EXPLAIN_INTERVAL)
+    for event in events:
+        key = fingerprint(event['normalized'])
+        changes = {'route': event['route'][:200], 'origin': event['origin'][:300], 'last_seen': now}
+        if event['kind'] == 'slow':
+            changes.update(
+                slow_count=F('slow_count') + 1,
+                slow_total_ms=F('slow_total_ms') + event['ms'],
+                slow_max_ms=Greatest(F('slow_max_ms'), Value(event['ms'])),
+            )
+        else:
+            changes.update(
+                repeat_requests=F('repeat_requests') + 1,
+                repeat_max=Greatest(F('repeat_max'), Value(event['runs'])),
+            )
+        if not QueryFingerprint.objects.filter(fingerprint=key).update(**changes):
+            try:
+                QueryFingerprint.objects.create(fingerprint=key, sql=event['normalized'], last_seen=now)
+            except IntegrityError:
+                pass  # Created by another worker in the meantime
+            QueryFingerprint.objects.filter(fingerprint=key).update(**changes)
+
+        if event['kind'] == 'slow' and event['params'] is not None:
+            stale = QueryFingerprint.objects.filter(fingerprint=key).exclude(
+                plan_captured_at__gte=now - timedelta(seconds=explain_interval),
+            )
+            if stale.exists():
+                plan = capture_plan(event['alias'], event['sql'], event['params'])
+                if plan:
+                    stale.update(plan=plan, plan_captured_at=now)
+                    logger.info(
+                        'Plan for slow query %s', key,
+                        extra={'data': {'event': 'query_plan', 'fingerprint': key, 'plan': plan}},
+                    )
+
+
+class FingerprintRecorder:
+    """
+    Records events on a background thread with its own database
+    connection. When the queue is full, events are dropped and counted.
+    """
+
+    def __init__(self, maxsize: int = QUEUE_SIZE) -> None:
+        self.queue: queue.Queue = queue.Queue(maxsize)
+        self.dropped = 0
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def submit(self, events: List[dict]) -> None:
+        if not getattr(settings, 'QUERY_LOG_ASYNC', True):
+            record(events)
+            return
+        self._ensure_thread()
+        try:
+            self.queue.put_nowait(events)
+        except queue.Full:
+            self.dropped += len(events)
+
+    def _ensure_thread(self) -> None:
+        # Started lazily, so each forked worker runs its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self.queue = queue.Queue(self.queue.maxsize)
+                self._thread = threading.Thread(target=self._run, name='querylog', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while True:
+            events = self.queue.get()
+            close_old_connections()
+            try:
+                record(events)
+            except Exception:
+                logger.exception('Could not record query fingerprints')
+            finally:
+                self.queue.task_done()
+
+
+recorder = FingerprintRecorder()
@@ -0,0 +1,25 @@
+"""
+Core app serializers.
+"""
+from rest_framework import serializers
+
+from .models import QueryFingerprint
+
+
+class QueryFingerprintSerializer(serializers.ModelSerializer):
+    """An aggregated slow or repeated query."""
+
+    slow_avg_ms = serializers.SerializerMethodField()
+
+    class Meta:
+        model = QueryFingerprint
+        fields = [
+            'id', 'fingerprint', 'sql', 'route', 'origin',
+            'slow_count', 'slow_avg_ms', 'slow_max_ms', 'slow_total_ms',
+            'repeat_requests', 'repeat_max',
+            'plan', 'plan_captured_at', 'first_seen', 'last_seen',
+        ]
+        read_only_fields = fields
+
+    def get_slow_avg_ms(self, obj: QueryFingerprint):
+        return round(obj.slow_total_ms / obj.slow_count, 2) if obj.slow_count else None
@@ -0,0 +1,154 @@
+"""
+API rate limiting with sliding-window counters in the shared cache.
+
+Each client (the user when authenticated, otherwise the client IP) has a
+counter per scope and fixed window. A request is allowed while
+
+    previous window count * (share of the previous window still in view)
+        + current window count <= limit
+
+which approximates a true sliding window with two integers per client.
+With the Redis cache both counters are read and the current one
+incremented by a single Lua script, so every worker and node enforces the
+same limit in one round trip. Other cache backends (the per-process memory
+cache in development) fall back to ``add``/``incr``/``get``.
+
+Requests are counted whether or not they are allowed, so a client that
+keeps retrying while limited stays limited. Limited responses are 429 with
+a ``Retry-After`` header (added by DRF from ``wait()``).
+
+Scopes and their rates (``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']``):
+
+- ``auth``: login, registration and token refresh (views set
+  ``throttle_scope``);
+- ``checkout``: borrowing checkout;
+- ``search``: reads with a ``search`` query parameter;
+- ``read`` / ``write``: everything else, by HTTP method.
+
+A ``<scope>_anon`` rate, when present, applies to anonymous clients
+instead of ``<scope>``. A scope without a rate is not limited.
+"""
+import math
+import time
+from typing import Optional, Tuple
+
+from django.core.cache import cache as default_cache
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+SLIDING_WINDOW_SCRIPT = """
+local current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+return {current, previous}
+"""
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """``'100/min'`` -> ``(100, 60)``."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+# Registered once per process. A Script only holds the source and its SHA
+# and runs on the client it is given; Django builds a new client per call.
+_sliding_window_script = None
+
+
+def _redis_hit(cache, current_key: str, previous_key: str, timeout: int) -> Tuple[int, int]:
+    global _sliding_window_script
+    client = cache._cache.get_client(current_key, write=True)
+    if _sliding_window_script is None:
+        _sliding_window_script = client.register_script(SLIDING_WINDOW_SCRIPT)
+    current, previous = _sliding_window_script(
+        keys=[cache.make_key(current_key), cache.make_key(previous_key)], args=[timeout],
+        client=client,
+    )
+    return int(current), int(previous)
+
+
+def _generic_hit(cache, current_key: str, previous_key: str, timeout: int) -> Tuple[int, int]:
+    cache.add(current_key, 0, timeout)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:  # expired between add and incr
+        cache.set(current_key, 1, timeout)
+        current = 1
+    return current, cache.get(previous_key, 0)
+
+
+def sliding_window_hit(key: str, window: int, now: float, cache=default_cache) -> Tuple[int, int, float]:
+    """
+    Count a request against ``key`` and return ``(current, previous,
+    elapsed)``: the counts of the current and previous windows and the
+    seconds elapsed in the current window.
+    """
+    window_id = int(now // window)
+    # The braces keep both windows of a key in one Redis Cluster slot
+    current_key = f'throttle:{{{key}}}:{window_id}'
+    previous_key = f'throttle:{{{key}}}:{window_id - 1}'
+    hit = _redis_hit if isinstance(cache, RedisCache) else _generic_hit
+    current, previous = hit(cache, current_key, previous_key, 2 * window)
+    return current, previous, now - window_id * window
+
+
+class ApiRateThrottle(BaseThrottle):
+    """Scoped sliding-window throttle, per user or per client IP."""
+
+    cache = default_cache
+    timer = time.time
+
+    def __init__(self) -> None:
+        self._wait: Optional[float] = None
+
+    def get_scope(self, request, view) -> str:
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return 'search' if request.query_params.get('search') else 'read'
+        return 'write'
+
+    def get_rate(self, scope: str, anonymous: bool) -> Optional[str]:
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        if anonymous and f'{scope}_anon' in rates:
+            return rates[f'{scope}_anon']
+        return rates.get(scope)
+
+    def allow_request(self, request, view) -> bool:
+        user = request.user
+        anonymous = not (user and user.is_authenticated)
+        scope = self.get_scope(request, view)
+        rate = self.get_rate(scope, anonymous)
+        if rate is None:
+            return True
+        limit, window = parse_rate(rate)
+
+        ident = f'ip:{self.get_ident(request)}' if anonymous else f'user:{user.pk}'
+        current, previous, elapsed = sliding_window_hit(
+            f'{scope}:{ident}', window, self.timer(), self.cache,
+        )
+        weight = (window - elapsed) / window
+        if previous * weight + current <= limit:
+            return True
+        self._wait = self._retry_after(limit, window, current, previous, elapsed)
+        return False
+
+    @staticmethod
+    def _retry_after(limit: int, window: int, current: int, previous: int, elapsed: float) -> float:
+        """Seconds until a retry (itself counted) would be allowed."""
+        retry = current + 1
+        if retry <= limit and previous:
+            # previous * (window - t) / window + retry <= limit
+            return window * (1 - (limit - retry) / previous) - elapsed
+        # Wait for the next window, where this window's count becomes the
+        # decaying previous count: current * (window - t) / window + 1 <= limit
+        return window - elapsed + window * max(0.0, 1 - (limit - 1) / current)
+
+    def wait(self) -> Optional[float]:
+        return None if self._wait is None else max(1, math.ceil(self._wait))
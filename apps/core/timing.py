@@ -0,0 +1,88 @@
+"""
+Per-request timing.
+
+``QueryTimer`` is installed with ``connection.execute_wrapper`` around a
+request and counts the SQL statements run and the time spent in them.
+
+``PhaseTimings`` records where a view spent its time (filtering, the
+pagination count, fetching the page, serializing, rendering). The access
+log middleware attaches one to every request as ``request.timings``, feeds
+the phases into the metrics and, when asked, returns them in a
+``Server-Timing`` header.
+"""
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional
+
+from django.db import connections
+
+
+class QueryTimer:
+    """Execute wrapper that counts queries and accumulates their duration."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+@contextmanager
+def time_queries(timer: QueryTimer = None) -> Iterator[QueryTimer]:
+    """Time every query run on any database connection within the block."""
+    timer = timer or QueryTimer()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        yield timer
+
+
+class PhaseTimings:
+    """
+    Seconds per named phase of one request.
+
+    Phases may nest; a phase's time excludes the phases nested in it, so
+    the phases of a request add up to no more than its duration.
+    """
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+        self.emit = False
+        self._nested: List[float] = []
+
+    def add(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self._nested.append(0.0)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.add(name, elapsed - self._nested.pop())
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def header(self, **extra: float) -> str:
+        """``Server-Timing`` value: the phases, then ``extra`` (e.g. db, total)."""
+        entries = {**self.phases, **extra}
+        return ', '.join(f'{name};dur={seconds * 1000:.2f}' for name, seconds in entries.items())
+
+
+def get_timings(request) -> Optional[PhaseTimings]:
+    """The request's ``PhaseTimings`` (None outside the middleware)."""
+    return getattr(request, 'timings', None)
+
+
+def phase(request, name: str):
+    """Time the block as phase ``name`` of ``request``, if it is being timed."""
+    timings = get_timings(request)
+    return nullcontext() if timings is None else timings.phase(name)
@@ -0,0 +1,15 @@
+"""
+Core app URL configuration.
+"""
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import MemoryDiagnosticsViewSet, QueryFingerprintViewSet, RequestProfileViewSet
+
+router = DefaultRouter()
+router.register(r'diagnostics/queries', QueryFingerprintViewSet, basename='query-fingerprint')
+router.register(r'diagnostics/profiles', RequestProfileViewSet, basename='request-profile')
+router.register(r'diagnostics/memory', MemoryDiagnosticsViewSet, basename='memory')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
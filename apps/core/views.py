@@ -0,0 +1,191 @@
+"""
+Operational endpoints.
+"""
+import hmac
+import os
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
+
+from apps.accounts.permissions import IsAdministrator
+
+from . import memory
+from .metrics import CONTENT_TYPE, REGISTRY
+from .models import QueryFingerprint
+from .profiling import profile_store
+from .serializers import QueryFingerprintSerializer
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """
+    Prometheus scrape endpoint.
+
+    When ``METRICS_TOKEN`` is set, scrapers must send it as
+    ``Authorization: Bearer <token>``.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+            return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    return HttpResponse(REGISTRY.exposition(), content_type=CONTENT_TYPE)
+
+
+class QueryFingerprintViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Query Diagnostics API (Admin)
+
+    Slow and repeated (N+1 suspect) statements seen by
+    ``apps.core.querylog``, aggregated per normalized SQL. Filter by
+    ``route`` (e.g. ``borrowing-list``) and sort with ``ordering``.
+    """
+    queryset = QueryFingerprint.objects.all()
+    serializer_class = QueryFingerprintSerializer
+    permission_classes = [IsAdministrator]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['route']
+    ordering_fields = ['last_seen', 'slow_count', 'slow_total_ms', 'slow_max_ms', 'repeat_requests', 'repeat_max']
+    ordering = ['-last_seen']
+
+    @swagger_auto_schema(
+        operation_summary="Slow and repeated queries (Admin)",
+        operation_description="Aggregated slow queries and N+1 suspects, newest first",
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @swagger_auto_schema(
+        operation_summary="Query details (Admin)",
+        operation_description="One aggregated query, with its last captured PostgreSQL plan",
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
+class RequestProfileViewSet(viewsets.ViewSet):
+    """
+    Request Profiles API (Admin)
+
+    Profiles recorded by ``apps.core.profiling``: requests sent by an
+    administrator with ``X-Profile: 1`` and sampled requests. Only the last
+    ``PROFILE_BUFFER_SIZE`` are kept.
+    """
+    permission_classes = [IsAdministrator]
+    lookup_value_regex = r'\d+'
+
+    def _get(self, pk):
+        return profile_store.get(int(pk))
+
+    @swagger_auto_schema(
+        operation_summary="Stored request profiles (Admin)",
+        operation_description="Profiles in the ring buffer, newest first, without their data",
+    )
+    def list(self, request):
+        return Response({'results': profile_store.list()})
+
+    @swagger_auto_schema(
+        operation_summary="Request profile summary (Admin)",
+        operation_description="Functions by cumulative time for one profiled request",
+    )
+    def retrieve(self, request, pk=None):
+        entry = self._get(pk)
+        if entry is None:
+            return Response({'error': 'Profile not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({key: value for key, value in entry.items() if key != 'stats'})
+
+    @swagger_auto_schema(
+        operation_summary="Download a request profile (Admin)",
+        operation_description="Raw pstats data (.prof) for pstats, snakeviz or gprof2dot",
+    )
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        entry = self._get(pk)
+        if entry is None:
+            return Response({'error': 'Profile not found.'}, status=status.HTTP_404_NOT_FOUND)
+        response = HttpResponse(entry['stats'], content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="profile-{entry["id"]}.prof"'
+        return response
+
+
+class MemoryDiagnosticsViewSet(viewsets.ViewSet):
+    """
+    Worker Memory API (Admin)
+
+    Status of every worker (RSS, requests served, tracing), and
+    ``tracemalloc`` snapshots of the worker serving the request (see
+    ``apps.core.memory``). Snapshots belong to one worker: compare
+    snapshots that the same ``pid`` returned.
+    """
+    permission_classes = [IsAdministrator]
+
+    @swagger_auto_schema(
+        operation_summary="Worker memory (Admin)",
+        operation_description="This worker's memory, the last status of every worker, "
+                              "and with objects=true the live objects by type",
+    )
+    def list(self, request):
+        data = {'worker': memory.monitor.check(request), 'workers': memory.monitor.workers()}
+        if request.query_params.get('objects', '').lower() in ('1', 'true'):
+            data['objects'] = memory.object_counts()
+        return Response(data)
+
+    @swagger_auto_schema(
+        method='post',
+        operation_summary="Take a memory snapshot (Admin)",
+        operation_description="Start tracing if needed and snapshot this worker's allocations; "
+                              "returns the top allocation sites and growth since the previous snapshot",
+    )
+    @swagger_auto_schema(
+        method='delete',
+        operation_summary="Stop memory tracing (Admin)",
+        operation_description="Drop this worker's snapshots and stop tracemalloc",
+    )
+    @action(detail=False, methods=['post', 'delete'])
+    def snapshots(self, request):
+        if request.method == 'DELETE':
+            memory.monitor.stop_tracing()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        snapshot_id = memory.monitor.take_snapshot()
+        return Response(
+            self._snapshot_report(snapshot_id, memory.monitor.previous_snapshot_id(snapshot_id)),
+            status=status.HTTP_201_CREATED,
+        )
+
+    @swagger_auto_schema(
+        operation_summary="Memory snapshot (Admin)",
+        operation_description="Top allocation sites of a snapshot, and with compare=<id> "
+                              "the growth since that snapshot",
+    )
+    @action(detail=False, methods=['get'], url_path=r'snapshots/(?P<snapshot_id>\d+)')
+    def snapshot(self, request, snapshot_id=None):
+        snapshot_id = int(snapshot_id)
+        compare = request.query_params.get('compare')
+        if compare is not None and not compare.isdigit():
+            return Response({'compare': 'Must be a snapshot id.'}, status=status.HTTP_400_BAD_REQUEST)
+        for wanted in (snapshot_id, compare):
+            if wanted is not None and memory.monitor.get_snapshot(int(wanted)) is None:
+                return Response(
+                    {'error': f'Snapshot {wanted} not found in worker {memory.monitor.worker}.'},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+        return Response(self._snapshot_report(snapshot_id, int(compare) if compare else None))
+
+    @staticmethod
+    def _snapshot_report(snapshot_id, compare_id):
+        snapshot = memory.monitor.get_snapshot(snapshot_id)
+        report = {
+            'id': snapshot_id,
+            'worker': memory.monitor.worker,
+            'pid': os.getpid(),
+            'top_allocations': memory.top_allocations(snapshot),
+        }
+        if compare_id is not None:
+            report['compared_to'] = compare_id
+            report['growth'] = memory.compare(memory.monitor.get_snapshot(compare_id), snapshot)
+        return report
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.17 on 2026-10-19 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookrating',
+            index=models.Index(fields=['created_at'], name='ratings_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookrating',
+            index=models.Index(fields=['book', 'created_at'], name='ratings_book_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookrating',
+            index=models.Index(fields=['user', 'created_at'], name='ratings_user_created_idx'),
+        ),
+    ]
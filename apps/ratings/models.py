@@ -45,6 +45,12 @@ class BookRating(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Book Rating'
         verbose_name_plural = 'Book Ratings'
+        indexes = [
+            # Newest-first listings: all ratings, per book and per user
+            models.Index(fields=['created_at'], name='ratings_created_idx'),
+            models.Index(fields=['book', 'created_at'], name='ratings_book_created_idx'),
+            models.Index(fields=['user', 'created_at'], name='ratings_user_created_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user.email} - {self.book.title} ({self.rating}/5)"
@@ -144,7 +144,7 @@ class BookRatingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         queryset = BookRating.objects.filter(
-            user=request.user
-        ).select_related('book').order_by('-created_at')
+            user_id=request.user.pk
+        ).select_related('user', 'book').order_by('-created_at')
         serializer = BookRatingSerializer(queryset, many=True)
         return Response(serializer.data)
@@ -0,0 +1,13 @@
+"""
+Gunicorn settings (``start.sh`` passes bind address, workers and timeout).
+"""
+import os
+
+
+def child_exit(server, worker):
+    """Fold an exited worker's metrics file into the aggregate (``apps.core.metrics``)."""
+    directory = os.getenv('METRICS_MULTIPROC_DIR')
+    if directory:
+        from apps.core.metrics import merge_exited_worker
+
+        merge_exited_worker(directory, worker.pid)
@@ -6,6 +6,8 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 
@@ -36,6 +38,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.RequestLoggingMiddleware',  # Outermost, to time the whole request
+    'apps.core.middleware.RequestProfilingMiddleware',
+    'apps.core.middleware.WorkerMemoryMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -101,10 +106,29 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache: shared Redis cache across workers when REDIS_URL is set. The
+# per-process memory cache is only for development and tests: availability,
+# roles, the token deny-list, rate limits, profiles and worker status all
+# live here, so production requires REDIS_URL (see production.py).
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Django REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'apps.accounts.authentication.FlexibleJWTAuthentication',
+        'apps.accounts.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -126,11 +150,31 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.MultiPartParser',
     ],
     'EXCEPTION_HANDLER': 'rest_framework.views.exception_handler',
+    # Sliding-window limits per user (or per IP when anonymous), counted in
+    # the shared cache; see apps.core.throttling for the scopes
+    'DEFAULT_THROTTLE_CLASSES': [
+        'apps.core.throttling.ApiRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'read': os.getenv('THROTTLE_READ_RATE', '600/min'),
+        'read_anon': os.getenv('THROTTLE_READ_ANON_RATE', '300/min'),
+        'search': os.getenv('THROTTLE_SEARCH_RATE', '120/min'),
+        'search_anon': os.getenv('THROTTLE_SEARCH_ANON_RATE', '30/min'),
+        'write': os.getenv('THROTTLE_WRITE_RATE', '120/min'),
+        'auth': os.getenv('THROTTLE_AUTH_RATE', '10/min'),
+        'checkout': os.getenv('THROTTLE_CHECKOUT_RATE', '30/hour'),
+    },
+    # Reverse proxies in front of the app; the client IP used for anonymous
+    # limits is the address that many hops back in X-Forwarded-For. 0 uses
+    # the connecting address and ignores the header, which clients control.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
 }
 
 # JWT Configuration
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
+    # Access tokens carry role claims and are checked without a database
+    # read, so keep them short-lived (see apps.accounts.tokens)
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', '15'))),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
@@ -139,11 +183,103 @@ SIMPLE_JWT = {
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
     'TOKEN_TYPE_CLAIM': 'token_type',
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.accounts.serializers.RoleTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.accounts.serializers.RoleTokenRefreshSerializer',
+}
+
+# Borrowing archival: closed loans returned longer ago than this are moved
+# to the archive table by `manage.py archive_borrowings`
+BORROWING_ARCHIVE_AFTER_DAYS = int(os.getenv('BORROWING_ARCHIVE_AFTER_DAYS', '365'))
+
+# Days a member has to collect a book once their hold is ready
+HOLD_PICKUP_DAYS = int(os.getenv('HOLD_PICKUP_DAYS', '3'))
+
+# Book popularity: trending decay and batched counter flushes. Stored scores
+# depend on the half-life: run `manage.py rescore_trending` after changing it
+TRENDING_HALF_LIFE_DAYS = float(os.getenv('TRENDING_HALF_LIFE_DAYS', '7'))
+TRENDING_REFRESH_SECONDS = int(os.getenv('TRENDING_REFRESH_SECONDS', '300'))
+TRENDING_LIST_SIZE = 20
+POPULARITY_FLUSH_SIZE = int(os.getenv('POPULARITY_FLUSH_SIZE', '100'))
+POPULARITY_FLUSH_INTERVAL = int(os.getenv('POPULARITY_FLUSH_INTERVAL', '30'))
+
+# Precomputed recommendations: neighbors kept per book
+RECOMMENDATION_NEIGHBORS = int(os.getenv('RECOMMENDATION_NEIGHBORS', '20'))
+
+# Availability map cache lifetime (entries are also updated on checkout/checkin)
+AVAILABILITY_CACHE_TIMEOUT = int(os.getenv('AVAILABILITY_CACHE_TIMEOUT', '600'))
+
+# Cached group names per user; invalidated when group membership changes.
+# Capped at a few seconds when the cache is per-process (apps.accounts.roles)
+ROLE_CACHE_TIMEOUT = int(os.getenv('ROLE_CACHE_TIMEOUT', '3600'))
+
+# Genre table snapshot kept in each process (seconds)
+GENRE_CACHE_SECONDS = int(os.getenv('GENRE_CACHE_SECONDS', '300'))
+
+# Token revocation: per-process Bloom filter over revoked token ids
+# (see apps.accounts.revocation)
+REVOCATION_BLOOM_CAPACITY = int(os.getenv('REVOCATION_BLOOM_CAPACITY', '100000'))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv('REVOCATION_BLOOM_ERROR_RATE', '0.001'))
+REVOCATION_SYNC_SECONDS = int(os.getenv('REVOCATION_SYNC_SECONDS', '10'))
+REVOCATION_REBUILD_SECONDS = int(os.getenv('REVOCATION_REBUILD_SECONDS', '3600'))
+
+# Bulk member provisioning: password hashing processes for the
+# provision_members command (0 = one per CPU), and the most rows accepted by
+# the admin endpoint, which hashes in the web worker (~0.3 s per row) and
+# must finish within gunicorn's timeout
+PROVISIONING_HASH_WORKERS = int(os.getenv('PROVISIONING_HASH_WORKERS', '0'))
+PROVISIONING_MAX_ROWS = int(os.getenv('PROVISIONING_MAX_ROWS', '100'))
+
+# Access log sampling (apps.core.middleware.RequestLoggingMiddleware): share
+# of requests logged, overridable per route name, e.g.
+# ACCESS_LOG_SAMPLE_RATES="book-list=0.1,book-availability=0.05"
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv('ACCESS_LOG_SAMPLE_RATE', '1.0'))
+ACCESS_LOG_SAMPLE_RATES = {
+    route.strip(): float(rate)
+    for route, _, rate in (
+        item.partition('=') for item in os.getenv('ACCESS_LOG_SAMPLE_RATES', '').split(',') if item.strip()
+    )
 }
 
+# Metrics (served at /metrics). Under gunicorn, point METRICS_MULTIPROC_DIR
+# at an empty directory so a scrape sums all workers; unset, each process
+# reports only its own values. METRICS_TOKEN, when set, is required as a
+# bearer token to scrape (production settings require it).
+METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR', '')
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Share of book list/search requests answered with a Server-Timing header
+# (administrators can always ask for one with an X-Server-Timing header)
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv('SERVER_TIMING_SAMPLE_RATE', '0'))
+
+# Slow-query log (apps.core.querylog): statements slower than SLOW_QUERY_MS,
+# or run QUERY_REPEAT_THRESHOLD+ times in one request, are logged and listed
+# at /api/diagnostics/queries/. PostgreSQL plans are re-captured at most every
+# QUERY_EXPLAIN_INTERVAL seconds per statement.
+SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', '200'))
+QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', '10'))
+QUERY_EXPLAIN_INTERVAL = int(os.getenv('QUERY_EXPLAIN_INTERVAL', '600'))
+
+# Request profiling (apps.core.profiling): administrators send X-Profile: 1;
+# PROFILE_SAMPLE_EVERY=N also profiles every Nth request per worker (0: off).
+# The last PROFILE_BUFFER_SIZE profiles are kept in the cache.
+PROFILE_SAMPLE_EVERY = int(os.getenv('PROFILE_SAMPLE_EVERY', '0'))
+PROFILE_BUFFER_SIZE = int(os.getenv('PROFILE_BUFFER_SIZE', '50'))
+PROFILE_RETENTION_SECONDS = int(os.getenv('PROFILE_RETENTION_SECONDS', '86400'))
+
+# Worker memory (apps.core.memory): RSS is checked every MEMORY_CHECK_EVERY
+# requests; over MEMORY_RECYCLE_RSS_MB (0: never) a gunicorn worker logs why
+# and exits after the current request. tracemalloc snapshots for
+# /api/diagnostics/memory/ keep the last MEMORY_SNAPSHOT_KEEP per worker.
+MEMORY_CHECK_EVERY = int(os.getenv('MEMORY_CHECK_EVERY', '100'))
+MEMORY_RECYCLE_RSS_MB = int(os.getenv('MEMORY_RECYCLE_RSS_MB', '0'))
+MEMORY_SNAPSHOT_KEEP = int(os.getenv('MEMORY_SNAPSHOT_KEEP', '5'))
+MEMORY_TRACE_FRAMES = int(os.getenv('MEMORY_TRACE_FRAMES', '10'))
+
 # CORS Configuration
 CORS_ALLOW_ALL_ORIGINS = False
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
+CORS_ALLOW_HEADERS = (*default_headers, 'x-server-timing', 'x-profile')
+CORS_EXPOSE_HEADERS = ['Server-Timing', 'X-Profile-Id']
 
 # Security Settings (strengthened in production)
 SECURE_BROWSER_XSS_FILTER = True
@@ -44,6 +44,9 @@ LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
+        'json': {
+            '()': 'apps.core.logging.JsonFormatter',
+        },
         'verbose': {
             'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
             'style': '{',
@@ -54,12 +57,34 @@ LOGGING = {
         },
     },
     'handlers': {
+        # Access log: JSON lines written from a background thread
+        'access': {
+            'class': 'apps.core.logging.QueueStreamHandler',
+            'formatter': 'json',
+        },
         'console': {
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
     },
     'loggers': {
+        'apps.access': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        # Slow queries, N+1 suspects and their plans (apps.core.querylog)
+        'apps.queries': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        # Worker memory checks and recycling (apps.core.memory)
+        'apps.memory': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'django': {
             'handlers': ['console'],
             'level': 'INFO',
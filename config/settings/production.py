@@ -4,6 +4,7 @@ Configured for Render deployment.
 """
 import os
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 from .base import *
 
 DEBUG = False
@@ -20,6 +21,19 @@ DATABASES = {
     )
 }
 
+# Shared cache - every gunicorn worker must see the same availability map,
+# role cache, token deny-list, rate-limit counters and diagnostics
+if not REDIS_URL:
+    raise ImproperlyConfigured('REDIS_URL must be set in production (shared cache for all workers).')
+
+# /metrics is served on the public port, so scrapers must authenticate
+if not METRICS_TOKEN:
+    raise ImproperlyConfigured('METRICS_TOKEN must be set in production (bearer token for /metrics).')
+
+# Railway's edge proxy sits in front of gunicorn; anonymous rate limits key
+# on the address it appends to X-Forwarded-For
+REST_FRAMEWORK['NUM_PROXIES'] = int(os.getenv('NUM_PROXIES', '1'))
+
 # Security settings for production
 SECURE_SSL_REDIRECT = True
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
@@ -46,12 +60,20 @@ LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
+        'json': {
+            '()': 'apps.core.logging.JsonFormatter',
+        },
         'verbose': {
             'format': '{levelname} {asctime} {module} {message}',
             'style': '{',
         },
     },
     'handlers': {
+        # Access log: JSON lines written from a background thread
+        'access': {
+            'class': 'apps.core.logging.QueueStreamHandler',
+            'formatter': 'json',
+        },
         'console': {
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
@@ -62,6 +84,23 @@ LOGGING = {
         'level': 'WARNING',
     },
     'loggers': {
+        'apps.access': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        # Slow queries, N+1 suspects and their plans (apps.core.querylog)
+        'apps.queries': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        # Worker memory checks and recycling (apps.core.memory)
+        'apps.memory': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'django': {
             'handlers': ['console'],
             'level': 'WARNING',
@@ -10,6 +10,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from apps.core.views import metrics_view
+
 # Swagger/OpenAPI schema view
 schema_view = get_schema_view(
     openapi.Info(
@@ -48,10 +50,14 @@ urlpatterns = [
     path('api/', include('apps.books.urls')),
     path('api/', include('apps.borrowings.urls')),
     path('api/', include('apps.ratings.urls')),
+    path('api/', include('apps.core.urls')),
 
     # API Documentation
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='swagger'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='redoc'),
     path('swagger.json', schema_view.without_ui(cache_timeout=0), name='schema-json'),
     path('swagger.yaml', schema_view.without_ui(cache_timeout=0), name='schema-yaml'),
+
+    # Prometheus metrics
+    path('metrics', metrics_view, name='metrics'),
 ]
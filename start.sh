@@ -41,6 +41,12 @@ else:
     print('ℹ️ Admin user already exists')
 "
 
+# Per-worker metric files, summed by /metrics and folded into one aggregate
+# file as workers exit; stale files from a previous run would be counted too
+export METRICS_MULTIPROC_DIR=${METRICS_MULTIPROC_DIR:-/tmp/metrics}
+rm -rf "$METRICS_MULTIPROC_DIR"
+mkdir -p "$METRICS_MULTIPROC_DIR"
+
 # Start Gunicorn server
 echo "🌐 Starting Gunicorn on port $PORT..."
-gunicorn config.wsgi:application --bind 0.0.0.0:$PORT --workers 2 --timeout 120
+gunicorn config.wsgi:application -c config/gunicorn.conf.py --bind 0.0.0.0:$PORT --workers 2 --timeout 120
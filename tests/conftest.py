@@ -3,9 +3,27 @@ Pytest configuration and fixtures.
 """
 import pytest
 from rest_framework.test import APIClient
+from django.core.cache import cache
 from django.contrib.auth.models import Group
 from apps.accounts.models import User
+from apps.accounts.revocation import revocation_store
+from apps.books.genres import genre_cache
 from apps.books.models import Book
+from apps.core.metrics import REGISTRY
+
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    """Drop ids cached by a previous (rolled back) test, which may be reused."""
+    genre_cache.invalidate()
+    revocation_store.reset()
+    REGISTRY.reset()
+    cache.clear()
+    yield
+    genre_cache.invalidate()
+    revocation_store.reset()
+    REGISTRY.reset()
+    cache.clear()
 
 
 @pytest.fixture
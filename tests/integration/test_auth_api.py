@@ -1,8 +1,23 @@
 """
 Integration tests for authentication API.
 """
+from datetime import timedelta
+
 import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import aware_utcnow
+from apps.accounts import provisioning
+from apps.accounts.checks import shared_cache_check
+from apps.accounts.models import RevokedToken, User
+from apps.accounts.revocation import revocation_store
+from apps.accounts.tokens import RoleRefreshToken
 
 
 @pytest.mark.django_db
@@ -120,3 +135,307 @@ class TestAuthorizationAPI:
         url = reverse('user-list')
         response = api_client.get(url)
         assert response.status_code == 401
+
+
+@pytest.mark.django_db
+class TestUserDirectoryAPI:
+    """Tests for the paginated, searchable admin user list."""
+
+    @pytest.fixture
+    def directory(self, admin_user, member_group):
+        for i in range(5):
+            user = User.objects.create_user(
+                email=f'Reader{i}@school.org', username=f'reader{i}', password='ReaderPass123!',
+            )
+            user.groups.add(member_group)
+        User.objects.create_user(email='zoe@other.org', username='zed', password='ZoePass123!')
+
+    def emails(self, response):
+        return sorted(user['email'] for user in response.data['results'])
+
+    def test_cursor_pagination(self, authenticated_admin_client, directory):
+        """Test the list is paged with cursor links."""
+        response = authenticated_admin_client.get(reverse('user-list'), {'page_size': 4})
+        assert response.status_code == 200
+        assert len(response.data['results']) == 4
+        assert 'count' not in response.data
+        second = authenticated_admin_client.get(response.data['next'])
+        assert len(second.data['results']) == 3
+
+    def test_search_is_a_case_insensitive_prefix(self, authenticated_admin_client, directory):
+        """Test search matches the start of the email or username."""
+        response = authenticated_admin_client.get(reverse('user-list'), {'search': 'READER1'})
+        assert self.emails(response) == ['Reader1@school.org']
+        response = authenticated_admin_client.get(reverse('user-list'), {'search': 'ze'})
+        assert self.emails(response) == ['zoe@other.org']
+        response = authenticated_admin_client.get(reverse('user-list'), {'search': 'school'})
+        assert self.emails(response) == []
+
+    def test_role_filter(self, authenticated_admin_client, directory):
+        """Test filtering by group name."""
+        response = authenticated_admin_client.get(reverse('user-list'), {'role': 'Administrators'})
+        assert self.emails(response) == ['admin@bookcatalog.com']
+        assert response.data['results'][0]['is_administrator'] is True
+
+    def test_search_uses_lowered_columns(self, authenticated_admin_client, directory):
+        """Test search compares lower-cased columns with LIKE, matching the prefix indexes."""
+        with CaptureQueriesContext(connection) as captured:
+            authenticated_admin_client.get(reverse('user-list'), {'search': 'reader'})
+        sql = next(q['sql'] for q in captured.captured_queries if 'LIKE' in q['sql'])
+        assert 'LOWER("users"."email")' in sql
+        assert 'LOWER("users"."username")' in sql
+
+
+def bearer_client(token):
+    """Return an API client sending ``token`` as a bearer token."""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def login(api_client, email, password):
+    response = api_client.post(reverse('login'), {'email': email, 'password': password})
+    assert response.status_code == 200
+    return response.data
+
+
+def user_table_queries(queries):
+    """Queries that read the users or group tables."""
+    return [
+        q['sql'] for q in queries
+        if 'FROM "users"' in q['sql'] or 'auth_group' in q['sql'] or 'users_groups' in q['sql']
+    ]
+
+
+@pytest.mark.django_db
+class TestStatelessTokenAPI:
+    """Tests for access tokens carrying role claims."""
+
+    def test_login_sets_claims(self, api_client, admin_user):
+        """Test the access token carries email and roles."""
+        tokens = login(api_client, 'admin@bookcatalog.com', 'AdminPass123!')
+        access = AccessToken(tokens['access'])
+        assert access['email'] == 'admin@bookcatalog.com'
+        assert 'Administrators' in access['roles']
+
+    def test_reads_skip_user_tables(self, api_client, member_user, sample_book):
+        """Test read endpoints do not query users or groups."""
+        client = bearer_client(login(api_client, 'member@bookcatalog.com', 'MemberPass123!')['access'])
+        with CaptureQueriesContext(connection) as captured:
+            assert client.get(reverse('borrowing-current')).status_code == 200
+            assert client.get(reverse('borrowing-history')).status_code == 200
+            assert client.get(reverse('rating-my-ratings')).status_code == 200
+            assert client.get(reverse('hold-list')).status_code == 200
+        assert user_table_queries(captured.captured_queries) == []
+
+    def test_admin_checks_use_claims(self, api_client, admin_user):
+        """Test administrator permissions are decided from the token."""
+        client = bearer_client(login(api_client, 'admin@bookcatalog.com', 'AdminPass123!')['access'])
+        with CaptureQueriesContext(connection) as captured:
+            assert client.get(reverse('borrowing-overdue')).status_code == 200
+        assert user_table_queries(captured.captured_queries) == []
+
+    def test_member_is_forbidden_by_claims(self, api_client, member_user):
+        """Test a member token is refused admin endpoints."""
+        client = bearer_client(login(api_client, 'member@bookcatalog.com', 'MemberPass123!')['access'])
+        assert client.get(reverse('borrowing-overdue')).status_code == 403
+
+    def test_writes_load_user(self, api_client, member_user, sample_book):
+        """Test endpoints that need the full user still work."""
+        client = bearer_client(login(api_client, 'member@bookcatalog.com', 'MemberPass123!')['access'])
+        response = client.post(reverse('borrowing-checkout'), {'book_id': sample_book.id})
+        assert response.status_code == 201
+        assert client.get(reverse('profile')).data['username'] == 'member'
+
+    def test_refresh_rereads_roles(self, api_client, member_user, admin_group):
+        """Test refreshing picks up group changes."""
+        tokens = login(api_client, 'member@bookcatalog.com', 'MemberPass123!')
+        member_user.groups.add(admin_group)
+        response = api_client.post(reverse('token_refresh'), {'refresh': tokens['refresh']})
+        assert response.status_code == 200
+        assert 'Administrators' in AccessToken(response.data['access'])['roles']
+
+    def test_refresh_rejects_inactive_user(self, api_client, member_user):
+        """Test a disabled account cannot refresh."""
+        tokens = login(api_client, 'member@bookcatalog.com', 'MemberPass123!')
+        member_user.is_active = False
+        member_user.save()
+        response = api_client.post(reverse('token_refresh'), {'refresh': tokens['refresh']})
+        assert response.status_code == 401
+
+    def test_group_change_denies_older_tokens(self, admin_user, member_group,
+                                              django_capture_on_commit_callbacks):
+        """Test tokens issued before a group change are rejected."""
+        access = RoleRefreshToken.for_user(admin_user).access_token
+        access.set_iat(at_time=aware_utcnow() - timedelta(minutes=1))
+        client = bearer_client(str(access))
+        assert client.get(reverse('borrowing-overdue')).status_code == 200
+
+        with django_capture_on_commit_callbacks(execute=True):
+            admin_user.groups.remove(admin_user.groups.get(name='Administrators'))
+        assert client.get(reverse('borrowing-overdue')).status_code == 401
+
+        fresh = bearer_client(str(RoleRefreshToken.for_user(admin_user).access_token))
+        assert fresh.get(reverse('borrowing-overdue')).status_code == 403
+
+    def test_deactivation_denies_older_tokens(self, member_user, django_capture_on_commit_callbacks):
+        """Test disabling an account rejects its outstanding tokens."""
+        access = RoleRefreshToken.for_user(member_user).access_token
+        access.set_iat(at_time=aware_utcnow() - timedelta(minutes=1))
+        with django_capture_on_commit_callbacks(execute=True):
+            member_user.is_active = False
+            member_user.save()
+        assert bearer_client(str(access)).get(reverse('borrowing-current')).status_code == 401
+
+    def test_deny_list_requires_shared_cache(self, settings):
+        """Test deployments refuse a per-process cache for the deny-list."""
+        settings.DEBUG = False
+        assert [e.id for e in shared_cache_check(None)] == ['accounts.E001']
+        settings.DEBUG = True
+        assert shared_cache_check(None) == []
+
+    def test_owner_checks_use_claims(self, api_client, member_user, sample_book):
+        """Test object ownership is recognised for a token user."""
+        client = bearer_client(login(api_client, 'member@bookcatalog.com', 'MemberPass123!')['access'])
+        rating = client.post(reverse('rating-list'), {'book_id': sample_book.id, 'rating': 4})
+        assert rating.status_code == 201
+        response = client.put(reverse('rating-detail', args=[rating.data['id']]), {'rating': 2})
+        assert response.status_code == 200
+
+    def test_token_without_role_claims(self, admin_user):
+        """Test tokens issued before role claims fall back to a lookup."""
+        access = AccessToken.for_user(admin_user)
+        client = bearer_client(str(access))
+        assert client.get(reverse('borrowing-overdue')).status_code == 200
+
+
+@pytest.mark.django_db
+class TestTokenRevocationAPI:
+    """Tests for logout and token revocation."""
+
+    def test_logout_revokes_both_tokens(self, api_client, member_user):
+        """Test logging out rejects the access token and the refresh token."""
+        tokens = login(api_client, 'member@bookcatalog.com', 'MemberPass123!')
+        client = bearer_client(tokens['access'])
+        response = client.post(reverse('logout'), {'refresh': tokens['refresh']})
+        assert response.status_code == 200
+
+        assert client.get(reverse('borrowing-current')).status_code == 401
+        response = api_client.post(reverse('token_refresh'), {'refresh': tokens['refresh']})
+        assert response.status_code == 401
+
+    def test_logout_rejects_other_users_token(self, api_client, member_user, admin_user):
+        """Test a user cannot revoke someone else's refresh token."""
+        member = login(api_client, 'member@bookcatalog.com', 'MemberPass123!')
+        admin = login(api_client, 'admin@bookcatalog.com', 'AdminPass123!')
+        response = bearer_client(member['access']).post(reverse('logout'), {'refresh': admin['refresh']})
+        assert response.status_code == 400
+
+        response = api_client.post(reverse('token_refresh'), {'refresh': admin['refresh']})
+        assert response.status_code == 200
+
+    def test_logout_rejects_invalid_token(self, api_client, member_user):
+        """Test logout validates the refresh token."""
+        tokens = login(api_client, 'member@bookcatalog.com', 'MemberPass123!')
+        response = bearer_client(tokens['access']).post(reverse('logout'), {'refresh': 'not-a-token'})
+        assert response.status_code == 400
+
+    def test_rotated_refresh_token_cannot_be_reused(self, api_client, member_user):
+        """Test a refresh token is single-use once rotated."""
+        tokens = login(api_client, 'member@bookcatalog.com', 'MemberPass123!')
+        first = api_client.post(reverse('token_refresh'), {'refresh': tokens['refresh']})
+        assert first.status_code == 200
+
+        reused = api_client.post(reverse('token_refresh'), {'refresh': tokens['refresh']})
+        assert reused.status_code == 401
+        rotated = api_client.post(reverse('token_refresh'), {'refresh': first.data['refresh']})
+        assert rotated.status_code == 200
+
+    def test_refresh_sees_revocation_from_other_worker(self, api_client, member_user):
+        """Test a refresh token revoked elsewhere is refused before this worker's filter syncs."""
+        tokens = login(api_client, 'member@bookcatalog.com', 'MemberPass123!')
+        revocation_store.is_revoked('warm-up')
+        refresh = RoleRefreshToken(tokens['refresh'])
+        RevokedToken.objects.create(
+            jti=refresh['jti'], token_type='refresh', user=member_user,
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+        response = api_client.post(reverse('token_refresh'), {'refresh': tokens['refresh']})
+        assert response.status_code == 401
+
+    def test_logout_everywhere(self, authenticated_admin_client, member_user,
+                               django_capture_on_commit_callbacks):
+        """Test an administrator can revoke every token of a user."""
+        refresh = RoleRefreshToken.for_user(member_user)
+        refresh.set_iat(at_time=aware_utcnow() - timedelta(minutes=1))
+        access = refresh.access_token
+        access.set_iat(at_time=aware_utcnow() - timedelta(minutes=1))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_admin_client.post(
+                reverse('user-logout-everywhere', args=[member_user.pk])
+            )
+        assert response.status_code == 200
+
+        assert bearer_client(str(access)).get(reverse('borrowing-current')).status_code == 401
+        response = APIClient().post(reverse('token_refresh'), {'refresh': str(refresh)})
+        assert response.status_code == 401
+
+    def test_member_cannot_logout_everywhere(self, authenticated_member_client, admin_user):
+        """Test logging out other users is admin only."""
+        response = authenticated_member_client.post(
+            reverse('user-logout-everywhere', args=[admin_user.pk])
+        )
+        assert response.status_code == 403
+
+
+@pytest.mark.django_db
+class TestBulkProvisionAPI:
+    """Tests for the bulk member provisioning endpoint."""
+
+    def test_provision_from_list(self, authenticated_admin_client, member_group):
+        """Test an administrator can create members from a JSON list."""
+        response = authenticated_admin_client.post(reverse('user-provision'), {'users': [
+            {'email': 'a@school.org', 'username': 'a', 'password': 'TermStart2026!'},
+            {'email': 'a@school.org', 'username': 'b'},
+        ]}, format='json')
+        assert response.status_code == 201
+        assert response.data['created'] == 1
+        assert response.data['errors'] == [
+            {'line': 2, 'email': 'a@school.org', 'error': 'Duplicate of an earlier row.'},
+        ]
+
+    def test_provision_from_file(self, authenticated_admin_client, member_group):
+        """Test a CSV upload is accepted."""
+        upload = SimpleUploadedFile(
+            'term.csv', b'email,username\na@school.org,a\nb@school.org,b\n', content_type='text/csv'
+        )
+        response = authenticated_admin_client.post(reverse('user-provision'), {'file': upload})
+        assert response.status_code == 201
+        assert response.data['created'] == 2
+
+    @override_settings(PROVISIONING_MAX_ROWS=1)
+    def test_row_limit(self, authenticated_admin_client):
+        """Test requests over the row limit are refused."""
+        response = authenticated_admin_client.post(reverse('user-provision'), {'users': [
+            {'email': 'a@school.org', 'username': 'a'}, {'email': 'b@school.org', 'username': 'b'},
+        ]}, format='json')
+        assert response.status_code == 400
+
+    @override_settings(PROVISIONING_HASH_WORKERS=4)
+    def test_hashes_in_process(self, authenticated_admin_client, member_group, monkeypatch):
+        """Test the endpoint never forks a hashing pool from the web worker."""
+        def no_pool(*args, **kwargs):
+            raise AssertionError('process pool used')
+
+        monkeypatch.setattr(provisioning, 'ProcessPoolExecutor', no_pool)
+        response = authenticated_admin_client.post(reverse('user-provision'), {'users': [
+            {'email': f'{name}@school.org', 'username': name, 'password': 'TermStart2026!'}
+            for name in 'abc'
+        ]}, format='json')
+        assert response.data['created'] == 3
+
+    def test_member_cannot_provision(self, authenticated_member_client):
+        """Test bulk provisioning is admin only."""
+        response = authenticated_member_client.post(reverse('user-provision'), {'users': []}, format='json')
+        assert response.status_code == 403
@@ -0,0 +1,80 @@
+"""
+Integration tests for the shared availability map.
+"""
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start each test with an empty availability map."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+class TestAvailabilityAPI:
+    """Tests for /api/books/availability/."""
+
+    def _get(self, client, *ids):
+        url = reverse('book-availability')
+        return client.get(url, {'ids': ','.join(str(i) for i in ids)})
+
+    def test_reports_availability_and_misses(self, api_client, sample_book, unavailable_book):
+        """Test available, unavailable and unknown ids."""
+        response = self._get(api_client, sample_book.id, unavailable_book.id, 99999)
+        assert response.status_code == 200
+        results = response.data['results']
+        assert results[str(sample_book.id)] == {'available': True, 'due_date': None}
+        assert results[str(unavailable_book.id)]['available'] is False
+        assert results['99999'] is None
+
+    def test_warm_lookup_skips_database(self, api_client, sample_book, django_assert_num_queries):
+        """Test cached ids are answered without any query."""
+        self._get(api_client, sample_book.id)
+        with django_assert_num_queries(0):
+            response = self._get(api_client, sample_book.id)
+        assert response.data['results'][str(sample_book.id)]['available'] is True
+
+    def test_checkout_and_checkin_update_map(self, api_client, authenticated_member_client,
+                                             authenticated_admin_client, sample_book,
+                                             django_capture_on_commit_callbacks):
+        """Test loans update the cached entry with the due date."""
+        self._get(api_client, sample_book.id)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            checkout = authenticated_member_client.post(
+                reverse('borrowing-checkout'), {'book_id': sample_book.id}
+            )
+        entry = self._get(api_client, sample_book.id).data['results'][str(sample_book.id)]
+        assert entry['available'] is False
+        assert entry['due_date'][:16] == checkout.data['due_date'][:16]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            authenticated_admin_client.post(reverse('borrowing-checkin', args=[checkout.data['id']]))
+        entry = self._get(api_client, sample_book.id).data['results'][str(sample_book.id)]
+        assert entry == {'available': True, 'due_date': None}
+
+    def test_rejects_bad_ids(self, api_client):
+        """Test malformed and missing ids are rejected."""
+        url = reverse('book-availability')
+        assert api_client.get(url, {'ids': '1,abc'}).status_code == 400
+        assert api_client.get(url).status_code == 400
+
+    def test_miss_fill_does_not_overwrite_newer_entry(self, sample_book, monkeypatch):
+        """Test a checkout written between the miss read and the fill is kept."""
+        from apps.books import availability
+
+        load = availability._load
+        due = 2_000_000_000
+
+        def load_then_checkout(book_ids):
+            values = load(book_ids)
+            cache.set(availability._key(sample_book.id), due)
+            return values
+
+        monkeypatch.setattr(availability, '_load', load_then_checkout)
+        availability.get_availability([sample_book.id])
+        assert cache.get(availability._key(sample_book.id)) == due
@@ -3,6 +3,7 @@ Integration tests for books API.
 """
 import pytest
 from django.urls import reverse
+from apps.books.genres import genre_cache
 
 
 @pytest.mark.django_db
@@ -128,3 +129,67 @@ class TestBookDeleteAPI:
         url = reverse('book-detail', args=[sample_book.id])
         response = authenticated_member_client.delete(url)
         assert response.status_code == 403
+
+
+@pytest.mark.django_db
+class TestBookLookupAPI:
+    """Tests for batch lookup by ids and ISBNs."""
+
+    def test_lookup_preserves_input_order_and_reports_misses(self, api_client, sample_book, another_book):
+        """Test results follow input order with explicit misses."""
+        url = reverse('book-lookup')
+        data = {
+            'ids': [another_book.id, 99999, sample_book.id],
+            'isbns': ['978-0-13-595705-9', '0000000000000', 'not-an-isbn'],
+        }
+        response = api_client.post(url, data, format='json')
+        assert response.status_code == 200
+        results = response.data['results']
+        assert [r['book']['id'] if r['book'] else None for r in results] == [
+            another_book.id, None, sample_book.id, another_book.id, None, None
+        ]
+        assert 'error' in results[5]
+        assert response.data['found'] == 3
+        assert response.data['missing'] == 3
+
+    def test_lookup_matches_isbn10_against_isbn13(self, api_client, sample_book):
+        """Test an ISBN-10 finds a book stored under its ISBN-13."""
+        url = reverse('book-lookup')
+        response = api_client.post(url, {'isbns': ['0134494164']}, format='json')
+        assert response.data['results'][0]['book']['id'] == sample_book.id
+
+    def test_lookup_uses_one_query(self, api_client, sample_book, another_book, django_assert_num_queries):
+        """Test the whole batch resolves with a single query."""
+        url = reverse('book-lookup')
+        genre_cache.get(sample_book.genre_ref_id)  # per-process snapshot, loaded once
+        with django_assert_num_queries(1):
+            api_client.post(url, {'ids': [sample_book.id], 'isbns': [another_book.isbn]}, format='json')
+
+    def test_lookup_rejects_oversized_batch(self, api_client):
+        """Test batches over the limit are rejected."""
+        url = reverse('book-lookup')
+        response = api_client.post(url, {'ids': list(range(1, 502))}, format='json')
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestBookRangeFilterAPI:
+    """Tests for range filters on the book listing."""
+
+    def test_year_and_page_filters(self, api_client, sample_book, another_book):
+        """Test range filters combine on the list endpoint."""
+        sample_book.published_date = '2008-08-01'
+        sample_book.page_count = 464
+        sample_book.save()
+        another_book.published_date = '2017-09-10'
+        another_book.page_count = 432
+        another_book.save()
+        url = reverse('book-list')
+        response = api_client.get(url, {'year_min': 2010, 'pages_max': 450})
+        assert response.status_code == 200
+        assert [b['id'] for b in response.data['results']] == [another_book.id]
+
+    def test_invalid_date_rejected(self, api_client):
+        """Test malformed dates are reported as bad requests."""
+        response = api_client.get(reverse('book-list'), {'published_after': 'yesterday'})
+        assert response.status_code == 400
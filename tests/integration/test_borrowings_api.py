@@ -1,9 +1,12 @@
 """
 Integration tests for borrowings API.
 """
+import json
 import pytest
 from django.urls import reverse
+from django.utils import timezone
 from apps.books.models import Book
+from apps.borrowings.models import Borrowing
 
 
 @pytest.mark.django_db
@@ -157,3 +160,52 @@ class TestBorrowingListAPI:
         api_client.force_authenticate(user=admin_user)
         admin_response = api_client.get(url)
         assert admin_response.status_code == 200
+
+
+@pytest.mark.django_db
+class TestBorrowingPagination:
+    """Tests for cursor pagination and streaming export of borrowings."""
+
+    def _create_history(self, user, count):
+        for i in range(count):
+            book = Book.objects.create(
+                title=f'Book {i}', author='Author', isbn=f'{9780000000000 + i}'
+            )
+            Borrowing.objects.create(user=user, book=book, returned_at=timezone.now())
+
+    def test_history_is_cursor_paginated(self, authenticated_member_client, member_user):
+        """Test history pages through every record exactly once."""
+        self._create_history(member_user, 5)
+        url = reverse('borrowing-history')
+
+        response = authenticated_member_client.get(url, {'page_size': 2})
+        assert response.status_code == 200
+        assert len(response.data['results']) == 2
+        assert response.data['next'] is not None
+
+        seen = [item['id'] for item in response.data['results']]
+        next_url = response.data['next']
+        while next_url:
+            response = authenticated_member_client.get(next_url)
+            seen.extend(item['id'] for item in response.data['results'])
+            next_url = response.data['next']
+        assert len(seen) == len(set(seen)) == 5
+        assert seen == sorted(seen, reverse=True)
+
+    def test_all_records_ndjson_export(self, authenticated_admin_client, member_user):
+        """Test admin can stream all borrowings as NDJSON."""
+        self._create_history(member_user, 3)
+        url = reverse('borrowing-all-records')
+        response = authenticated_admin_client.get(url, {'export': 'ndjson'})
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        assert len(records) == 3
+        assert all(record['user_email'] == member_user.email for record in records)
+
+    def test_all_records_export_admin_only(self, authenticated_member_client):
+        """Test members cannot export borrowings."""
+        url = reverse('borrowing-all-records')
+        response = authenticated_member_client.get(url, {'export': 'ndjson'})
+        assert response.status_code == 403
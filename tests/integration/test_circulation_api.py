@@ -0,0 +1,74 @@
+"""
+Integration tests for circulation analytics.
+"""
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from apps.borrowings.models import DailyBookCirculation, DailyGenreCirculation
+
+
+@pytest.mark.django_db
+class TestCirculationRollups:
+    """Tests for incremental rollups and the admin report endpoints."""
+
+    def _checkout_and_return(self, member_client, admin_client, book):
+        response = member_client.post(reverse('borrowing-checkout'), {'book_id': book.id})
+        admin_client.post(reverse('borrowing-checkin', args=[response.data['id']]))
+
+    def test_checkout_and_checkin_update_rollups(self, authenticated_member_client,
+                                                 authenticated_admin_client, sample_book):
+        """Test counters are bumped in the checkout/checkin transactions."""
+        self._checkout_and_return(authenticated_member_client, authenticated_admin_client, sample_book)
+        self._checkout_and_return(authenticated_member_client, authenticated_admin_client, sample_book)
+
+        today = timezone.localdate()
+        book_row = DailyBookCirculation.objects.get(day=today, book=sample_book)
+        genre_row = DailyGenreCirculation.objects.get(day=today, genre='Technology')
+        assert (book_row.checkouts, book_row.returns) == (2, 2)
+        assert (genre_row.checkouts, genre_row.returns) == (2, 2)
+
+    def test_rebuild_matches_incremental(self, authenticated_member_client,
+                                         authenticated_admin_client, sample_book, another_book):
+        """Test the catch-up command reproduces the incremental counters."""
+        self._checkout_and_return(authenticated_member_client, authenticated_admin_client, sample_book)
+        self._checkout_and_return(authenticated_member_client, authenticated_admin_client, another_book)
+        before = sorted(DailyBookCirculation.objects.values_list('book_id', 'checkouts', 'returns'))
+
+        DailyBookCirculation.objects.all().delete()
+        DailyGenreCirculation.objects.all().delete()
+        call_command('rebuild_circulation')
+
+        after = sorted(DailyBookCirculation.objects.values_list('book_id', 'checkouts', 'returns'))
+        assert after == before
+        assert DailyGenreCirculation.objects.get(genre='Technology').checkouts == 2
+
+    def test_report_endpoints(self, authenticated_member_client, authenticated_admin_client,
+                              sample_book, another_book):
+        """Test daily, top-N and genre reports read the rollups."""
+        self._checkout_and_return(authenticated_member_client, authenticated_admin_client, sample_book)
+        self._checkout_and_return(authenticated_member_client, authenticated_admin_client, sample_book)
+        self._checkout_and_return(authenticated_member_client, authenticated_admin_client, another_book)
+
+        daily = authenticated_admin_client.get(reverse('circulation-daily'))
+        assert daily.status_code == 200
+        assert daily.data['results'][0]['checkouts'] == 3
+
+        top = authenticated_admin_client.get(reverse('circulation-top-books'), {'limit': 1})
+        assert top.status_code == 200
+        assert [row['book_id'] for row in top.data['results']] == [sample_book.id]
+
+        genres = authenticated_admin_client.get(reverse('circulation-genres'))
+        assert genres.data['results'][0]['genre'] == 'Technology'
+
+    def test_reports_admin_only(self, authenticated_member_client):
+        """Test members cannot read circulation reports."""
+        response = authenticated_member_client.get(reverse('circulation-daily'))
+        assert response.status_code == 403
+
+    def test_invalid_range_rejected(self, authenticated_admin_client):
+        """Test start after end is rejected."""
+        response = authenticated_admin_client.get(
+            reverse('circulation-daily'), {'start': '2025-02-01', 'end': '2025-01-01'}
+        )
+        assert response.status_code == 400
@@ -0,0 +1,150 @@
+"""
+Integration tests for the genre dimension.
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from apps.books.genres import genre_cache
+from apps.books.models import Book, Genre
+
+
+@pytest.fixture
+def fantasy_books(db):
+    """Create books sharing a genre under different spellings."""
+    first = Book.objects.create(
+        title='The Hobbit', author='J.R.R. Tolkien', isbn='9780547928227',
+        genre='Fantasy',
+    )
+    second = Book.objects.create(
+        title='A Wizard of Earthsea', author='Ursula K. Le Guin', isbn='9780547773742',
+        genre=' fantasy ',
+    )
+    other = Book.objects.create(
+        title='Dune', author='Frank Herbert', isbn='9780441013593',
+        genre='Science Fiction',
+    )
+    return first, second, other
+
+
+@pytest.mark.django_db
+class TestGenreNormalization:
+    """Tests for resolving free-text genres to genre rows."""
+
+    def test_books_share_genre_row(self, fantasy_books):
+        """Test differently spelled genre names resolve to one genre."""
+        first, second, other = fantasy_books
+        assert first.genre_ref_id == second.genre_ref_id
+        assert other.genre_ref_id != first.genre_ref_id
+        assert Genre.objects.get(pk=first.genre_ref_id).slug == 'fantasy'
+        assert second.genre == 'fantasy'
+
+    def test_blank_genre_has_no_row(self, db):
+        """Test books without a genre have no genre reference."""
+        book = Book.objects.create(title='Untitled', author='Anon', isbn='9780000000002')
+        assert book.genre_ref_id is None
+
+    def test_changing_genre_updates_reference(self, fantasy_books):
+        """Test saving a new genre string moves the book to that genre."""
+        first, _, other = fantasy_books
+        first.genre = 'Science Fiction'
+        first.save(update_fields=['genre'])
+        first.refresh_from_db()
+        assert first.genre_ref_id == other.genre_ref_id
+
+    def test_non_ascii_genres_stay_apart(self, db):
+        """Test genre names without ASCII letters get their own rows and slugs."""
+        scifi = Book.objects.create(title='三体', author='刘慈欣', isbn='9787536692930', genre='科幻')
+        fantastika = Book.objects.create(
+            title='Пикник на обочине', author='Стругацкие', isbn='9785170906307', genre='Фантастика',
+        )
+        assert scifi.genre_ref_id != fantastika.genre_ref_id
+        assert Genre.objects.get(pk=scifi.genre_ref_id).slug == '科幻'
+        assert Genre.objects.get(pk=fantastika.genre_ref_id).slug == 'фантастика'
+        assert genre_cache.find('фантастика') == fantastika.genre_ref_id
+
+    def test_clashing_slug_gets_suffix(self, fantasy_books):
+        """Test a new genre whose slug is taken gets a suffixed slug, not the other genre."""
+        book = Book.objects.create(
+            title='Dune Messiah', author='Frank Herbert', isbn='9780593098233',
+            genre='Science-Fiction!',
+        )
+        assert book.genre_ref_id != fantasy_books[2].genre_ref_id
+        assert Genre.objects.get(pk=book.genre_ref_id).slug == 'science-fiction-2'
+
+    def test_cache_tracks_renames(self, fantasy_books):
+        """Test renaming a genre is visible through the cache."""
+        genre = Genre.objects.get(slug='fantasy')
+        genre.slug = 'high-fantasy'
+        genre.save()
+        assert genre_cache.get(genre.pk)[1] == 'high-fantasy'
+        assert genre_cache.find('high-fantasy') == genre.pk
+
+    def test_save_resolves_genre_only_when_changed(self, fantasy_books):
+        """Test saving a loaded book without a genre change skips the genre table."""
+        book = Book.objects.get(pk=fantasy_books[0].pk)
+        book.is_available = False
+        with CaptureQueriesContext(connection) as captured:
+            book.save()
+        assert not [q for q in captured.captured_queries if '"genres"' in q['sql']]
+
+        book.genre = 'Science Fiction'
+        book.save()
+        assert book.genre_ref_id == fantasy_books[2].genre_ref_id
+
+
+@pytest.mark.django_db
+class TestGenreFilterAPI:
+    """Tests for filtering books by genre."""
+
+    def test_filter_by_genre_id(self, api_client, fantasy_books):
+        """Test filtering by genre id is an exact match."""
+        first, _, _ = fantasy_books
+        response = api_client.get(reverse('book-list'), {'genre_id': first.genre_ref_id})
+        assert response.status_code == 200
+        assert {b['title'] for b in response.data['results']} == {
+            'The Hobbit', 'A Wizard of Earthsea',
+        }
+
+    def test_filter_by_genre_slug(self, api_client, fantasy_books):
+        """Test filtering by genre slug."""
+        response = api_client.get(reverse('book-list'), {'genre_slug': 'science-fiction'})
+        assert response.status_code == 200
+        assert [b['title'] for b in response.data['results']] == ['Dune']
+
+    def test_filter_by_unknown_slug(self, api_client, fantasy_books):
+        """Test an unknown slug matches nothing."""
+        response = api_client.get(reverse('book-list'), {'genre_slug': 'poetry'})
+        assert response.status_code == 200
+        assert response.data['results'] == []
+
+    def test_unknown_slug_excludes_books_without_genre(self, api_client, fantasy_books):
+        """Test an unknown slug does not match books that have no genre."""
+        Book.objects.create(title='Untitled', author='Anonymous', isbn='9780000000002')
+        response = api_client.get(reverse('book-list'), {'genre_slug': 'does-not-exist'})
+        assert response.data['results'] == []
+
+    def test_genre_name_is_exact_when_known(self, api_client, fantasy_books):
+        """Test a known genre name filters on the genre reference."""
+        response = api_client.get(reverse('book-list'), {'genre': 'FANTASY'})
+        assert response.status_code == 200
+        assert len(response.data['results']) == 2
+
+    def test_genre_substring_fallback(self, api_client, fantasy_books):
+        """Test a partial genre name still matches by substring."""
+        response = api_client.get(reverse('book-list'), {'genre': 'scien'})
+        assert response.status_code == 200
+        assert [b['title'] for b in response.data['results']] == ['Dune']
+
+    def test_list_includes_genre_fields(self, api_client, fantasy_books):
+        """Test list entries carry genre id and slug."""
+        response = api_client.get(reverse('book-list'), {'genre_slug': 'science-fiction'})
+        entry = response.data['results'][0]
+        assert entry['genre_id'] == fantasy_books[2].genre_ref_id
+        assert entry['genre_slug'] == 'science-fiction'
+
+    def test_list_genres(self, api_client, fantasy_books):
+        """Test the genre listing."""
+        response = api_client.get(reverse('genre-list'))
+        assert response.status_code == 200
+        assert [g['slug'] for g in response.data] == ['fantasy', 'science-fiction']
@@ -0,0 +1,151 @@
+"""
+Integration tests for the hold (reservation) queue.
+"""
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.accounts.models import User
+from apps.accounts.tokens import RoleRefreshToken
+from apps.borrowings.models import Borrowing, Hold
+from apps.borrowings.views import BorrowingViewSet
+
+
+@pytest.fixture
+def third_member_client(db, member_group):
+    """Return an API client authenticated as a third member."""
+    user = User.objects.create_user(
+        email='third@bookcatalog.com', username='third', password='ThirdPass123!'
+    )
+    user.groups.add(member_group)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def borrowed_book(sample_book, member_user):
+    """Return a book currently checked out by member_user."""
+    borrowing = Borrowing.objects.create(user=member_user, book=sample_book)
+    sample_book.is_available = False
+    sample_book.save()
+    return borrowing
+
+
+@pytest.mark.django_db
+class TestHoldQueue:
+    """Tests for placing holds and allocating books on checkin."""
+
+    def _place(self, client, book):
+        return client.post(reverse('hold-list'), {'book_id': book.id})
+
+    def test_cannot_hold_available_book(self, authenticated_member_client, sample_book):
+        """Test holds are only placed on checked-out books."""
+        response = self._place(authenticated_member_client, sample_book)
+        assert response.status_code == 400
+
+    def test_holds_are_fifo(self, api_client, another_member_user, third_member_client, borrowed_book):
+        """Test queue positions follow request order."""
+        api_client.force_authenticate(user=another_member_user)
+        first = self._place(api_client, borrowed_book.book)
+        second = self._place(third_member_client, borrowed_book.book)
+        assert first.status_code == 201
+        assert second.status_code == 201
+        assert first.data['position'] < second.data['position']
+
+        duplicate = self._place(api_client, borrowed_book.book)
+        assert duplicate.status_code == 400
+
+    def test_checkin_allocates_next_hold(self, authenticated_admin_client, api_client,
+                                         another_member_user, third_member_client, borrowed_book):
+        """Test returned book is reserved for the first waiting member."""
+        book = borrowed_book.book
+        api_client.force_authenticate(user=another_member_user)
+        self._place(api_client, book)
+        self._place(third_member_client, book)
+
+        response = authenticated_admin_client.post(
+            reverse('borrowing-checkin', args=[borrowed_book.id])
+        )
+        assert response.status_code == 200
+
+        book.refresh_from_db()
+        assert book.is_available is False
+        first_hold = Hold.objects.get(user=another_member_user, book=book)
+        assert first_hold.status == Hold.Status.READY
+
+        # Someone further back in the queue cannot take the book
+        blocked = third_member_client.post(reverse('borrowing-checkout'), {'book_id': book.id})
+        assert blocked.status_code == 400
+
+        # The hold holder can collect it
+        collected = api_client.post(reverse('borrowing-checkout'), {'book_id': book.id})
+        assert collected.status_code == 201
+        first_hold.refresh_from_db()
+        assert first_hold.status == Hold.Status.FULFILLED
+
+    def test_concurrent_checkin_releases_book_once(self, authenticated_admin_client, api_client,
+                                                   another_member_user, third_member_client,
+                                                   borrowed_book, monkeypatch):
+        """Test a checkin that read the loan before another returned it allocates no second hold."""
+        book = borrowed_book.book
+        api_client.force_authenticate(user=another_member_user)
+        self._place(api_client, book)
+        self._place(third_member_client, book)
+        stale = Borrowing.objects.get(pk=borrowed_book.pk)
+        url = reverse('borrowing-checkin', args=[borrowed_book.id])
+
+        assert authenticated_admin_client.post(url).status_code == 200
+        monkeypatch.setattr(BorrowingViewSet, 'get_object', lambda view: stale)
+        assert authenticated_admin_client.post(url).status_code == 400
+
+        assert Hold.objects.filter(book=book, status=Hold.Status.READY).count() == 1
+        assert Hold.objects.filter(book=book, status=Hold.Status.WAITING).count() == 1
+
+    def test_checkin_without_holds_makes_book_available(self, authenticated_admin_client, borrowed_book):
+        """Test books with an empty queue become available again."""
+        authenticated_admin_client.post(reverse('borrowing-checkin', args=[borrowed_book.id]))
+        borrowed_book.book.refresh_from_db()
+        assert borrowed_book.book.is_available is True
+
+    def test_expired_hold_passes_to_next(self, authenticated_admin_client, api_client,
+                                         another_member_user, third_member_client, borrowed_book):
+        """Test expiry sweep hands the book to the next member."""
+        book = borrowed_book.book
+        api_client.force_authenticate(user=another_member_user)
+        self._place(api_client, book)
+        self._place(third_member_client, book)
+        authenticated_admin_client.post(reverse('borrowing-checkin', args=[borrowed_book.id]))
+
+        Hold.objects.filter(status=Hold.Status.READY).update(
+            expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        call_command('expire_holds')
+
+        statuses = dict(Hold.objects.filter(book=book).values_list('user__username', 'status'))
+        assert statuses == {'another': Hold.Status.EXPIRED, 'third': Hold.Status.READY}
+
+    def test_cancel_ready_hold_releases_book(self, authenticated_admin_client, api_client,
+                                             another_member_user, borrowed_book):
+        """Test cancelling the only ready hold makes the book available."""
+        api_client.force_authenticate(user=another_member_user)
+        hold_id = self._place(api_client, borrowed_book.book).data['id']
+        authenticated_admin_client.post(reverse('borrowing-checkin', args=[borrowed_book.id]))
+
+        response = api_client.delete(reverse('hold-detail', args=[hold_id]))
+        assert response.status_code == 204
+        borrowed_book.book.refresh_from_db()
+        assert borrowed_book.book.is_available is True
+
+    def test_member_cancels_own_hold_with_access_token(self, another_member_user, borrowed_book):
+        """Test a token-authenticated member owns their hold (user_id claim is a string)."""
+        client = APIClient()
+        token = RoleRefreshToken.for_user(another_member_user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        hold_id = self._place(client, borrowed_book.book).data['id']
+
+        response = client.delete(reverse('hold-detail', args=[hold_id]))
+        assert response.status_code == 204
+        assert Hold.objects.get(id=hold_id).status == Hold.Status.CANCELLED
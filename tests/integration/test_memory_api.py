@@ -0,0 +1,61 @@
+"""
+Integration tests for the worker memory diagnostics endpoint.
+"""
+import os
+
+import pytest
+from django.urls import reverse
+from apps.core.memory import monitor
+
+
+@pytest.fixture(autouse=True)
+def stop_tracing():
+    yield
+    monitor.stop_tracing()
+
+
+@pytest.mark.django_db
+class TestMemoryDiagnosticsAPI:
+    """Tests for /api/diagnostics/memory/."""
+
+    def test_status(self, authenticated_admin_client):
+        """Test the serving worker reports its memory and appears among the workers."""
+        response = authenticated_admin_client.get(reverse('memory-list'), {'objects': 'true'})
+        assert response.status_code == 200
+        assert response.data['worker']['pid'] == os.getpid()
+        assert response.data['worker']['rss_bytes'] > 0
+        assert response.data['worker']['tracing'] is False
+        assert [worker['pid'] for worker in response.data['workers']] == [os.getpid()]
+        assert response.data['objects'][0]['count'] > 0
+
+    def test_snapshots(self, authenticated_admin_client):
+        """Test snapshots start tracing and report growth since the previous one."""
+        url = reverse('memory-snapshots')
+        first = authenticated_admin_client.post(url)
+        assert first.status_code == 201
+        assert 'growth' not in first.data
+        second = authenticated_admin_client.post(url)
+        assert second.data['compared_to'] == first.data['id']
+        assert second.data['pid'] == os.getpid()
+
+        response = authenticated_admin_client.get(
+            reverse('memory-snapshot', args=[second.data['id']]), {'compare': first.data['id']},
+        )
+        assert response.status_code == 200
+        assert response.data['top_allocations']
+        assert 'growth' in response.data
+
+        assert authenticated_admin_client.delete(url).status_code == 204
+        response = authenticated_admin_client.get(reverse('memory-snapshot', args=[second.data['id']]))
+        assert response.status_code == 404
+
+    def test_bad_compare(self, authenticated_admin_client):
+        """Test a non-numeric comparison id is rejected."""
+        snapshot = authenticated_admin_client.post(reverse('memory-snapshots')).data['id']
+        response = authenticated_admin_client.get(reverse('memory-snapshot', args=[snapshot]), {'compare': 'x'})
+        assert response.status_code == 400
+
+    def test_admin_only(self, authenticated_member_client):
+        """Test members cannot read worker memory."""
+        assert authenticated_member_client.get(reverse('memory-list')).status_code == 403
+        assert authenticated_member_client.post(reverse('memory-snapshots')).status_code == 403
@@ -0,0 +1,85 @@
+"""
+Integration tests for the /metrics endpoint and the metrics recorded by
+the application.
+"""
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from apps.books.models import Book
+
+
+def scrape(client, **headers):
+    response = client.get(reverse('metrics'), **headers)
+    if response.status_code != 200:
+        return response, {}
+    samples = {
+        line.rpartition(' ')[0]: float(line.rpartition(' ')[2])
+        for line in response.content.decode().splitlines() if not line.startswith('#')
+    }
+    return response, samples
+
+
+@pytest.mark.django_db
+class TestMetricsAPI:
+    """Tests for the Prometheus endpoint."""
+
+    def test_request_metrics(self, api_client, sample_book):
+        """Test requests are counted and timed per route and status."""
+        api_client.get(reverse('book-detail', args=[sample_book.id]))
+        api_client.get(reverse('book-detail', args=[sample_book.id]))
+        api_client.get('/no/such/page/')
+
+        response, samples = scrape(api_client)
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        assert samples['http_requests_total{method="GET",route="book-detail",status="200"}'] == 2
+        assert samples['http_requests_total{method="GET",route="unmatched",status="404"}'] == 1
+        assert samples['http_request_duration_seconds_count{method="GET",route="book-detail"}'] == 2
+        assert samples['http_request_db_queries_count{route="book-detail"}'] == 2
+        assert samples['http_request_db_queries_sum{route="book-detail"}'] >= 2
+
+    def test_unknown_methods_share_one_series(self, api_client):
+        """Test arbitrary method tokens are recorded as "other", not as new series."""
+        api_client.generic('FROB', '/no/such/page/')
+        api_client.generic('XYZZY', '/no/such/page/')
+
+        _, samples = scrape(api_client)
+        assert samples['http_requests_total{method="other",route="unmatched",status="404"}'] == 2
+        assert not [name for name in samples if 'FROB' in name or 'XYZZY' in name]
+
+    def test_checkout_outcomes(self, authenticated_member_client, sample_book):
+        """Test checkouts are counted by outcome."""
+        url = reverse('borrowing-checkout')
+        authenticated_member_client.post(url, {'book_id': sample_book.id})
+        authenticated_member_client.post(url, {'book_id': sample_book.id})
+        other = Book.objects.create(
+            title='Other', author='Author', isbn='9780000000017', genre='Fiction',
+        )
+        authenticated_member_client.post(url, {'book_id': other.id})
+        authenticated_member_client.post(url, {'book_id': 999999})
+
+        _, samples = scrape(authenticated_member_client)
+        assert samples['library_checkouts_total{outcome="success"}'] == 1
+        assert samples['library_checkouts_total{outcome="limit_reached"}'] == 1
+        # Unknown and unavailable books are rejected by the serializer
+        assert samples['library_checkouts_total{outcome="invalid"}'] == 2
+
+    def test_cache_hit_rate(self, api_client, sample_book):
+        """Test availability lookups are counted as cache hits and misses."""
+        url = reverse('book-availability')
+        api_client.get(url, {'ids': str(sample_book.id)})
+        api_client.get(url, {'ids': str(sample_book.id)})
+
+        _, samples = scrape(api_client)
+        assert samples['cache_lookups_total{cache="availability",result="miss"}'] == 1
+        assert samples['cache_lookups_total{cache="availability",result="hit"}'] == 1
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_token_required_when_configured(self, api_client):
+        """Test a configured token must be sent to scrape."""
+        response, _ = scrape(api_client)
+        assert response.status_code == 401
+        response, _ = scrape(api_client, HTTP_AUTHORIZATION='Bearer wrong')
+        assert response.status_code == 401
+        response, _ = scrape(api_client, HTTP_AUTHORIZATION='Bearer scrape-secret')
+        assert response.status_code == 200
@@ -0,0 +1,90 @@
+"""
+Integration tests for on-demand and sampled request profiling.
+"""
+import marshal
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from apps.accounts.tokens import RoleRefreshToken
+
+
+@pytest.fixture
+def admin_token_client(api_client, admin_user):
+    """A client authenticating with a real admin access token."""
+    token = RoleRefreshToken.for_user(admin_user).access_token
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return api_client
+
+
+@pytest.mark.django_db
+class TestRequestProfiling:
+    """Tests for request profiles and the profiles API."""
+
+    def test_admin_profiles_request(self, admin_token_client, sample_book):
+        """Test an administrator's flagged request is profiled and stored."""
+        response = admin_token_client.get(reverse('book-list'), {'search': 'Test'}, HTTP_X_PROFILE='1')
+        assert response.status_code == 200
+        profile_id = response['X-Profile-Id']
+
+        detail = admin_token_client.get(reverse('request-profile-detail', args=[profile_id]))
+        assert detail.status_code == 200
+        assert detail.data['route'] == 'book-list'
+        assert detail.data['sampled'] is False
+        assert '(dispatch)' in detail.data['summary']
+
+        download = admin_token_client.get(reverse('request-profile-download', args=[profile_id]))
+        assert download['Content-Disposition'] == f'attachment; filename="profile-{profile_id}.prof"'
+        # The call tree reaches from DRF dispatch down to the renderer
+        functions = {function for _, _, function in marshal.loads(download.content)}
+        for name in ('dispatch', 'check_permissions', 'filter_queryset', 'to_representation', 'render'):
+            assert name in functions
+
+    def test_query_flag(self, admin_token_client):
+        """Test ``?profile=1`` works like the header."""
+        response = admin_token_client.get(reverse('book-list'), {'profile': '1'})
+        assert 'X-Profile-Id' in response
+
+    def test_members_cannot_profile(self, api_client, member_user):
+        """Test the flag is ignored for non-administrators."""
+        assert 'X-Profile-Id' not in api_client.get(reverse('book-list'), HTTP_X_PROFILE='1')
+        token = RoleRefreshToken.for_user(member_user).access_token
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        assert 'X-Profile-Id' not in api_client.get(reverse('book-list'), HTTP_X_PROFILE='1')
+
+    def test_invalid_token_ignored(self, api_client):
+        """Test a bad token does not break the request when profiling is asked for."""
+        api_client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        response = api_client.get(reverse('book-list'), HTTP_X_PROFILE='1')
+        assert response.status_code == 401
+        assert 'X-Profile-Id' not in response
+
+    @override_settings(PROFILE_SAMPLE_EVERY=2)
+    def test_sampled(self, api_client, authenticated_admin_client):
+        """Test every Nth request is profiled without being asked."""
+        for _ in range(4):
+            response = api_client.get(reverse('book-list'))
+            assert 'X-Profile-Id' not in response
+
+        with override_settings(PROFILE_SAMPLE_EVERY=0):
+            profiles = authenticated_admin_client.get(reverse('request-profile-list')).data['results']
+        assert len(profiles) == 2
+        assert all(profile['sampled'] and profile['route'] == 'book-list' for profile in profiles)
+        assert profiles[0]['id'] > profiles[1]['id']
+        assert 'summary' not in profiles[0]
+
+    @override_settings(PROFILE_BUFFER_SIZE=2)
+    def test_ring_buffer(self, admin_token_client):
+        """Test only the newest profiles are kept."""
+        ids = [
+            admin_token_client.get(reverse('book-list'), HTTP_X_PROFILE='1')['X-Profile-Id']
+            for _ in range(3)
+        ]
+        profiles = admin_token_client.get(reverse('request-profile-list')).data['results']
+        assert [str(profile['id']) for profile in profiles] == ids[:0:-1]
+        response = admin_token_client.get(reverse('request-profile-detail', args=[ids[0]]))
+        assert response.status_code == 404
+
+    def test_admin_only(self, authenticated_member_client):
+        """Test members cannot read profiles."""
+        assert authenticated_member_client.get(reverse('request-profile-list')).status_code == 403
@@ -0,0 +1,310 @@
+"""
+Query-count budgets for every API route.
+
+Each endpoint is called against a catalog holding 1 and then 50 of
+everything it lists, and must stay within the same fixed number of queries
+both times. A list that costs a query per row (a missing ``select_related``
+or a per-object permission check) therefore fails at size 50 and the
+failure lists the queries over budget.
+
+When adding a route, add it to ``ENDPOINTS``; ``test_every_route_has_budget``
+fails until you do.
+"""
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.accounts.models import User
+from apps.books.models import Book, BookNeighbors
+from apps.books.recommendations import save_neighbor_lists
+from apps.core.models import QueryFingerprint
+from apps.borrowings.models import (
+    ArchivedBorrowing,
+    Borrowing,
+    DailyBookCirculation,
+    DailyGenreCirculation,
+    Hold,
+)
+from apps.ratings.models import BookRating
+
+SIZES = [1, 50]
+
+# Django's admin site, and the HTML documentation pages, which only render
+# static assets around the schema (budgeted as schema-json/schema-yaml).
+UNBUDGETED_NAMESPACES = {'admin'}
+UNBUDGETED_ROUTES = {'swagger', 'redoc'}
+
+
+def endpoint(name, budget, method='get', role='anonymous', args=None, data=None,
+             params=None, status=200, label=None):
+    """
+    One budget entry. ``args``, ``data`` and ``params`` take the catalog and
+    return the URL arguments, request body and query string.
+    """
+    return pytest.param(
+        {
+            'name': name, 'budget': budget, 'method': method, 'role': role,
+            'args': args, 'data': data, 'params': params, 'status': status,
+        },
+        id=label or f'{method.upper()} {name} ({role})',
+    )
+
+
+ENDPOINTS = [
+    # Accounts
+    endpoint('register', 7, method='post', status=201, data=lambda c: {
+        'email': 'new@bookcatalog.com', 'username': 'newreader', 'first_name': 'New',
+        'last_name': 'Reader', 'password': 'NewReader123!', 'password_confirm': 'NewReader123!',
+    }),
+    endpoint('login', 2, method='post', data=lambda c: {
+        'email': 'member@bookcatalog.com', 'password': 'MemberPass123!',
+    }),
+    # User, roles, and claiming the old token (insert in a savepoint)
+    endpoint('token_refresh', 5, method='post', data=lambda c: {
+        'refresh': str(RefreshToken.for_user(c['member'])),
+    }),
+    endpoint('logout', 2, method='post', role='member', data=lambda c: {
+        'refresh': str(RefreshToken.for_user(c['member'])),
+    }),
+    endpoint('profile', 2, role='member'),
+    endpoint('profile', 1, method='patch', role='member', data=lambda c: {'first_name': 'Renamed'}),
+    endpoint('user-list', 3, role='admin'),
+    endpoint('user-list', 3, role='admin', label='GET user-list searched (admin)',
+             params=lambda c: {'search': 'reader', 'role': 'Members'}),
+    endpoint('user-list', 11, method='post', role='admin', status=201, data=lambda c: {
+        'email': 'staff@bookcatalog.com', 'username': 'staff', 'groups': ['Members'],
+    }),
+    endpoint('user-provision', 8, method='post', role='admin', status=201, data=lambda c: {
+        'users': [
+            {'email': f'student{i}@school.org', 'username': f'student{i}', 'password': 'TermStart2026!'}
+            for i in range(len(c['books']))
+        ],
+    }),
+    endpoint('user-detail', 3, role='admin', args=lambda c: [c['readers'][0].pk]),
+    endpoint('user-detail', 11, method='patch', role='admin',
+             args=lambda c: [c['readers'][0].pk], data=lambda c: {'groups': ['Administrators']}),
+    endpoint('user-logout-everywhere', 4, method='post', role='admin',
+             args=lambda c: [c['readers'][0].pk]),
+    endpoint('user-detail', 12, method='delete', role='admin', status=204,
+             args=lambda c: [c['readers'][0].pk]),
+
+    # Books
+    endpoint('api-root', 0),
+    endpoint('book-list', 3),
+    endpoint('book-list', 3, label='GET book-list filtered (anonymous)',
+             params=lambda c: {'genre': 'Genre 0', 'year_min': 1990, 'ordering': 'title_asc'}),
+    endpoint('book-list', 11, method='post', role='admin', status=201, data=lambda c: {
+        'title': 'Refactoring', 'author': 'Martin Fowler', 'isbn': '9780134757599', 'genre': 'Technology',
+    }),
+    endpoint('book-detail', 2, args=lambda c: [c['books'][0].pk]),
+    endpoint('book-detail', 11, method='patch', role='admin',
+             args=lambda c: [c['books'][0].pk], data=lambda c: {'genre': 'Classics'}),
+    endpoint('book-detail', 9, method='delete', role='admin', status=204,
+             args=lambda c: [c['spare'].pk]),
+    endpoint('book-availability', 2,
+             params=lambda c: {'ids': ','.join(str(book.pk) for book in c['books'])}),
+    endpoint('book-lookup', 2, method='post', data=lambda c: {
+        'ids': [book.pk for book in c['books']], 'isbns': [c['spare'].isbn],
+    }),
+    endpoint('book-trending', 2),
+    endpoint('book-also-borrowed', 3, args=lambda c: [c['books'][0].pk]),
+    endpoint('book-similar', 3, args=lambda c: [c['books'][0].pk]),
+    endpoint('genre-list', 1),
+    endpoint('genre-detail', 1, args=lambda c: [c['books'][0].genre_ref_id]),
+
+    # Borrowings
+    endpoint('borrowing-list', 3, role='member'),
+    endpoint('borrowing-list', 3, role='admin'),
+    endpoint('borrowing-detail', 3, role='admin', args=lambda c: [c['loans'][0].pk]),
+    endpoint('borrowing-checkout', 17, method='post', role='borrower', status=201,
+             data=lambda c: {'book_id': c['spare'].pk}),
+    # Locks the book, then the loan, and re-checks it under the lock
+    endpoint('borrowing-checkin', 12, method='post', role='admin',
+             args=lambda c: [c['loans'][0].pk]),
+    endpoint('borrowing-current', 2, role='member'),
+    endpoint('borrowing-current', 3, role='admin'),
+    endpoint('borrowing-history', 3, role='member'),
+    endpoint('borrowing-all-records', 4, role='admin'),
+    endpoint('borrowing-overdue', 3, role='admin'),
+    endpoint('hold-list', 3, role='member'),
+    endpoint('hold-list', 3, role='admin'),
+    endpoint('hold-list', 9, method='post', role='borrower', status=201,
+             data=lambda c: {'book_id': c['books'][0].pk}),
+    endpoint('hold-detail', 3, role='member', args=lambda c: [c['holds'][0].pk]),
+    endpoint('hold-detail', 7, method='delete', role='member', status=204,
+             args=lambda c: [c['holds'][0].pk]),
+    endpoint('circulation-daily', 2, role='admin'),
+    endpoint('circulation-top-books', 2, role='admin'),
+    endpoint('circulation-genres', 2, role='admin'),
+
+    # Ratings
+    endpoint('rating-list', 1),
+    endpoint('rating-list', 1, label='GET rating-list for book (anonymous)',
+             params=lambda c: {'book_id': c['books'][0].pk}),
+    endpoint('rating-list', 4, method='post', role='borrower', status=201,
+             data=lambda c: {'book_id': c['books'][0].pk, 'rating': 4}),
+    endpoint('rating-my-ratings', 1, role='member'),
+    endpoint('rating-detail', 1, args=lambda c: [c['ratings'][0].pk]),
+    endpoint('rating-detail', 3, method='put', role='member',
+             args=lambda c: [c['ratings'][0].pk], data=lambda c: {'rating': 2, 'comment': 'Changed'}),
+    endpoint('rating-detail', 3, method='delete', role='member', status=204,
+             args=lambda c: [c['ratings'][0].pk]),
+
+    # Diagnostics
+    endpoint('query-fingerprint-list', 3, role='admin'),
+    endpoint('query-fingerprint-detail', 2, role='admin', args=lambda c: [c['fingerprints'][0].pk]),
+    # Profiles live in the cache, which is cleared before each request
+    endpoint('request-profile-list', 1, role='admin'),
+    endpoint('request-profile-detail', 1, role='admin', args=lambda c: [1], status=404),
+    endpoint('request-profile-download', 1, role='admin', args=lambda c: [1], status=404),
+    endpoint('memory-list', 1, role='admin'),
+    # Taking a snapshot would leave tracemalloc running; stopping costs the same
+    endpoint('memory-snapshots', 1, method='delete', role='admin', status=204),
+    endpoint('memory-snapshot', 1, role='admin', args=lambda c: [1], status=404),
+
+    # Documentation
+    endpoint('index', 0, status=302),
+    endpoint('metrics', 0),
+    endpoint('schema-json', 0),
+    endpoint('schema-yaml', 0),
+]
+
+
+def build_catalog(size, member, admin):
+    """
+    Create ``size`` of everything a list endpoint returns: books and genres,
+    readers with an overdue loan each, the member's returned and archived
+    loans, holds and ratings, daily rollups, neighbor lists and slow-query
+    fingerprints.
+    """
+    now = timezone.now()
+    members = Group.objects.get(name='Members')
+    books = [
+        Book.objects.create(
+            title=f'Book {i}', author=f'Author {i}', isbn=f'{9780000000000 + i}',
+            genre=f'Genre {i}', published_date=now.date() - timedelta(days=365 * i),
+            page_count=100 + i, trending_score=float(size - i),
+        )
+        for i in range(size)
+    ]
+    spare = Book.objects.create(title='Spare', author='Nobody', isbn='9789999999999')
+
+    readers = []
+    loans = []
+    for i, book in enumerate(books):
+        reader = User.objects.create_user(
+            email=f'reader{i}@bookcatalog.com', username=f'reader{i}', password='ReaderPass123!',
+        )
+        reader.groups.add(members)
+        readers.append(reader)
+        loans.append(Borrowing.objects.create(
+            user=reader, book=book, due_date=now - timedelta(days=1),
+        ))
+    Book.objects.filter(pk__in=[book.pk for book in books]).update(is_available=False)
+
+    Borrowing.objects.bulk_create([
+        Borrowing(user=member, book=book, due_date=now - timedelta(days=20), returned_at=now)
+        for book in books
+    ])
+    ArchivedBorrowing.objects.bulk_create([
+        ArchivedBorrowing(
+            id=100000 + i, user=member, book=book, borrowed_at=now - timedelta(days=400),
+            due_date=now - timedelta(days=386), returned_at=now - timedelta(days=390),
+        )
+        for i, book in enumerate(books)
+    ])
+    holds = Hold.objects.bulk_create([
+        Hold(user=member, book=book, position=1) for book in books
+    ])
+    ratings = BookRating.objects.bulk_create([
+        BookRating(user=member, book=book, rating=5) for book in books
+    ])
+    DailyBookCirculation.objects.bulk_create([
+        DailyBookCirculation(day=now.date(), book=book, checkouts=1) for book in books
+    ])
+    DailyGenreCirculation.objects.bulk_create([
+        DailyGenreCirculation(day=now.date(), genre=book.genre, checkouts=1) for book in books
+    ])
+    neighbors = {books[0].pk: [(book.pk, 1.0) for book in books]}
+    save_neighbor_lists(BookNeighbors.KIND_ALSO_BORROWED, neighbors)
+    save_neighbor_lists(BookNeighbors.KIND_SIMILAR, neighbors)
+
+    fingerprints = QueryFingerprint.objects.bulk_create([
+        QueryFingerprint(
+            fingerprint=f'{i:016x}', sql=f'SELECT * FROM books WHERE id = ? -- {i}',
+            route='book-detail', slow_count=1, slow_total_ms=250.0, last_seen=now,
+        )
+        for i in range(size)
+    ])
+
+    borrower = User.objects.create_user(
+        email='borrower@bookcatalog.com', username='borrower', password='BorrowerPass123!',
+    )
+    borrower.groups.add(members)
+
+    return {
+        'member': member, 'admin': admin, 'borrower': borrower, 'readers': readers,
+        'books': books, 'spare': spare, 'loans': loans, 'holds': holds, 'ratings': ratings,
+        'fingerprints': fingerprints,
+    }
+
+
+def iter_route_names(patterns, namespace=None):
+    """Yield the name of every route under ``patterns``."""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_route_names(pattern.url_patterns, pattern.namespace or namespace)
+        elif pattern.name and namespace not in UNBUDGETED_NAMESPACES:
+            yield pattern.name
+
+
+def over_budget_report(queries, budget):
+    """Describe the queries a request ran, marking those past ``budget``."""
+    lines = [f'{len(queries)} queries, budget {budget}:']
+    for number, query in enumerate(queries, start=1):
+        marker = '  OVER' if number > budget else '      '
+        lines.append(f'{marker} {number:3}. {query["sql"]}')
+    return '\n'.join(lines)
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+    """Query-count budgets for every API route."""
+
+    def test_every_route_has_budget(self):
+        """Test each named route in config/urls.py has at least one budget entry."""
+        budgeted = {param.values[0]['name'] for param in ENDPOINTS}
+        routes = set(iter_route_names(get_resolver().url_patterns)) - UNBUDGETED_ROUTES
+        missing = sorted(routes - budgeted)
+        assert not missing, f'Routes without a query budget: {missing}'
+
+    @pytest.mark.parametrize('size', SIZES)
+    @pytest.mark.parametrize('spec', ENDPOINTS)
+    def test_query_budget(self, spec, size, member_user, admin_user):
+        """Test the endpoint stays within its query budget whatever the list size."""
+        catalog = build_catalog(size, member_user, admin_user)
+        client = APIClient()
+        if spec['role'] != 'anonymous':
+            client.force_authenticate(user=catalog[spec['role']])
+
+        url = reverse(spec['name'], args=spec['args'](catalog) if spec['args'] else None)
+        kwargs = {'format': 'json'} if spec['method'] != 'get' else {}
+        payload = spec['data'](catalog) if spec['data'] else spec['params'](catalog) if spec['params'] else None
+        if payload is not None:
+            kwargs['data'] = payload
+        if spec['name'] == 'schema-json':
+            kwargs['HTTP_ACCEPT'] = 'application/json'
+
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(client, spec['method'])(url, **kwargs)
+
+        assert response.status_code == spec['status'], getattr(response, 'data', response)
+        assert len(captured) <= spec['budget'], over_budget_report(captured.captured_queries, spec['budget'])
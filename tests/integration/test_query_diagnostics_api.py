@@ -0,0 +1,36 @@
+"""
+Integration tests for the slow-query diagnostics endpoint.
+"""
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+
+@pytest.mark.django_db
+class TestQueryDiagnosticsAPI:
+    """Tests for /api/diagnostics/queries/."""
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_lists_slow_queries_by_route(self, authenticated_admin_client, authenticated_member_client):
+        """Test queries slower than the threshold show up with their route and origin."""
+        authenticated_member_client.get(reverse('borrowing-list'))
+
+        response = authenticated_admin_client.get(
+            reverse('query-fingerprint-list'), {'route': 'borrowing-list', 'ordering': '-slow_count'},
+        )
+        assert response.status_code == 200
+        results = response.data['results']
+        assert results
+        for row in results:
+            assert row['route'] == 'borrowing-list'
+            assert row['slow_count'] >= 1
+            assert row['slow_avg_ms'] is not None
+        assert any(row['origin'].startswith('apps/') for row in results)
+
+        detail = authenticated_admin_client.get(reverse('query-fingerprint-detail', args=[results[0]['id']]))
+        assert detail.data['fingerprint'] == results[0]['fingerprint']
+
+    def test_admin_only(self, api_client, authenticated_member_client):
+        """Test members and anonymous clients cannot read the query log."""
+        assert authenticated_member_client.get(reverse('query-fingerprint-list')).status_code == 403
+        assert api_client.get(reverse('query-fingerprint-list')).status_code == 401
@@ -0,0 +1,233 @@
+"""
+Query plan tests for the hot endpoints (PostgreSQL only).
+
+Each test calls an endpoint against a catalog seeded at realistic row
+counts, captures the SQL it runs and checks ``EXPLAIN (FORMAT JSON)`` for
+sequential scans on the large tables. Run with ``TEST_DATABASE_URL`` pointing
+at a PostgreSQL server; on SQLite the module is skipped.
+"""
+import json
+
+import pytest
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from apps.accounts.models import User
+from apps.books.models import Book
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'postgresql',
+    reason='Query plans are only checked on PostgreSQL',
+)
+
+WATCHED_TABLES = {'books', 'borrowings', 'book_ratings', 'users'}
+
+# Counting a whole table reads every row whichever plan is used.
+FULL_TABLE_COUNTS = {
+    f'SELECT COUNT(*) AS "__count" FROM "{table}"' for table in WATCHED_TABLES
+}
+
+SEED_SQL = [
+    """
+    INSERT INTO genres (name, slug)
+    SELECT 'Genre ' || g, 'genre-' || g FROM generate_series(1, 40) AS g
+    """,
+    """
+    INSERT INTO users (password, is_superuser, username, first_name, last_name,
+                       email, is_staff, is_active, date_joined, created_at, updated_at)
+    SELECT '!', false, 'reader' || u, '', '', 'reader' || u || '@example.com',
+           false, true, now(), now(), now()
+    FROM generate_series(1, 5000) AS u
+    """,
+    """
+    INSERT INTO books (title, author, isbn, description, page_count, genre, genre_ref_id,
+                       published_date, is_available, created_at, updated_at,
+                       borrow_count, trending_score)
+    SELECT 'Book ' || b, 'Author ' || (b % 3000), lpad(b::text, 13, '0'), '',
+           50 + b % 900, 'Genre ' || (1 + b % 40),
+           (SELECT id FROM genres WHERE slug = 'genre-' || (1 + b % 40)),
+           date '1950-01-01' + (b % 27000), b % 20 <> 0,
+           now() - b * interval '1 minute', now(), b % 500, (b % 997)::float
+    FROM generate_series(1, 50000) AS b
+    """,
+    """
+    INSERT INTO borrowings (user_id, book_id, borrowed_at, due_date, returned_at)
+    SELECT u.id, k.id,
+           now() - n * interval '5 minutes',
+           now() - n * interval '5 minutes' + interval '14 days',
+           CASE WHEN n % 25 = 0 THEN NULL ELSE now() - n * interval '5 minutes' + interval '7 days' END
+    FROM generate_series(1, 200000) AS n
+    JOIN users u ON u.username = 'reader' || (1 + n % 5000)
+    JOIN books k ON k.isbn = lpad((1 + (n * 7919) % 50000)::text, 13, '0')
+    """,
+    """
+    INSERT INTO book_ratings (user_id, book_id, rating, comment, created_at, updated_at)
+    SELECT DISTINCT ON (b.user_id, b.book_id) b.user_id, b.book_id,
+           1 + b.id % 5, '', b.borrowed_at + interval '8 days', b.borrowed_at + interval '8 days'
+    FROM borrowings b
+    WHERE b.id % 4 = 0
+    """,
+    'ANALYZE genres, users, users_groups, books, borrowings, book_ratings',
+]
+
+
+def plan_nodes(node):
+    """Yield every node of an EXPLAIN (FORMAT JSON) plan tree."""
+    yield node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def sequential_scans(sql):
+    """Return the watched tables ``sql`` reads with a sequential scan."""
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+        explained = cursor.fetchone()[0]
+    if isinstance(explained, str):
+        explained = json.loads(explained)
+    return [
+        node['Relation Name']
+        for node in plan_nodes(explained[0]['Plan'])
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in WATCHED_TABLES
+    ]
+
+
+def assert_no_sequential_scans(client, url, params=None):
+    """Call ``url`` and check the plan of every query it runs."""
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(url, params or {})
+    assert response.status_code == 200, response.content
+    offenders = []
+    for query in captured.captured_queries:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith('SELECT') or sql in FULL_TABLE_COUNTS:
+            continue
+        tables = sequential_scans(sql)
+        if tables:
+            offenders.append((tables, sql))
+    assert not offenders, '\n\n'.join(f'{tables}: {sql}' for tables, sql in offenders)
+
+
+@pytest.fixture(scope='module')
+def seeded_catalog(django_db_setup, django_db_blocker):
+    """Seed the large tables once for the module and remove the rows afterwards."""
+    with django_db_blocker.unblock():
+        with connection.cursor() as cursor:
+            for statement in SEED_SQL:
+                cursor.execute(statement)
+        yield
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'TRUNCATE book_ratings, borrowings, books, genres, users RESTART IDENTITY CASCADE'
+            )
+
+
+@pytest.fixture
+def reader_client(seeded_catalog, db):
+    """Client authenticated as a seeded member with loans and ratings."""
+    client = APIClient()
+    client.force_authenticate(user=User.objects.get(username='reader42'))
+    return client
+
+
+@pytest.fixture
+def librarian_client(seeded_catalog, db):
+    """Client authenticated as a seeded administrator."""
+    user = User.objects.get(username='reader1')
+    user.groups.add(Group.objects.get_or_create(name='Administrators')[0])
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db
+class TestBookQueryPlans:
+    """Query plans for book endpoints."""
+
+    def test_list_default_order(self, reader_client):
+        """Test the default listing reads books in created_at order from an index."""
+        assert_no_sequential_scans(reader_client, reverse('book-list'))
+
+    def test_list_newest_first(self, reader_client):
+        """Test newest-first listing."""
+        assert_no_sequential_scans(reader_client, reverse('book-list'), {'ordering': 'created_at_desc'})
+
+    def test_list_by_genre(self, reader_client):
+        """Test filtering by genre id."""
+        genre_id = Book.objects.values_list('genre_ref_id', flat=True).first()
+        assert_no_sequential_scans(reader_client, reverse('book-list'), {'genre_id': genre_id})
+
+    def test_list_by_year_range(self, reader_client):
+        """Test the published year range filter."""
+        assert_no_sequential_scans(
+            reader_client, reverse('book-list'), {'year_min': 1960, 'year_max': 1961},
+        )
+
+    def test_list_by_page_range(self, reader_client):
+        """Test the page count range filter."""
+        assert_no_sequential_scans(
+            reader_client, reverse('book-list'), {'pages_min': 100, 'pages_max': 101},
+        )
+
+    def test_list_popular(self, reader_client):
+        """Test ordering by borrow count."""
+        assert_no_sequential_scans(reader_client, reverse('book-list'), {'ordering': 'borrow_count_desc'})
+
+    def test_detail(self, reader_client):
+        """Test the book detail view."""
+        book_id = Book.objects.values_list('id', flat=True).first()
+        assert_no_sequential_scans(reader_client, reverse('book-detail', args=[book_id]))
+
+
+@pytest.mark.django_db
+class TestBorrowingQueryPlans:
+    """Query plans for borrowing endpoints."""
+
+    def test_current(self, reader_client):
+        """Test a member's active loans."""
+        assert_no_sequential_scans(reader_client, reverse('borrowing-current'))
+
+    def test_history(self, reader_client):
+        """Test a member's history, newest first."""
+        assert_no_sequential_scans(reader_client, reverse('borrowing-history'))
+
+    def test_member_list(self, reader_client):
+        """Test a member's loan listing."""
+        assert_no_sequential_scans(reader_client, reverse('borrowing-list'))
+
+    def test_admin_list(self, librarian_client):
+        """Test the administrators' listing of every loan."""
+        assert_no_sequential_scans(librarian_client, reverse('borrowing-list'))
+
+    def test_overdue(self, librarian_client):
+        """Test the overdue report."""
+        assert_no_sequential_scans(librarian_client, reverse('borrowing-overdue'))
+
+
+@pytest.mark.django_db
+class TestRatingQueryPlans:
+    """Query plans for rating endpoints."""
+
+    def test_ratings_for_book(self, reader_client):
+        """Test listing a book's ratings, newest first."""
+        book_id = Book.objects.filter(ratings__isnull=False).values_list('id', flat=True).first()
+        assert_no_sequential_scans(reader_client, reverse('rating-list'), {'book_id': book_id})
+
+    def test_my_ratings(self, reader_client):
+        """Test listing the current member's ratings."""
+        assert_no_sequential_scans(reader_client, reverse('rating-my-ratings'))
+
+
+@pytest.mark.django_db
+class TestUserQueryPlans:
+    """Query plans for the admin user directory."""
+
+    def test_directory(self, librarian_client):
+        """Test the first page of the directory."""
+        assert_no_sequential_scans(librarian_client, reverse('user-list'))
+
+    def test_directory_search(self, librarian_client):
+        """Test prefix search on email and username."""
+        assert_no_sequential_scans(librarian_client, reverse('user-list'), {'search': 'reader42'})
@@ -0,0 +1,113 @@
+"""
+Integration tests for the access log middleware.
+"""
+import io
+import json
+import logging
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from apps.core.logging import JsonFormatter, QueueStreamHandler
+from apps.accounts.tokens import RoleRefreshToken
+from apps.borrowings.models import Borrowing
+
+
+@pytest.fixture
+def access_log(caplog):
+    caplog.set_level(logging.INFO, logger='apps.access')
+    return lambda: [record.data for record in caplog.records if record.name == 'apps.access']
+
+
+@pytest.mark.django_db
+class TestRequestLogging:
+    """Tests for the structured access log."""
+
+    def test_logs_request(self, api_client, sample_book, access_log):
+        """Test each request is logged with its route, status, timings and size."""
+        with CaptureQueriesContext(connection) as captured:
+            response = api_client.get(reverse('book-detail', args=[sample_book.id]))
+
+        [entry] = access_log()
+        assert entry['method'] == 'GET'
+        assert entry['route'] == 'book-detail'
+        assert entry['status'] == 200
+        assert entry['db_queries'] == len(captured)
+        assert entry['duration_ms'] >= entry['db_ms'] >= 0
+        assert entry['bytes'] == len(response.content)
+        assert entry['user_id'] is None
+
+    def test_logs_token_user_without_loading_it(self, api_client, member_user, access_log):
+        """Test the user id comes from the token, with no extra query."""
+        token = RoleRefreshToken.for_user(member_user).access_token
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        api_client.get(reverse('borrowing-current'))
+        [entry] = access_log()
+        assert entry['user_id'] == member_user.pk
+        assert entry['db_queries'] == 2  # count + page, no users row
+
+    def test_logs_unrouted_request(self, api_client, access_log):
+        """Test 404s outside any route are logged too."""
+        api_client.get('/no/such/page/')
+        [entry] = access_log()
+        assert entry['status'] == 404
+        assert entry['route'] is None
+
+    @override_settings(ACCESS_LOG_SAMPLE_RATE=1.0, ACCESS_LOG_SAMPLE_RATES={'book-list': 0.0})
+    def test_per_route_sampling(self, api_client, access_log):
+        """Test a route sampled at zero is not logged while others are."""
+        api_client.get(reverse('book-list'))
+        api_client.get(reverse('genre-list'))
+        assert [entry['route'] for entry in access_log()] == ['genre-list']
+
+    def test_logs_streamed_response_when_closed(
+        self, authenticated_admin_client, member_user, sample_book, access_log,
+    ):
+        """Test a streamed export is logged once its body has been sent, queries included."""
+        Borrowing.objects.create(user=member_user, book=sample_book, returned_at=timezone.now())
+        with CaptureQueriesContext(connection) as captured:
+            response = authenticated_admin_client.get(
+                reverse('borrowing-all-records'), {'export': 'ndjson'},
+            )
+            assert access_log() == []
+            body = b''.join(response.streaming_content)
+            response.close()
+
+        [entry] = access_log()
+        assert entry['route'] == 'borrowing-all-records'
+        assert entry['db_queries'] == len(captured)
+        assert entry['bytes'] == len(body) > 0
+
+
+class TestQueueStreamHandler:
+    """Tests for the non-blocking log handler."""
+
+    def test_writes_json_lines(self):
+        """Test records are written by the listener thread as JSON."""
+        stream = io.StringIO()
+        handler = QueueStreamHandler(stream)
+        handler.setFormatter(JsonFormatter())
+        logger = logging.getLogger('tests.access')
+        logger.addHandler(handler)
+        try:
+            logger.warning('hello %s', 'world', extra={'data': {'route': 'book-list'}})
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+        entry = json.loads(stream.getvalue())
+        assert entry['message'] == 'hello world'
+        assert entry['route'] == 'book-list'
+
+    def test_drops_when_full(self):
+        """Test a full queue drops records instead of blocking."""
+        handler = QueueStreamHandler(io.StringIO(), maxsize=1)
+        handler.listener.stop()
+        record = logging.LogRecord('tests', logging.INFO, __file__, 1, 'x', None, None)
+        handler.enqueue(record)
+        handler.enqueue(record)
+        assert handler.dropped == 1
+        handler.listener.start()
+        handler.close()
@@ -0,0 +1,86 @@
+"""
+Integration tests for per-phase timing of book list requests.
+"""
+import logging
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+from apps.core.timing import PhaseTimings
+
+
+def parse_server_timing(value):
+    """``{name: milliseconds}`` of a Server-Timing header."""
+    entries = {}
+    for entry in value.split(','):
+        name, _, duration = entry.strip().partition(';dur=')
+        entries[name] = float(duration)
+    return entries
+
+
+class TestPhaseTimings:
+    """Tests for the phase timer."""
+
+    def test_nested_phases_are_excluded(self, monkeypatch):
+        """Test a phase's time excludes the phases nested in it."""
+        ticks = iter([0.0, 1.0, 3.0, 10.0])
+        monkeypatch.setattr('apps.core.timing.time.perf_counter', lambda: next(ticks))
+        timings = PhaseTimings()
+        with timings.phase('page'):
+            with timings.phase('count'):
+                pass
+        assert timings.phases == {'count': 2.0, 'page': 8.0}
+
+    def test_header(self):
+        """Test phases are rendered in milliseconds, followed by the extras."""
+        timings = PhaseTimings()
+        timings.add('search', 0.0012)
+        assert timings.header(total=0.5) == 'search;dur=1.20, total;dur=500.00'
+
+
+@pytest.mark.django_db
+class TestServerTiming:
+    """Tests for the Server-Timing header on book lists."""
+
+    def test_admin_opt_in(self, authenticated_admin_client, sample_book):
+        """Test administrators get a breakdown of every phase when they ask."""
+        response = authenticated_admin_client.get(
+            reverse('book-list'), {'search': 'Test', 'ordering': 'title_asc'},
+            HTTP_X_SERVER_TIMING='1',
+        )
+        assert response.status_code == 200
+        phases = parse_server_timing(response['Server-Timing'])
+        assert list(phases) == [
+            'search', 'filter', 'ordering', 'count', 'page', 'serialize', 'render', 'db', 'total',
+        ]
+        assert all(duration >= 0 for duration in phases.values())
+        assert phases['total'] >= phases['db']
+
+    def test_not_sent_by_default(self, api_client, authenticated_admin_client,
+                                 authenticated_member_client, sample_book):
+        """Test the header is only sent to administrators who ask for it."""
+        assert 'Server-Timing' not in authenticated_admin_client.get(reverse('book-list'))
+        assert 'Server-Timing' not in authenticated_member_client.get(
+            reverse('book-list'), HTTP_X_SERVER_TIMING='1',
+        )
+        assert 'Server-Timing' not in api_client.get(reverse('book-list'), HTTP_X_SERVER_TIMING='1')
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1.0)
+    def test_sampled(self, api_client, sample_book):
+        """Test sampled requests get the header without asking."""
+        response = api_client.get(reverse('book-list'))
+        assert 'count' in parse_server_timing(response['Server-Timing'])
+        # Retrieval runs the filter backends too, but is not paginated
+        response = api_client.get(reverse('book-detail', args=[sample_book.id]))
+        assert 'count' not in parse_server_timing(response['Server-Timing'])
+        assert 'Server-Timing' not in api_client.get(reverse('rating-list'))
+
+    def test_phases_in_metrics_and_log(self, api_client, sample_book, caplog):
+        """Test phases are recorded in the metrics and the access log."""
+        caplog.set_level(logging.INFO, logger='apps.access')
+        api_client.get(reverse('book-list'), {'search': 'Test'})
+
+        [entry] = [record.data for record in caplog.records if record.name == 'apps.access']
+        assert set(entry['phases_ms']) == {'search', 'filter', 'ordering', 'count', 'page', 'serialize', 'render'}
+        metrics = api_client.get(reverse('metrics')).content.decode()
+        assert 'http_request_phase_duration_seconds_count{route="book-list",phase="count"} 1' in metrics
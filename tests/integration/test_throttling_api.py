@@ -0,0 +1,110 @@
+"""
+Integration tests for API rate limiting.
+
+Throttling is disabled in the test settings, so each test enables the
+throttle on the views it exercises and sets its own rates.
+"""
+import pytest
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from apps.accounts.views import LoginView
+from apps.books.views import BookViewSet
+from apps.borrowings.views import BorrowingViewSet
+from apps.core.throttling import ApiRateThrottle
+
+
+def rates(**scopes):
+    return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': scopes})
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Freeze the throttle's clock at the start of a window; tests move it on."""
+    now = [6000.0]
+    monkeypatch.setattr(ApiRateThrottle, 'timer', staticmethod(lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def throttled(monkeypatch):
+    for view in (BookViewSet, BorrowingViewSet, LoginView):
+        monkeypatch.setattr(view, 'throttle_classes', [ApiRateThrottle])
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('throttled')
+class TestRateLimits:
+    """Tests for scoped sliding-window rate limits."""
+
+    @rates(search_anon='2/min', read_anon='100/min')
+    def test_search_limit_with_retry_after(self, api_client, clock):
+        """Test anonymous searches past the limit get 429 and Retry-After."""
+        url = reverse('book-list')
+        assert api_client.get(url, {'search': 'a'}).status_code == 200
+        assert api_client.get(url, {'search': 'b'}).status_code == 200
+        response = api_client.get(url, {'search': 'c'})
+        assert response.status_code == 429
+        # Next window in 60s, then 3 * (60 - t) / 60 + 1 <= 2 once t = 40
+        assert response['Retry-After'] == '100'
+
+        # Plain reads have their own budget
+        assert api_client.get(url).status_code == 200
+
+    @rates(read_anon='10/min')
+    def test_previous_window_slides_out(self, api_client, clock):
+        """Test the previous window's count is weighted by how much of it is still in view."""
+        url = reverse('book-list')
+        for _ in range(10):
+            assert api_client.get(url).status_code == 200
+
+        clock[0] += 75  # 15s into the next window: 10 * 0.75 = 7.5 still counted
+        assert api_client.get(url).status_code == 200
+        assert api_client.get(url).status_code == 200
+        response = api_client.get(url)
+        assert response.status_code == 429
+        assert response['Retry-After'] == '9'
+
+    @rates(read='1/min', read_anon='1/min')
+    def test_users_are_limited_separately(self, authenticated_member_client,
+                                          authenticated_admin_client, api_client, clock):
+        """Test authenticated clients are counted per user, anonymous ones per IP."""
+        url = reverse('book-list')
+        assert authenticated_member_client.get(url).status_code == 200
+        assert authenticated_admin_client.get(url).status_code == 200
+        assert api_client.get(url).status_code == 200
+        assert authenticated_member_client.get(url).status_code == 429
+        assert api_client.get(url).status_code == 429
+
+    @rates(read_anon='1/min')
+    def test_forwarded_for_does_not_reset_anonymous_limit(self, api_client, clock):
+        """Test a client cannot get a fresh bucket by sending its own X-Forwarded-For."""
+        url = reverse('book-list')
+        assert api_client.get(url, HTTP_X_FORWARDED_FOR='203.0.113.1').status_code == 200
+        assert api_client.get(url, HTTP_X_FORWARDED_FOR='203.0.113.2').status_code == 429
+
+    @rates(auth='2/min')
+    def test_login_limit(self, api_client, member_user, clock):
+        """Test login attempts share the auth budget, failed or not."""
+        url = reverse('login')
+        assert api_client.post(url, {'email': 'member@bookcatalog.com', 'password': 'wrong'}).status_code == 401
+        assert api_client.post(url, {'email': 'member@bookcatalog.com', 'password': 'wrong'}).status_code == 401
+        response = api_client.post(url, {'email': 'member@bookcatalog.com', 'password': 'MemberPass123!'})
+        assert response.status_code == 429
+
+    @rates(checkout='1/hour', read='100/min')
+    def test_checkout_limit(self, authenticated_member_client, sample_book, clock):
+        """Test checkouts have their own budget, separate from reads."""
+        clock[0] = 7200.0
+        url = reverse('borrowing-checkout')
+        assert authenticated_member_client.post(url, {'book_id': sample_book.id}).status_code == 201
+        response = authenticated_member_client.post(url, {'book_id': sample_book.id})
+        assert response.status_code == 429
+        assert response['Retry-After'] == '7200'
+        assert authenticated_member_client.get(reverse('borrowing-list')).status_code == 200
+
+    @rates()
+    def test_scope_without_rate_is_unlimited(self, api_client, clock):
+        """Test scopes without a configured rate are not limited."""
+        for _ in range(5):
+            assert api_client.get(reverse('book-list')).status_code == 200
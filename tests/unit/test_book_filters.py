@@ -0,0 +1,125 @@
+"""
+Unit tests for book range filters and the indexes they rely on.
+"""
+from datetime import date
+from urllib.parse import urlencode
+
+import pytest
+from django.db import connection
+from django.http import QueryDict
+from apps.books.filters import BookFilter
+from apps.books.models import Book
+
+
+def filtered(params):
+    """Return the queryset ``BookFilter`` builds for a query string."""
+    return BookFilter(QueryDict(params), queryset=Book.objects.all()).qs
+
+
+def assert_uses_index(queryset, index_name):
+    """Assert the query plan searches ``index_name`` rather than scanning the table."""
+    if connection.vendor == 'sqlite':
+        plan = queryset.explain()
+        assert f'USING INDEX {index_name}' in plan or f'USING COVERING INDEX {index_name}' in plan, plan
+        assert 'SEARCH books' in plan, plan
+    elif connection.vendor == 'postgresql':
+        # Test tables are tiny; take sequential scans off the table so the
+        # plan shows whether an index is usable at all.
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        assert index_name in plan, plan
+    else:
+        pytest.skip(f'No plan check for {connection.vendor}')
+
+
+@pytest.fixture
+def dated_books(db):
+    """Create books across several years and page counts."""
+    specs = [
+        ('1999', date(1999, 12, 31), 120),
+        ('2001a', date(2001, 1, 1), 250),
+        ('2001b', date(2001, 12, 31), 400),
+        ('2003', date(2003, 6, 15), 90),
+        ('undated', None, None),
+    ]
+    return {
+        title: Book.objects.create(
+            title=title, author='Author', isbn=f'97800000000{i:02d}',
+            published_date=published, page_count=pages,
+        )
+        for i, (title, published, pages) in enumerate(specs)
+    }
+
+
+def titles(queryset):
+    return sorted(queryset.values_list('title', flat=True))
+
+
+@pytest.mark.django_db
+class TestBookRangeFilters:
+    """Tests for range filter results."""
+
+    def test_published_year(self, dated_books):
+        """Test published_year covers the whole calendar year."""
+        assert titles(filtered('published_year=2001')) == ['2001a', '2001b']
+
+    def test_year_bounds(self, dated_books):
+        """Test year_min and year_max are inclusive."""
+        assert titles(filtered('year_min=2001&year_max=2003')) == ['2001a', '2001b', '2003']
+        assert titles(filtered('year_max=2000')) == ['1999']
+
+    def test_published_dates(self, dated_books):
+        """Test published_after and published_before are inclusive."""
+        assert titles(filtered('published_after=2001-12-31')) == ['2001b', '2003']
+        assert titles(filtered('published_before=2001-01-01')) == ['1999', '2001a']
+
+    def test_page_bounds(self, dated_books):
+        """Test pages_min and pages_max are inclusive."""
+        assert titles(filtered('pages_min=120&pages_max=250')) == ['1999', '2001a']
+
+    def test_out_of_range_years(self, dated_books):
+        """Test years outside the supported date range do not error."""
+        assert titles(filtered('year_min=0')) == ['1999', '2001a', '2001b', '2003']
+        assert titles(filtered('year_max=99999')) == ['1999', '2001a', '2001b', '2003']
+        assert titles(filtered('year_min=99999')) == []
+
+    def test_created_since(self, dated_books):
+        """Test created_since compares against the creation timestamp."""
+        params = urlencode({'created_since': dated_books['2003'].created_at.isoformat()})
+        assert '2003' in titles(filtered(params))
+        assert '1999' not in titles(filtered(params))
+
+
+@pytest.mark.django_db
+class TestBookRangeFilterPlans:
+    """Tests that range filters compile to index searches."""
+
+    def test_published_year_is_sargable(self, db):
+        """Test published_year does not wrap the column in a function."""
+        sql = str(filtered('published_year=2001').query).lower()
+        assert 'extract' not in sql
+        assert 'django_date_extract' not in sql
+        assert_uses_index(filtered('published_year=2001').order_by(), 'books_published_id_idx')
+
+    def test_year_range_uses_index(self, db):
+        """Test year bounds search the published date index."""
+        assert_uses_index(
+            filtered('year_min=2000&year_max=2005').order_by('published_date'),
+            'books_published_id_idx',
+        )
+
+    def test_published_after_uses_index(self, db):
+        """Test date bounds search the published date index."""
+        assert_uses_index(filtered('published_after=2001-01-01').order_by(), 'books_published_id_idx')
+
+    def test_pages_range_uses_index(self, db):
+        """Test page bounds search the page count index."""
+        assert_uses_index(filtered('pages_min=100&pages_max=300').order_by(), 'books_pages_id_idx')
+
+    def test_created_since_uses_index_in_list_order(self, db):
+        """Test created_since with the default list ordering uses one index."""
+        assert_uses_index(
+            filtered('created_since=2025-01-01T00:00:00Z').order_by('created_at'),
+            'books_created_id_idx',
+        )
@@ -0,0 +1,77 @@
+"""
+Unit tests for borrowing archival.
+"""
+import pytest
+from datetime import timedelta
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from apps.books.models import Book
+from apps.borrowings.archive import archive_batch, MergedBorrowingQuerySet
+from apps.borrowings.models import ArchivedBorrowing, Borrowing
+
+
+def _make_loans(user, count, returned_days_ago=None):
+    loans = []
+    for _ in range(count):
+        number = Book.objects.count()
+        book = Book.objects.create(
+            title=f'Archive Book {number}',
+            author='Author',
+            isbn=f'{9781000000000 + number}',
+        )
+        returned_at = None
+        if returned_days_ago is not None:
+            returned_at = timezone.now() - timedelta(days=returned_days_ago)
+        loans.append(Borrowing.objects.create(user=user, book=book, returned_at=returned_at))
+    return loans
+
+
+@pytest.mark.django_db
+class TestArchiveBorrowings:
+    """Tests for moving closed loans to the archive table."""
+
+    def test_archives_only_old_closed_loans(self, member_user):
+        """Test active and recently returned loans stay in the hot table."""
+        old = _make_loans(member_user, 3, returned_days_ago=400)
+        recent = _make_loans(member_user, 1, returned_days_ago=5)
+        active = _make_loans(member_user, 1)
+
+        call_command('archive_borrowings', '--older-than-days=365', '--batch-size=2')
+
+        assert set(Borrowing.objects.values_list('id', flat=True)) == {
+            recent[0].id, active[0].id
+        }
+        assert set(ArchivedBorrowing.objects.values_list('id', flat=True)) == {
+            loan.id for loan in old
+        }
+
+    def test_archive_batch_is_restartable(self, member_user):
+        """Test re-running after completion is a no-op."""
+        _make_loans(member_user, 2, returned_days_ago=400)
+        cutoff = timezone.now() - timedelta(days=365)
+        assert archive_batch(cutoff, batch_size=10) == 2
+        assert archive_batch(cutoff, batch_size=10) == 0
+        assert ArchivedBorrowing.objects.count() == 2
+
+    def test_merged_queryset_orders_across_tables(self, member_user):
+        """Test merged slices interleave both tables by (borrowed_at, id)."""
+        _make_loans(member_user, 4, returned_days_ago=400)
+        archive_batch(timezone.now() - timedelta(days=365), batch_size=2)
+        merged = MergedBorrowingQuerySet(
+            Borrowing.objects.all(), ArchivedBorrowing.objects.all()
+        ).order_by('-borrowed_at', '-id')
+        ids = [loan.id for loan in merged[0:10]]
+        assert ids == sorted(ids, reverse=True)
+        assert len(ids) == 4
+
+    def test_history_includes_archived_loans(self, authenticated_member_client, member_user):
+        """Test history transparently reads archived loans."""
+        _make_loans(member_user, 2, returned_days_ago=400)
+        _make_loans(member_user, 1)
+        call_command('archive_borrowings', '--older-than-days=365')
+
+        response = authenticated_member_client.get(reverse('borrowing-history'))
+        assert response.status_code == 200
+        assert len(response.data['results']) == 3
+        assert [r['is_active'] for r in response.data['results']].count(True) == 1
@@ -0,0 +1,122 @@
+"""
+Unit tests for worker memory diagnostics.
+"""
+import logging
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+from apps.core import memory
+from apps.core.memory import MemoryMonitor, compare, object_counts, peak_rss_bytes, rss_bytes, top_allocations
+
+
+@pytest.fixture
+def monitor():
+    monitor = MemoryMonitor()
+    yield monitor
+    monitor.stop_tracing()
+
+
+@pytest.fixture
+def kills(monkeypatch):
+    sent = []
+    monkeypatch.setattr('apps.core.memory.os.kill', lambda pid, sig: sent.append((pid, sig)))
+    return sent
+
+
+class TestMemoryMonitor:
+    """Tests for the per-worker memory monitor."""
+
+    def test_rss(self):
+        """Test RSS is read and reported in bytes."""
+        assert 1024 * 1024 < rss_bytes() <= peak_rss_bytes() * 2
+
+    def test_object_counts(self):
+        """Test live objects are counted by qualified type name."""
+        counts = {row['type']: row['count'] for row in object_counts(limit=1000)}
+        assert counts['builtins.dict'] > 0
+
+    def test_snapshot_diff(self, monitor):
+        """Test growth between two snapshots is attributed to the allocating line."""
+        first = monitor.take_snapshot()
+        hoard = [bytearray(1024) for _ in range(2000)]  # noqa: F841 - kept alive for the snapshot
+        second = monitor.take_snapshot()
+
+        growth = compare(monitor.get_snapshot(first), monitor.get_snapshot(second))
+        assert 'tests/unit/test_memory.py' in growth[0]['site']
+        assert growth[0]['size_diff_bytes'] >= 2000 * 1024
+        assert top_allocations(monitor.get_snapshot(second))
+        assert monitor.previous_snapshot_id(second) == first
+
+    @override_settings(MEMORY_SNAPSHOT_KEEP=2)
+    def test_keeps_last_snapshots(self, monitor):
+        """Test only the newest snapshots are kept."""
+        ids = [monitor.take_snapshot() for _ in range(3)]
+        assert list(monitor.snapshots) == ids[1:]
+
+    @override_settings(MEMORY_CHECK_EVERY=2)
+    def test_periodic_check_publishes_status(self, monitor):
+        """Test every Nth request publishes the worker's status for the others."""
+        request = RequestFactory().get('/')
+        monitor.request_finished(request)
+        assert MemoryMonitor.workers() == []
+        monitor.request_finished(request)
+        [status] = MemoryMonitor.workers()
+        assert status['worker'] == monitor.worker
+        assert status['requests'] == 2
+
+    def test_concurrent_workers_are_all_listed(self, monkeypatch):
+        """Test workers publishing at the same moment do not drop each other."""
+        class SlowCache:
+            """The cache, with reads slow enough to widen any read-modify-write window."""
+
+            def __getattr__(self, name):
+                return getattr(cache, name)
+
+            def get(self, *args, **kwargs):
+                value = cache.get(*args, **kwargs)
+                time.sleep(0.01)
+                return value
+
+        monkeypatch.setattr(memory, 'cache', SlowCache())
+        monitors = []
+        for i in range(8):
+            worker = MemoryMonitor()
+            worker.status = lambda i=i: {'worker': f'host:{i}', 'recycling': False}
+            monitors.append(worker)
+        threads = [threading.Thread(target=worker.check) for worker in monitors]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert [status['worker'] for status in MemoryMonitor.workers()] == [f'host:{i}' for i in range(8)]
+
+    @override_settings(MEMORY_RECYCLE_RSS_MB=1)
+    def test_recycles_gunicorn_worker(self, monitor, kills, caplog):
+        """Test a gunicorn worker over the limit logs why and terminates itself."""
+        caplog.set_level(logging.WARNING, logger='apps.memory')
+        request = RequestFactory().get('/', SERVER_SOFTWARE='gunicorn/23.0.0')
+        monitor.check(request)
+        monitor.check(request)
+
+        assert len(kills) == 1
+        [record] = caplog.records
+        assert record.data['event'] == 'worker_recycle'
+        assert 'over MEMORY_RECYCLE_RSS_MB=1' in record.data['reason']
+        assert MemoryMonitor.workers()[0]['recycling'] is True
+
+    @override_settings(MEMORY_RECYCLE_RSS_MB=1)
+    def test_no_recycling_outside_gunicorn(self, monitor, kills, caplog):
+        """Test other servers only get the warning."""
+        caplog.set_level(logging.WARNING, logger='apps.memory')
+        monitor.check(RequestFactory().get('/'))
+        assert kills == []
+        assert 'not recycling' in caplog.records[0].getMessage()
+
+    def test_under_limit(self, monitor, kills):
+        """Test nothing happens with recycling off."""
+        monitor.check(RequestFactory().get('/', SERVER_SOFTWARE='gunicorn/23.0.0'))
+        assert kills == []
@@ -0,0 +1,153 @@
+"""
+Unit tests for the metrics registry.
+"""
+import multiprocessing
+import os
+
+import pytest
+from django.test import override_settings
+from apps.core.metrics import Counter, Histogram, MmapStore, Registry
+
+
+def parse(text):
+    """``{sample line without value: value}`` of an exposition."""
+    return {
+        line.rpartition(' ')[0]: float(line.rpartition(' ')[2])
+        for line in text.splitlines() if not line.startswith('#')
+    }
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+class TestRegistry:
+    """Tests for counters, histograms and the text format."""
+
+    def test_counter(self, registry):
+        """Test counters are exposed per label set with HELP and TYPE lines."""
+        requests = Counter('requests', 'Requests.', ['route'], registry=registry)
+        requests.labels('book-list').inc()
+        requests.labels('book-list').inc()
+        requests.labels('book-detail').inc(3)
+
+        text = registry.exposition()
+        assert '# HELP requests Requests.\n# TYPE requests counter\n' in text
+        samples = parse(text)
+        assert samples['requests_total{route="book-list"}'] == 2
+        assert samples['requests_total{route="book-detail"}'] == 3
+
+    def test_histogram_buckets_are_cumulative(self, registry):
+        """Test observations land in the first bucket whose bound they do not exceed."""
+        latency = Histogram('latency', 'Latency.', buckets=(0.1, 1.0), registry=registry)
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+
+        samples = parse(registry.exposition())
+        assert samples['latency_bucket{le="0.1"}'] == 2
+        assert samples['latency_bucket{le="1"}'] == 3
+        assert samples['latency_bucket{le="+Inf"}'] == 4
+        assert samples['latency_count'] == 4
+        assert samples['latency_sum'] == pytest.approx(3.65)
+
+    def test_label_values_are_escaped(self, registry):
+        """Test quotes and backslashes in label values are escaped."""
+        errors = Counter('errors', 'Errors.', ['message'], registry=registry)
+        errors.labels('say "hi"\\').inc()
+        assert 'errors_total{message="say \\"hi\\"\\\\"} 1' in registry.exposition()
+
+    def test_wrong_label_count(self, registry):
+        """Test a series needs one value per label name."""
+        requests = Counter('requests', 'Requests.', ['route', 'status'], registry=registry)
+        with pytest.raises(ValueError):
+            requests.labels('book-list')
+
+    def test_duplicate_name(self, registry):
+        """Test two metrics cannot share a name."""
+        Counter('requests', 'Requests.', registry=registry)
+        with pytest.raises(ValueError):
+            Counter('requests', 'Again.', registry=registry)
+
+
+class TestMmapStore:
+    """Tests for the file-backed multiprocess store."""
+
+    def test_values_survive_reopen(self, tmp_path):
+        """Test a reopened file (a reused pid) continues from its values."""
+        path = str(tmp_path / 'metrics_1.db')
+        store = MmapStore(path)
+        key = ('requests', '_total', ('book-list',), '')
+        store.add(key, 2)
+        store.close()
+
+        store = MmapStore(path)
+        store.add(key, 1)
+        assert store.samples() == {key: 3}
+        assert MmapStore.read(path) == {key: 3}
+
+    def test_grows(self, tmp_path):
+        """Test the file grows when its entries outgrow the initial size."""
+        path = str(tmp_path / 'metrics_1.db')
+        store = MmapStore(path)
+        keys = [('requests', '_total', (f'route-{i:05d}',), '') for i in range(2000)]
+        for key in keys:
+            store.add(key, 1)
+        assert os.path.getsize(path) > MmapStore.INITIAL_SIZE
+        assert MmapStore.read(path) == {key: 1 for key in keys}
+
+
+def _record_in_child(count):
+    from apps.core.metrics import REGISTRY, http_requests
+
+    for _ in range(count):
+        http_requests.labels('GET', 'book-list', 200).inc()
+    REGISTRY.store.close()
+
+
+@pytest.mark.skipif(
+    'fork' not in multiprocessing.get_all_start_methods(), reason='needs fork',
+)
+class TestMultiprocess:
+    """Tests for aggregation across worker processes."""
+
+    def test_scrape_sums_workers(self, tmp_path):
+        """Test a scrape in one process reports the requests of every process."""
+        from apps.core.metrics import REGISTRY, http_requests
+
+        with override_settings(METRICS_MULTIPROC_DIR=str(tmp_path)):
+            REGISTRY.reset()
+            http_requests.labels('GET', 'book-list', 200).inc()
+            context = multiprocessing.get_context('fork')
+            workers = [context.Process(target=_record_in_child, args=(count,)) for count in (2, 3)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+                assert worker.exitcode == 0
+
+            samples = parse(REGISTRY.exposition())
+            REGISTRY.store.close()
+            REGISTRY.reset()
+
+        assert len(list(tmp_path.glob('metrics_*.db'))) == 3
+        assert samples['http_requests_total{method="GET",route="book-list",status="200"}'] == 6
+
+    def test_exited_workers_are_merged(self, tmp_path):
+        """Test exited workers' files fold into one aggregate file and the totals hold."""
+        from apps.core.metrics import AGGREGATE_FILE, REGISTRY, merge_exited_worker
+
+        with override_settings(METRICS_MULTIPROC_DIR=str(tmp_path)):
+            REGISTRY.reset()
+            context = multiprocessing.get_context('fork')
+            for count in (2, 3, 4):
+                worker = context.Process(target=_record_in_child, args=(count,))
+                worker.start()
+                worker.join()
+                merge_exited_worker(str(tmp_path), worker.pid)
+
+            samples = parse(REGISTRY.exposition())
+            REGISTRY.reset()
+
+        assert [path.name for path in tmp_path.glob('metrics_*.db')] == [AGGREGATE_FILE]
+        assert samples['http_requests_total{method="GET",route="book-list",status="200"}'] == 9
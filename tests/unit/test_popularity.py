@@ -0,0 +1,160 @@
+"""
+Unit tests for book popularity counters and trending scores.
+"""
+import io
+
+import pytest
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from apps.books.models import Book
+from apps.books.popularity import (
+    NO_SCORE,
+    PopularityBuffer,
+    add_scores,
+    decayed_score,
+    trending_weight,
+)
+from apps.borrowings.models import Borrowing
+
+
+@pytest.fixture(autouse=True)
+def clear_trending_cache():
+    """Start and end each test without a cached trending list."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class TestTrendingWeight:
+    """Tests for the decay arithmetic."""
+
+    def test_weight_doubles_every_half_life(self, settings):
+        """Test one half-life doubles the weight of a borrow (adds one to its log)."""
+        settings.TRENDING_HALF_LIFE_DAYS = 7
+        now = timezone.now()
+        assert trending_weight(now + timedelta(days=7)) == pytest.approx(trending_weight(now) + 1)
+
+    def test_short_half_life_does_not_overflow(self, settings):
+        """Test scores decades past the epoch stay finite with a one-day half-life."""
+        settings.TRENDING_HALF_LIFE_DAYS = 1
+        later = timezone.now() + timedelta(days=365 * 30)
+        score = add_scores(trending_weight(later), trending_weight(later))
+        assert decayed_score(score, later) == pytest.approx(2.0)
+
+    def test_add_scores(self):
+        """Test scores add like the weights they are logarithms of."""
+        assert add_scores(3.0, 3.0) == pytest.approx(4.0)
+        assert add_scores(NO_SCORE, 5.0) == 5.0
+        assert decayed_score(NO_SCORE) == 0.0
+
+    def test_decayed_score_of_fresh_borrow_is_one(self):
+        """Test a borrow made now is worth one decayed borrow."""
+        now = timezone.now()
+        assert decayed_score(trending_weight(now), now) == pytest.approx(1.0)
+
+
+@pytest.mark.django_db
+class TestPopularityBuffer:
+    """Tests for batched counter flushes."""
+
+    def test_increments_are_buffered_until_flush(self, sample_book, another_book):
+        """Test counters only reach the database on flush."""
+        buffer = PopularityBuffer(flush_size=100, flush_interval=3600)
+        for _ in range(3):
+            buffer.add(sample_book.id)
+        buffer.add(another_book.id)
+
+        sample_book.refresh_from_db()
+        assert sample_book.borrow_count == 0
+
+        assert buffer.flush() == 2
+        sample_book.refresh_from_db()
+        another_book.refresh_from_db()
+        assert sample_book.borrow_count == 3
+        assert another_book.borrow_count == 1
+        assert sample_book.trending_score > another_book.trending_score
+
+    def test_flushes_when_size_reached(self, sample_book):
+        """Test the buffer flushes itself at the size threshold."""
+        buffer = PopularityBuffer(flush_size=2, flush_interval=3600)
+        buffer.add(sample_book.id)
+        buffer.add(sample_book.id)
+        sample_book.refresh_from_db()
+        assert sample_book.borrow_count == 2
+
+    def test_recent_borrows_outrank_old_ones(self, sample_book, another_book):
+        """Test one new borrow beats several two-month-old borrows."""
+        buffer = PopularityBuffer(flush_size=100, flush_interval=3600)
+        old = timezone.now() - timedelta(days=60)
+        for _ in range(5):
+            buffer.add(sample_book.id, old)
+        buffer.add(another_book.id)
+        buffer.flush()
+
+        ordered = list(Book.objects.order_by('-trending_score').values_list('id', flat=True))
+        assert ordered[0] == another_book.id
+
+    def test_flush_adds_to_stored_score(self, sample_book):
+        """Test a flush combines new borrows with the stored score in SQL."""
+        now = timezone.now()
+        buffer = PopularityBuffer(flush_size=100, flush_interval=3600)
+        buffer.add(sample_book.id, now)
+        buffer.flush()
+        buffer.add(sample_book.id, now)
+        buffer.add(sample_book.id, now)
+        buffer.flush()
+        sample_book.refresh_from_db()
+        assert decayed_score(sample_book.trending_score, now) == pytest.approx(3.0)
+
+    def test_rescore_uses_current_half_life(self, settings, sample_book, another_book, member_user):
+        """Test rescoring recomputes scores from the loans."""
+        now = timezone.now()
+        Borrowing.objects.create(user=member_user, book=sample_book, returned_at=now)
+        Book.objects.filter(pk=another_book.pk).update(trending_score=12345.0)
+        settings.TRENDING_HALF_LIFE_DAYS = 1
+
+        call_command('rescore_trending', stdout=io.StringIO())
+
+        sample_book.refresh_from_db()
+        another_book.refresh_from_db()
+        assert decayed_score(sample_book.trending_score) == pytest.approx(1.0, abs=0.01)
+        assert another_book.trending_score == NO_SCORE
+
+
+@pytest.mark.django_db
+class TestPopularityAPI:
+    """Tests for popularity ordering and the trending endpoint."""
+
+    def test_checkout_counts_borrow(self, authenticated_member_client, sample_book,
+                                    django_capture_on_commit_callbacks, monkeypatch):
+        """Test checkout feeds the popularity buffer after commit."""
+        buffer = PopularityBuffer(flush_size=100, flush_interval=3600)
+        monkeypatch.setattr('apps.books.popularity.popularity_buffer', buffer)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_member_client.post(
+                reverse('borrowing-checkout'), {'book_id': sample_book.id}
+            )
+        assert response.status_code == 201
+        buffer.flush()
+        sample_book.refresh_from_db()
+        assert sample_book.borrow_count == 1
+
+    def test_order_by_borrow_count(self, api_client, sample_book, another_book):
+        """Test books can be ordered by all-time borrows."""
+        Book.objects.filter(pk=another_book.pk).update(borrow_count=5)
+        response = api_client.get(reverse('book-list'), {'ordering': 'borrow_count_desc'})
+        assert response.status_code == 200
+        assert response.data['results'][0]['id'] == another_book.id
+
+    def test_trending_endpoint(self, api_client, sample_book, another_book):
+        """Test trending list returns decayed scores."""
+        Book.objects.filter(pk=sample_book.pk).update(
+            borrow_count=1, trending_score=trending_weight()
+        )
+        response = api_client.get(reverse('book-trending'))
+        assert response.status_code == 200
+        assert [book['id'] for book in response.data] == [sample_book.id]
+        assert response.data[0]['trending_score'] == pytest.approx(1.0, abs=0.01)
@@ -0,0 +1,135 @@
+"""
+Unit tests for bulk member provisioning.
+"""
+import io
+
+import pytest
+from django.contrib.auth.hashers import check_password
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from apps.accounts import provisioning
+from apps.accounts.models import User
+from apps.accounts.provisioning import hash_passwords, provision_members, read_rows
+
+
+def rows(*users):
+    return list(enumerate(users, start=1))
+
+
+def member(i, **overrides):
+    row = {
+        'email': f'student{i}@school.org', 'username': f'student{i}',
+        'first_name': 'Student', 'last_name': str(i), 'password': 'TermStart2026!',
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.mark.django_db
+class TestProvisionMembers:
+    """Tests for creating members in bulk."""
+
+    def test_creates_members(self, member_group):
+        """Test rows become active Members with hashed passwords."""
+        report = provision_members(rows(member(1), member(2)))
+        assert report['created'] == 2
+        assert report['failed'] == 0
+
+        user = User.objects.get(email='student1@school.org')
+        assert check_password('TermStart2026!', user.password)
+        assert user.is_active
+        assert list(user.groups.values_list('name', flat=True)) == ['Members']
+
+    def test_query_count_is_independent_of_rows(self, member_group):
+        """Test a batch costs a fixed number of queries, not one per user."""
+        counts = []
+        for size, offset in [(5, 0), (60, 100)]:
+            with CaptureQueriesContext(connection) as captured:
+                report = provision_members(rows(*[member(offset + i) for i in range(size)]))
+            assert report['created'] == size
+            counts.append(len(captured))
+        assert counts[0] == counts[1]
+
+    def test_reports_row_errors(self, member_user):
+        """Test invalid, duplicate and existing rows are skipped and reported by line."""
+        report = provision_members(rows(
+            member(1),
+            member(2, email='not-an-email'),
+            member(3, username=''),
+            member(4, email='student1@school.org', username='other'),
+            member(5, email='member@bookcatalog.com'),
+            member(6, password='123'),
+            None,
+        ))
+        assert report['created'] == 1
+        assert [(error['line'], error['error']) for error in report['errors']] == [
+            (2, 'Enter a valid email address.'),
+            (3, 'username is required.'),
+            (4, 'Duplicate of an earlier row.'),
+            (5, 'A user with this email already exists.'),
+            (6, 'This password is too short. It must contain at least 8 characters. '
+                'This password is too common. This password is entirely numeric.'),
+            (7, 'Not a JSON object.'),
+        ]
+
+    def test_reports_rows_lost_to_repeated_races(self, member_group, monkeypatch):
+        """Test a second clash during the retry is reported per row, not raised."""
+        real_insert = provisioning._insert
+        racers = iter(['student1', 'student2'])
+
+        def racing_insert(batch, members):
+            racer = next(racers, None)
+            if racer is None:
+                return real_insert(batch, members)
+            # Another registration commits just before the batch insert
+            User.objects.create_user(email=f'{racer}@school.org', username=f'{racer}-web', password='x')
+            raise IntegrityError('duplicate key value violates unique constraint')
+
+        monkeypatch.setattr(provisioning, '_insert', racing_insert)
+        report = provision_members(rows(member(1), member(2), member(3)))
+
+        assert report['created'] == 1
+        assert [(error['line'], error['error']) for error in report['errors']] == [
+            (1, 'A user with this email already exists.'),
+            (2, 'A user with this email already exists.'),
+        ]
+        assert User.objects.filter(email='student3@school.org').exists()
+
+    def test_missing_password_is_unusable(self, member_group):
+        """Test rows without a password get an unusable one."""
+        provision_members(rows(member(1, password='')))
+        assert not User.objects.get(email='student1@school.org').has_usable_password()
+
+    def test_sends_no_user_signals(self, member_group, django_capture_on_commit_callbacks):
+        """Test bulk creation skips the per-row post_save and m2m signals."""
+        with django_capture_on_commit_callbacks() as callbacks:
+            provision_members(rows(member(1)))
+        assert callbacks == []
+
+    def test_hashes_in_process_pool(self):
+        """Test passwords hashed by worker processes verify."""
+        hashed = hash_passwords(['first-secret', 'second-secret', 'third-secret'], workers=2)
+        assert check_password('second-secret', hashed[1])
+
+    def test_reads_csv_and_jsonl(self):
+        """Test both input formats yield rows with their line numbers."""
+        csv_rows = list(read_rows(io.StringIO('email,username\na@x.org,a\nb@x.org,b\n'), 'csv'))
+        assert [(line, row['email']) for line, row in csv_rows] == [(2, 'a@x.org'), (3, 'b@x.org')]
+
+        jsonl_rows = list(read_rows(io.StringIO('{"email": "a@x.org"}\n\n[1]\n'), 'jsonl'))
+        assert jsonl_rows == [(1, {'email': 'a@x.org'}), (3, None)]
+
+    def test_command(self, member_group, tmp_path):
+        """Test the management command reads a file and reports the outcome."""
+        path = tmp_path / 'term.csv'
+        path.write_text(
+            'email,username,first_name,last_name,password\n'
+            'a@school.org,a,A,One,TermStart2026!\n'
+            'bad,b,B,Two,TermStart2026!\n'
+        )
+        out = io.StringIO()
+        call_command('provision_members', str(path), stdout=out)
+        assert 'line 3 (bad): Enter a valid email address.' in out.getvalue()
+        assert 'Created 1 members, 1 rows failed' in out.getvalue()
+        assert User.objects.filter(email='a@school.org').exists()
@@ -0,0 +1,96 @@
+"""
+Unit tests for the slow-query log.
+"""
+import pytest
+from django.db import connection
+from django.test import override_settings
+from apps.books.models import Book
+from apps.core.models import QueryFingerprint
+from apps.core.querylog import QueryProfiler, capture_plan, fingerprint, normalize_sql
+from apps.core.timing import time_queries
+
+
+class TestNormalizeSql:
+    """Tests for SQL normalization."""
+
+    def test_literals_and_placeholders(self):
+        """Test strings, numbers and placeholders become ``?``."""
+        assert normalize_sql(
+            "SELECT * FROM  books WHERE title = 'It''s' AND id = %s\n LIMIT 21 OFFSET 40"
+        ) == 'SELECT * FROM books WHERE title = ? AND id = ? LIMIT ? OFFSET ?'
+
+    def test_lists_collapse(self):
+        """Test IN lists and multi-row VALUES group regardless of length."""
+        assert normalize_sql('SELECT 1 FROM t WHERE id IN (%s, %s, %s)') == 'SELECT ? FROM t WHERE id IN (...)'
+        assert normalize_sql('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)') == \
+            'INSERT INTO t (a, b) VALUES (...)'
+
+    def test_identifiers_untouched(self):
+        """Test digits inside identifiers are kept."""
+        assert normalize_sql('SELECT "col_2" FROM t1') == 'SELECT "col_2" FROM t1'
+
+    def test_fingerprint(self):
+        """Test statements that differ only in literals share a fingerprint."""
+        assert fingerprint(normalize_sql('SELECT * FROM t WHERE id = 1')) == \
+            fingerprint(normalize_sql('SELECT * FROM t WHERE id = 2'))
+
+
+@pytest.mark.django_db
+class TestQueryProfiler:
+    """Tests for slow and repeated query detection."""
+
+    def test_repeated_query(self, sample_book):
+        """Test a statement run once per row is recorded as an N+1 suspect."""
+        with override_settings(QUERY_REPEAT_THRESHOLD=3):
+            with time_queries(QueryProfiler()) as profiler:
+                for _ in range(4):
+                    Book.objects.get(pk=sample_book.pk)
+                Book.objects.count()
+            profiler.finish('book-detail')
+
+        [row] = QueryFingerprint.objects.all()
+        assert row.repeat_requests == 1
+        assert row.repeat_max == 4
+        assert row.slow_count == 0
+        assert row.route == 'book-detail'
+        assert row.origin == ''  # Run from the tests, outside any application frame
+        assert 'WHERE "books"."id" = ?' in row.sql
+
+    def test_slow_query(self, sample_book):
+        """Test slow statements are aggregated per fingerprint."""
+        with override_settings(SLOW_QUERY_MS=0):
+            for book_id in (sample_book.pk, sample_book.pk + 1):
+                with time_queries(QueryProfiler()) as profiler:
+                    Book.objects.filter(pk=book_id).first()
+                profiler.finish('book-detail')
+
+        [row] = QueryFingerprint.objects.all()
+        assert row.slow_count == 2
+        assert row.slow_max_ms <= row.slow_total_ms
+        assert row.repeat_requests == 0
+
+    def test_fast_queries_not_recorded(self, sample_book):
+        """Test nothing is recorded below the thresholds."""
+        with override_settings(SLOW_QUERY_MS=10000):
+            with time_queries(QueryProfiler()) as profiler:
+                Book.objects.get(pk=sample_book.pk)
+            profiler.finish('book-detail')
+        assert profiler.count == 1
+        assert not QueryFingerprint.objects.exists()
+
+    @pytest.mark.skipif(connection.vendor != 'postgresql', reason='EXPLAIN plans are captured on PostgreSQL only')
+    def test_plan_on_postgres(self, sample_book):
+        """Test a slow SELECT gets its plan captured."""
+        with override_settings(SLOW_QUERY_MS=0):
+            with time_queries(QueryProfiler()) as profiler:
+                Book.objects.filter(pk=sample_book.pk).first()
+            profiler.finish('book-detail')
+        row = QueryFingerprint.objects.get()
+        assert row.plan
+        assert row.plan_captured_at is not None
+
+    def test_no_plan_elsewhere(self):
+        """Test no plan is captured on other databases or for writes."""
+        if connection.vendor != 'postgresql':
+            assert capture_plan('default', 'SELECT 1', []) is None
+        assert capture_plan('default', 'UPDATE books SET title = %s', ['x']) is None
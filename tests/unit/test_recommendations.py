@@ -0,0 +1,138 @@
+"""
+Unit tests for precomputed "readers also borrowed" recommendations.
+"""
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from apps.accounts.models import User
+from apps.books import recommendations
+from apps.books.models import Book, BookNeighbors
+from apps.books.recommendations import (
+    build_cooccurrence,
+    get_neighbors,
+    pack_neighbors,
+    unpack_neighbors,
+)
+from apps.borrowings.models import Borrowing
+
+
+def _borrow(user, *books):
+    for book in books:
+        Borrowing.objects.create(user=user, book=book, returned_at=timezone.now())
+
+
+@pytest.fixture
+def catalog(db):
+    """Return four books keyed by letter."""
+    return {
+        letter: Book.objects.create(title=f'Book {letter}', author='Author', isbn=f'978000000000{i}')
+        for i, letter in enumerate('abcd')
+    }
+
+
+@pytest.fixture
+def readers(db):
+    """Return three members."""
+    return [
+        User.objects.create_user(email=f'reader{i}@example.com', username=f'reader{i}', password='x')
+        for i in range(3)
+    ]
+
+
+class TestPacking:
+    """Tests for the compact neighbor encoding."""
+
+    def test_round_trip(self):
+        """Test packed neighbor lists decode to the same ids and scores."""
+        neighbors = [(12, 3.0), (7, 1.5), (2 ** 40, 0.25)]
+        assert unpack_neighbors(pack_neighbors(neighbors)) == neighbors
+
+    def test_cooccurrence_counts_shared_readers(self):
+        """Test two books co-occur once per member who borrowed both."""
+        matrix = build_cooccurrence([(1, 10), (1, 11), (2, 10), (2, 11), (2, 12)])
+        assert matrix.row(10) == {11: 2, 12: 1}
+        assert matrix.row(11)[12] == 1
+        assert matrix.row(99) == {}
+
+    def test_top_k_blocks_cover_every_book(self):
+        """Test rows are pruned to k and written in blocks."""
+        matrix = build_cooccurrence([(1, 10), (1, 11), (1, 12), (2, 10), (2, 11), (3, 13)])
+        blocks = list(matrix.top_k_blocks(1, block_size=2))
+        assert [len(block) for block in blocks] == [2, 2]
+        lists = {book_id: neighbors for block in blocks for book_id, neighbors in block.items()}
+        assert lists == {10: [(11, 2)], 11: [(10, 2)], 12: [(10, 1)], 13: []}
+
+
+@pytest.mark.django_db
+class TestAlsoBorrowed:
+    """Tests for building and serving neighbor lists."""
+
+    def test_full_rebuild_ranks_by_shared_readers(self, catalog, readers):
+        """Test the most co-borrowed book ranks first."""
+        _borrow(readers[0], catalog['a'], catalog['b'])
+        _borrow(readers[1], catalog['a'], catalog['b'], catalog['c'])
+        _borrow(readers[2], catalog['d'])
+
+        call_command('build_recommendations')
+
+        neighbors = get_neighbors(catalog['a'].id, BookNeighbors.KIND_ALSO_BORROWED)
+        assert [book_id for book_id, _ in neighbors] == [catalog['b'].id, catalog['c'].id]
+        assert get_neighbors(catalog['d'].id, BookNeighbors.KIND_ALSO_BORROWED) == []
+
+    def test_incremental_update_matches_rebuild(self, catalog, readers):
+        """Test folding in new loans gives the same lists as a full rebuild."""
+        _borrow(readers[0], catalog['a'], catalog['b'])
+        call_command('build_recommendations')
+
+        _borrow(readers[0], catalog['c'])
+        _borrow(readers[1], catalog['a'], catalog['c'])
+        call_command('build_recommendations', '--incremental')
+        incremental = {
+            book.id: get_neighbors(book.id, BookNeighbors.KIND_ALSO_BORROWED)
+            for book in catalog.values()
+        }
+
+        call_command('build_recommendations')
+        rebuilt = {
+            book.id: get_neighbors(book.id, BookNeighbors.KIND_ALSO_BORROWED)
+            for book in catalog.values()
+        }
+        assert incremental == rebuilt
+
+    def test_incremental_update_applies_history_cap(self, catalog, readers, monkeypatch):
+        """Test books pushed out of a member's capped history leave the lists, as in a rebuild."""
+        monkeypatch.setattr(recommendations, 'MAX_HISTORY_PER_USER', 2)
+        _borrow(readers[0], catalog['a'], catalog['b'])
+        call_command('build_recommendations')
+
+        _borrow(readers[0], catalog['c'], catalog['d'])
+        call_command('build_recommendations', '--incremental')
+        incremental = {
+            book.id: get_neighbors(book.id, BookNeighbors.KIND_ALSO_BORROWED)
+            for book in catalog.values()
+        }
+
+        call_command('build_recommendations')
+        rebuilt = {
+            book.id: get_neighbors(book.id, BookNeighbors.KIND_ALSO_BORROWED)
+            for book in catalog.values()
+        }
+        assert incremental == rebuilt
+        assert get_neighbors(catalog['a'].id, BookNeighbors.KIND_ALSO_BORROWED) == []
+
+    def test_endpoint(self, api_client, catalog, readers):
+        """Test the endpoint serves stored neighbors with scores."""
+        _borrow(readers[0], catalog['a'], catalog['b'])
+        call_command('build_recommendations')
+
+        url = reverse('book-also-borrowed', args=[catalog['a'].id])
+        response = api_client.get(url)
+        assert response.status_code == 200
+        assert response.data[0]['id'] == catalog['b'].id
+        assert response.data[0]['score'] == 1.0
+
+    def test_endpoint_unknown_book(self, api_client):
+        """Test unknown books return 404."""
+        response = api_client.get(reverse('book-also-borrowed', args=[99999]))
+        assert response.status_code == 404
@@ -0,0 +1,108 @@
+"""
+Unit tests for the token revocation store.
+"""
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.accounts.models import RevokedToken
+from apps.accounts.revocation import (
+    BloomFilter,
+    RevocationStore,
+    claim_token,
+    purge_expired,
+    revocation_store,
+    revoke_token,
+)
+
+
+class TestBloomFilter:
+    """Tests for the Bloom filter."""
+
+    def test_no_false_negatives(self):
+        """Test every added value is reported present."""
+        bloom = BloomFilter(1000, 0.01)
+        values = [f'jti-{i}' for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+        assert all(value in bloom for value in values)
+
+    def test_false_positive_rate(self):
+        """Test the false positive rate stays near the configured rate at capacity."""
+        bloom = BloomFilter(1000, 0.01)
+        for i in range(1000):
+            bloom.add(f'jti-{i}')
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        assert false_positives < 300
+
+
+@pytest.mark.django_db
+class TestRevocationStore:
+    """Tests for the per-worker revocation store."""
+
+    def test_unrevoked_token_costs_no_queries(self, member_user, django_assert_num_queries):
+        """Test a token missing from the filter is answered in memory."""
+        revocation_store.is_revoked('warm-up')
+        with django_assert_num_queries(0):
+            assert not revocation_store.is_revoked(str(AccessToken.for_user(member_user)['jti']))
+
+    def test_revoked_token_is_confirmed(self, member_user, django_assert_num_queries):
+        """Test a filter hit is confirmed against the table."""
+        token = AccessToken.for_user(member_user)
+        revocation_store.is_revoked('warm-up')
+        revoke_token(token, member_user.pk)
+        with django_assert_num_queries(1):
+            assert revocation_store.is_revoked(token['jti'])
+
+    def test_revoke_is_idempotent(self, member_user):
+        """Test revoking the same token twice keeps one row."""
+        token = AccessToken.for_user(member_user)
+        revoke_token(token, member_user.pk)
+        revoke_token(token, member_user.pk)
+        assert RevokedToken.objects.filter(jti=token['jti']).count() == 1
+
+    def test_claim_is_single_use(self, member_user):
+        """Test only the first claim on a token succeeds, whoever revoked it first."""
+        token = AccessToken.for_user(member_user)
+        assert claim_token(token, member_user.pk)
+        assert not claim_token(token, member_user.pk)
+
+        revoked = AccessToken.for_user(member_user)
+        revoke_token(revoked, member_user.pk)
+        assert not claim_token(revoked, member_user.pk)
+
+    @override_settings(REVOCATION_SYNC_SECONDS=0)
+    def test_sees_other_workers_revocations(self, member_user):
+        """Test a worker picks up revocations made elsewhere at its next sync."""
+        other_worker = RevocationStore()
+        assert not other_worker.is_revoked('warm-up')
+        token = AccessToken.for_user(member_user)
+        revoke_token(token, member_user.pk)
+        assert other_worker.is_revoked(token['jti'])
+
+    def test_rebuild_skips_expired_rows(self, member_user):
+        """Test expired revocations are left out of a rebuilt filter."""
+        RevokedToken.objects.create(
+            jti='expired', token_type='access', user=member_user,
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        assert not RevocationStore().might_be_revoked('expired')
+
+    def test_purge_expired(self, member_user):
+        """Test purging deletes only expired rows."""
+        now = timezone.now()
+        RevokedToken.objects.create(jti='old', token_type='access', expires_at=now - timedelta(minutes=1))
+        RevokedToken.objects.create(jti='live', token_type='access', expires_at=now + timedelta(minutes=1))
+        assert purge_expired(batch_size=1) == 1
+        assert list(RevokedToken.objects.values_list('jti', flat=True)) == ['live']
+
+    def test_purge_command(self):
+        """Test the purge management command runs."""
+        RevokedToken.objects.create(
+            jti='old', token_type='access', expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        call_command('purge_revoked_tokens')
+        assert not RevokedToken.objects.exists()
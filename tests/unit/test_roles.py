@@ -0,0 +1,96 @@
+"""
+Unit tests for role resolution and its cache.
+"""
+import pytest
+from django.contrib.auth.models import AnonymousUser, Group
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from apps.accounts import roles
+from apps.accounts.models import User
+from apps.accounts.roles import get_roles, is_administrator, is_member
+
+
+def fresh(user):
+    """Reload ``user`` so no per-request memo is carried over."""
+    return User.objects.get(pk=user.pk)
+
+
+@pytest.mark.django_db
+class TestRoleResolution:
+    """Tests for resolving and caching a user's roles."""
+
+    def test_roles(self, admin_user, member_user):
+        """Test roles are the user's group names."""
+        assert is_administrator(fresh(admin_user))
+        assert not is_administrator(fresh(member_user))
+        assert is_member(fresh(member_user))
+
+    def test_anonymous_has_no_roles(self):
+        """Test anonymous users have no roles and cost no queries."""
+        assert get_roles(AnonymousUser()) == frozenset()
+        assert get_roles(None) == frozenset()
+
+    def test_cached_across_instances(self, member_user, django_assert_num_queries):
+        """Test roles are read from the cache on later requests."""
+        get_roles(fresh(member_user))
+        user = fresh(member_user)
+        with django_assert_num_queries(0):
+            assert is_member(user)
+            assert not is_administrator(user)
+
+    def test_prefetched_groups_used(self, member_user, django_assert_num_queries):
+        """Test prefetched groups are used without a cache or database read."""
+        user = User.objects.prefetch_related('groups').get(pk=member_user.pk)
+        with django_assert_num_queries(0):
+            assert is_member(user)
+
+    def test_invalidated_on_add_and_remove(self, member_user, admin_group):
+        """Test changing user.groups drops the cached roles."""
+        assert not is_administrator(fresh(member_user))
+        member_user.groups.add(admin_group)
+        assert is_administrator(member_user)
+        assert is_administrator(fresh(member_user))
+        member_user.groups.remove(admin_group)
+        assert not is_administrator(fresh(member_user))
+
+    def test_invalidated_on_reverse_changes(self, member_user, admin_group):
+        """Test changing group.user_set drops the members' cached roles."""
+        assert not is_administrator(fresh(member_user))
+        admin_group.user_set.add(member_user)
+        assert is_administrator(fresh(member_user))
+        admin_group.user_set.clear()
+        assert not is_administrator(fresh(member_user))
+
+    def test_invalidated_on_group_rename(self, admin_user):
+        """Test renaming a group changes its members' roles."""
+        assert is_administrator(fresh(admin_user))
+        group = Group.objects.get(name='Administrators')
+        group.name = 'Former Administrators'
+        group.save()
+        assert not is_administrator(fresh(admin_user))
+
+    def test_invalidated_on_group_delete(self, admin_user):
+        """Test deleting a group removes the role from its members."""
+        assert is_administrator(fresh(admin_user))
+        Group.objects.get(name='Administrators').delete()
+        assert not is_administrator(fresh(admin_user))
+
+    def test_per_process_cache_caps_lifetime(self, settings):
+        """Test a per-process cache keeps roles only briefly, since invalidation stays local."""
+        settings.ROLE_CACHE_TIMEOUT = 3600
+        assert roles._timeout() == roles.LOCAL_CACHE_TIMEOUT
+
+
+@pytest.mark.django_db
+class TestRoleQueries:
+    """Tests for the database cost of authorization."""
+
+    def test_permission_checks_share_one_lookup(self, admin_user, api_client):
+        """Test repeated admin requests resolve roles from the database at most once."""
+        api_client.force_authenticate(user=fresh(admin_user))
+        with CaptureQueriesContext(connection) as captured:
+            api_client.get(reverse('borrowing-overdue'))
+            api_client.get(reverse('borrowing-overdue'))
+        group_queries = [q for q in captured.captured_queries if 'auth_group' in q['sql']]
+        assert len(group_queries) <= 1
@@ -0,0 +1,93 @@
+"""
+Unit tests for TF-IDF content similarity.
+"""
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from apps.books.models import Book, BookNeighbors
+from apps.books.recommendations import get_neighbors
+from apps.books.similarity import build_vectors, term_counts, tokenize, update_similar
+
+
+def _similar_ids(book):
+    return [book_id for book_id, _ in get_neighbors(book.id, BookNeighbors.KIND_SIMILAR)]
+
+
+@pytest.fixture
+def shelf(db):
+    """Return a small catalog with two clear topics."""
+    rows = [
+        ('python', 'Python Programming', 'Guido Rossum', 'Technology', 'Learn python programming and software design'),
+        ('django', 'Django Web Programming', 'Adrian Holovaty', 'Technology', 'Web software with python and django'),
+        ('rome', 'History of Rome', 'Mary Beard', 'History', 'Ancient rome empire and senate'),
+        ('caesar', 'Caesar', 'Adrian Goldsworthy', 'History', 'Life of a roman general in ancient rome'),
+    ]
+    return {
+        key: Book.objects.create(
+            title=title, author=author, genre=genre, description=description,
+            isbn=f'97810000000{i:02d}'
+        )
+        for i, (key, title, author, genre, description) in enumerate(rows)
+    }
+
+
+class TestVectors:
+    """Tests for tokenization and TF-IDF weighting."""
+
+    def test_tokenize_drops_stop_words(self):
+        """Test stop words and single characters are removed."""
+        assert tokenize('The Art of War, a Classic') == ['art', 'war', 'classic']
+
+    def test_vectors_are_normalized(self):
+        """Test every vector has unit length."""
+        documents = {1: {'python': 2, 'web': 1}, 2: {'python': 1, 'rome': 3}, 3: {'rome': 1, 'history': 1}}
+        vectors = build_vectors(documents)
+        for vector in vectors.values():
+            assert sum(weight * weight for weight in vector.values()) == pytest.approx(1.0)
+
+
+@pytest.mark.django_db
+class TestSimilarBooks:
+    """Tests for building and serving similar-book lists."""
+
+    def test_rebuild_groups_by_topic(self, shelf):
+        """Test books on the same topic are each other's nearest neighbor."""
+        call_command('build_recommendations', '--kind=similar')
+        assert _similar_ids(shelf['python'])[0] == shelf['django'].id
+        assert _similar_ids(shelf['rome'])[0] == shelf['caesar'].id
+
+    def test_term_counts_weight_title(self, shelf):
+        """Test title terms outweigh description terms."""
+        counts = term_counts(shelf['python'])
+        assert counts['programming'] > counts['software']
+
+    def test_incremental_update_picks_up_changed_books(self, shelf):
+        """Test a rewritten book moves to its new topic's lists."""
+        call_command('build_recommendations', '--kind=similar')
+
+        book = shelf['caesar']
+        book.title = 'Python Web Software'
+        book.genre = 'Technology'
+        book.description = 'Programming python and django web software'
+        book.save()
+        call_command('build_recommendations', '--kind=similar', '--incremental')
+
+        assert _similar_ids(book)[0] in {shelf['python'].id, shelf['django'].id}
+        assert _similar_ids(shelf['rome'])[:1] != [book.id]
+
+    def test_incremental_update_skips_circulation_writes(self, shelf):
+        """Test saves that leave the text alone do not trigger rescoring."""
+        call_command('build_recommendations', '--kind=similar')
+
+        book = Book.objects.get(pk=shelf['rome'].pk)
+        book.is_available = False
+        book.save()
+        assert update_similar() == 0
+
+    def test_endpoint(self, api_client, shelf):
+        """Test the endpoint serves stored neighbors with scores."""
+        call_command('build_recommendations', '--kind=similar')
+        response = api_client.get(reverse('book-similar', args=[shelf['python'].id]))
+        assert response.status_code == 200
+        assert response.data[0]['id'] == shelf['django'].id
+        assert 0 < response.data[0]['score'] <= 1
@@ -0,0 +1,53 @@
+"""
+Unit tests for the sliding-window rate limiter.
+"""
+import pytest
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from apps.core import throttling
+from apps.core.throttling import ApiRateThrottle, parse_rate, sliding_window_hit
+
+
+class TestSlidingWindow:
+    """Tests for the sliding-window counter."""
+
+    def test_parse_rate(self):
+        """Test rates are parsed into a count and a window in seconds."""
+        assert parse_rate('100/min') == (100, 60)
+        assert parse_rate('30/hour') == (30, 3600)
+        assert parse_rate('5/s') == (5, 1)
+
+    def test_counts_current_and_previous_windows(self):
+        """Test hits are counted per window and the previous window is reported."""
+        assert sliding_window_hit('k', 60, 120.0, cache) == (1, 0, 0.0)
+        assert sliding_window_hit('k', 60, 150.0, cache) == (2, 0, 30.0)
+        assert sliding_window_hit('k', 60, 185.0, cache) == (1, 2, 5.0)
+
+    def test_redis_script_is_registered_once(self, monkeypatch):
+        """Test the Lua script is registered once and run on each request's client."""
+        registered, used = [], []
+
+        class FakeClient:
+            def register_script(self, source):
+                registered.append(source)
+                return lambda keys, args, client: used.append(client) or [len(used), 0]
+
+        redis_cache = RedisCache('redis://localhost:6379/0', {})
+        monkeypatch.setattr(redis_cache._cache, 'get_client', lambda key, write: FakeClient())
+        monkeypatch.setattr(throttling, '_sliding_window_script', None)
+
+        assert sliding_window_hit('k', 60, 120.0, redis_cache) == (1, 0, 0.0)
+        assert sliding_window_hit('k', 60, 130.0, redis_cache) == (2, 0, 10.0)
+        assert len(registered) == 1
+        assert used[0] is not used[1]
+
+    def test_retry_after_within_window(self):
+        """Test the wait until the previous window has decayed enough."""
+        # 10/min, 10 requests last minute, 2 this minute, 15s in: 7.5 + 2 + 1 > 10;
+        # a retry fits once 10 * (60 - t) / 60 + 3 <= 10, at t = 18
+        assert ApiRateThrottle._retry_after(10, 60, 2, 10, 15.0) == pytest.approx(3.0)
+
+    def test_retry_after_next_window(self):
+        """Test a full current window waits into the next one."""
+        # 11 of 10 used, 20s in: next window in 40s, then 11 * (60 - t) / 60 + 1 <= 10
+        assert ApiRateThrottle._retry_after(10, 60, 11, 0, 20.0) == pytest.approx(40 + 60 * (1 - 9 / 11))